@@ -0,0 +1,157 @@
+import argparse
+import os
+import textwrap
+
+"""
+Generates synthetic FMF trees (compliant with the fmfexporter test case schema),
+used to benchmark the fmfexporter with a large number of test cases.
+
+Test cases are spread through a directory hierarchy (depth levels with fanout
+sub directories each), and every directory contributes inherited attributes
+(main.fmf), as in real trees.
+
+Usage:
+    python benchmarks/fmf_tree_generator.py /tmp/tree --count 200000 --depth 3 --fanout 8 --steps 5
+"""
+
+# Test cases written into each metadata file (by default)
+TESTCASES_PER_FILE = 500
+
+TESTCASE_TEMPLATE = """  /test_%(index)06d:
+    summary: Synthetic test case %(index)d
+    description: |
+%(description)s
+    importance: %(importance)s
+    defects:
+      - jira: %(project)s-%(defect)d
+%(requirements)s    test-steps:
+%(steps)s"""
+
+STEP_TEMPLATE = """      - step: Step %(step)d of test case %(index)d
+        expected: Expected result %(step)d
+"""
+
+REQUIREMENT_TEMPLATE = """    requirements:
+      - polarion: %(project)s-REQ-%(requirement)d
+"""
+
+IMPORTANCE = ['critical', 'high', 'medium', 'low']
+
+WORDS = ("the router forwards every message to the broker queue before the client "
+         "receives an acknowledgement and the link is detached").split()
+
+
+def get_description(index: int, size: int) -> str:
+    """
+    Returns a (multi line) description with about size characters, indented as a block scalar.
+    :param index:
+    :param size:
+    :return:
+    """
+    words = []
+    length = 0
+    while length < size:
+        word = WORDS[(index + len(words)) % len(WORDS)]
+        words.append(word)
+        length += len(word) + 1
+    text = ("Test case %d: " % index + " ".join(words))[:max(size, 1)]
+    return "\n".join(["      " + line for line in textwrap.wrap(text, 70)])
+
+
+def get_directory(file_index: int, depth: int, fanout: int) -> list:
+    """
+    Returns the directory names (one per depth level) holding the given metadata file.
+    Consecutive files are spread evenly across the sub directories.
+    :param file_index:
+    :param depth:
+    :param fanout:
+    :return:
+    """
+    names = []
+    for level in range(depth):
+        names.append('area%d_%02d' % (level, file_index % fanout))
+        file_index //= fanout
+    return names
+
+
+def write_main(directory: str, level: int, position: int):
+    """
+    Writes the main.fmf of a directory, holding the attributes inherited by its test cases.
+    :param directory:
+    :param level:
+    :param position:
+    :return:
+    """
+    main_fmf = os.path.join(directory, 'main.fmf')
+    if os.path.exists(main_fmf):
+        return
+    with open(main_fmf, 'w') as main:
+        main.write("tags+:\n  - L%d_%02d\n" % (level, position))
+        if level == 0:
+            main.write("components:\n  - component%02d\n" % position)
+            main.write("testsuite:\n  properties:\n    area: value%02d\n" % position)
+        elif level == 1:
+            main.write("subcomponents:\n  - subcomponent%02d\n" % position)
+
+
+def generate_tree(path: str, count: int, project: str = 'BENCH', depth: int = 1, fanout: int = 100,
+                  steps: int = 1, description_size: int = 40,
+                  testcases_per_file: int = TESTCASES_PER_FILE) -> str:
+    """
+    Generates an FMF tree with the given number of test cases at path.
+    :param path:
+    :param count:
+    :param project: Polarion project of the test cases
+    :param depth: directory levels above the metadata files
+    :param fanout: sub directories per directory (inheritance fan-out)
+    :param steps: test steps per test case
+    :param description_size: characters of each test case description
+    :param testcases_per_file: test cases written into each metadata file
+    :return: path
+    """
+    os.makedirs(os.path.join(path, '.fmf'), exist_ok=True)
+    with open(os.path.join(path, '.fmf', 'version'), 'w') as version:
+        version.write("1\n")
+
+    # Attributes shared by all test cases are inherited from the root
+    with open(os.path.join(path, 'main.fmf'), 'w') as main:
+        main.write("level: component\ntype: functional\nauthors:\n  - Benchmark <bench@example.com>\n"
+                   "adapter:\n  polarion:\n    project: %s\n    lookup-method: name\n    automated: true\n"
+                   % project)
+
+    for start in range(0, count, testcases_per_file):
+        file_index = start // testcases_per_file
+        directory = path
+        for level, name in enumerate(get_directory(file_index, depth, fanout)):
+            directory = os.path.join(directory, name)
+            os.makedirs(directory, exist_ok=True)
+            write_main(directory, level, int(name.rsplit('_', 1)[1]))
+
+        with open(os.path.join(directory, 'bench_%04d.fmf' % file_index), 'w') as out:
+            out.write("/TestBench%04d:\n  tags+:\n    - CLASS%d\n" % (file_index, file_index % 10))
+            for index in range(start, min(count, start + testcases_per_file)):
+                requirements = REQUIREMENT_TEMPLATE % {'project': project, 'requirement': index % 50} \
+                    if index % 3 == 0 else ""
+                out.write(TESTCASE_TEMPLATE % {
+                    'index': index, 'project': project, 'defect': index % 100,
+                    'importance': IMPORTANCE[index % len(IMPORTANCE)],
+                    'description': get_description(index, description_size),
+                    'requirements': requirements,
+                    'steps': "".join([STEP_TEMPLATE % {'step': step, 'index': index}
+                                      for step in range(1, steps + 1)])})
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generates a synthetic FMF tree")
+    parser.add_argument("path", help="Directory of the generated FMF tree")
+    parser.add_argument("--count", type=int, default=1000, help="Number of test cases")
+    parser.add_argument("--project", default='BENCH', help="Polarion project of the test cases")
+    parser.add_argument("--depth", type=int, default=1, help="Directory levels above the metadata files")
+    parser.add_argument("--fanout", type=int, default=100, help="Sub directories per directory")
+    parser.add_argument("--steps", type=int, default=1, help="Test steps per test case")
+    parser.add_argument("--description-size", type=int, default=40, help="Characters of each description")
+    parser.add_argument("--per-file", type=int, default=TESTCASES_PER_FILE, help="Test cases per metadata file")
+    args = parser.parse_args()
+    generate_tree(args.path, args.count, args.project, args.depth, args.fanout, args.steps,
+                  args.description_size, args.per_file)
@@ -0,0 +1,222 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+import fmf
+
+from benchmarks.fmf_tree_generator import generate_tree
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.polarion_reporter import PolarionReporter
+from fmfexporter.adapters.polarion.polarion_test_case import PolarionTestCase
+from fmfexporter.fmf_testcase import FMFTestCase
+
+"""
+Microbenchmarks of the hot paths of an export (tree loading, test case selection,
+conversion and XML rendering), run against a synthetic FMF tree and compared
+against a stored baseline.
+
+Benchmarks run in several rounds (interleaved, so a busy period affects all of them
+alike). Each round keeps the best time of each benchmark, normalized by a fixed
+calibration loop timed in the same round, and the median across rounds is compared,
+so that a baseline recorded on one machine can be compared with results from another one.
+
+Usage:
+    python benchmarks/microbenchmarks.py                      # compare with benchmarks/baseline.json
+    python benchmarks/microbenchmarks.py --save-baseline      # record a new baseline
+    python benchmarks/microbenchmarks.py --count 10000 --steps 5 --rounds 9 --tolerance 0.2
+"""
+
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+
+def calibrate(repeat: int) -> float:
+    """
+    Returns the (best) time of a fixed pure python workload on this machine.
+    :param repeat:
+    :return:
+    """
+    def workload():
+        data = {}
+        for i in range(50000):
+            data[str(i)] = i * 2
+        return sorted(data.values())
+    return measure(workload, repeat)
+
+
+def measure(func, repeat: int, min_time: float = 0.5) -> float:
+    """
+    Returns the best wall time (in seconds) out of at least repeat calls of func.
+    Fast functions are called until min_time has been spent, reducing the noise.
+    Garbage collection is disabled while measuring (as timeit does).
+    :param func:
+    :param repeat:
+    :param min_time:
+    :return:
+    """
+    best = None
+    calls = 0
+    deadline = time.perf_counter() + min_time
+    gc.collect()
+    gc.disable()
+    try:
+        while calls < repeat or time.perf_counter() < deadline:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            calls += 1
+    finally:
+        gc.enable()
+    return best
+
+
+def get_benchmarks(tree: str) -> list:
+    """
+    Returns the (name, function) benchmarks for the given FMF tree.
+    Inputs of each benchmark are prepared up front, so only the measured step is timed.
+    :param tree:
+    :return:
+    """
+    adapter = FMFAdapterPolarion(tree)
+    # Only leaf nodes are test cases (as selected by iter_testcases)
+    nodes = [node for node in fmf.Tree(tree).climb() if not node.children]
+    fmf_testcases = [FMFTestCase.from_fmf_testcase_node(node) for node in nodes]
+    polarion_testcases = [PolarionTestCase.from_fmf_testcase(tc) for tc in fmf_testcases]
+    pairs = [(node.name.rsplit('/', 1)[0][1:].replace('/', '.'), node.name.rsplit('/', 1)[1])
+             for node in nodes[::10]]
+
+    def get_testcases_matching():
+        # Timed cold: indexes and compiled patterns are not reused between calls
+        adapter._node_index = None
+        adapter._query_index = None
+        re.purge()
+        return adapter.get_testcases_matching('test_0001')
+
+    def build_node_index():
+        adapter._node_index = None
+        return adapter._get_node_index()
+
+    return [
+        ('tree_load', lambda: fmf.Tree(tree)),
+        ('get_testcases_matching', get_testcases_matching),
+        ('build_node_index', build_node_index),
+        ('get_testcases', lambda: adapter.get_testcases(pairs)),
+        ('from_fmf_testcase_node', lambda: [FMFTestCase.from_fmf_testcase_node(node) for node in nodes]),
+        ('polarion_from_fmf_testcase', lambda: [PolarionTestCase.from_fmf_testcase(tc) for tc in fmf_testcases]),
+        ('polarion_to_xml', lambda: PolarionReporter.to_xml(polarion_testcases)),
+        ('create_step_result_table', lambda: [ptc.create_step_result_table(ptc.steps)
+                                              for ptc in polarion_testcases]),
+    ]
+
+
+def run(args) -> dict:
+    """
+    Generates the tree and runs all benchmarks, returning the results.
+    :param args:
+    :return:
+    """
+    workdir = args.workdir or tempfile.mkdtemp(prefix='fmfexporter-micro-')
+    tree = generate_tree(os.path.join(workdir, 'tree'), args.count, depth=args.depth, fanout=args.fanout,
+                         steps=args.steps, description_size=args.description_size)
+    # to_xml writes testcase.xml into the current directory
+    os.chdir(workdir)
+
+    benchmarks = [(name, func) for name, func in get_benchmarks(tree) if not args.only or name in args.only]
+    calibrations = []
+    rounds = {name: [] for name, func in benchmarks}
+    for _ in range(args.rounds):
+        # Calibrated before and after the round, in case the machine was busy for a part of it
+        calibration = calibrate(args.repeat)
+        timings = [(name, measure(func, args.repeat)) for name, func in benchmarks]
+        calibration = min(calibration, calibrate(args.repeat))
+        calibrations.append(calibration)
+        for name, seconds in timings:
+            rounds[name].append(seconds / calibration)
+
+    calibration = statistics.median(calibrations)
+    results = {}
+    for name, normalized in rounds.items():
+        median = statistics.median(normalized)
+        results[name] = {'seconds': median * calibration, 'normalized': median,
+                         'spread': (max(normalized) - min(normalized)) / median}
+    return {'python': platform.python_version(), 'calibration_seconds': calibration,
+            'tree': {'count': args.count, 'depth': args.depth, 'fanout': args.fanout, 'steps': args.steps,
+                     'description_size': args.description_size},
+            'results': results}
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> int:
+    """
+    Prints the results next to the baseline ones, returning the number of regressions
+    (normalized time above the baseline one by more than tolerance).
+    :param report:
+    :param baseline:
+    :param tolerance: i.e: 0.5 allows results to be 50% slower than the baseline
+    :return:
+    """
+    if baseline and baseline.get('tree') != report['tree']:
+        print("Baseline recorded for a different tree (%s), not compared" % baseline.get('tree'))
+        baseline = None
+
+    regressions = 0
+    print("%-28s %10s %10s %7s %10s %8s" % ("Benchmark", "Time (ms)", "Norm.", "Spread", "Baseline", "Change"))
+    for name, result in report['results'].items():
+        base = (baseline or {}).get('results', {}).get(name)
+        if base is None:
+            print("%-28s %10.1f %10.3f %6.0f%% %10s %8s" % (name, result['seconds'] * 1000, result['normalized'],
+                                                          result['spread'] * 100, '-', '-'))
+            continue
+        change = result['normalized'] / base['normalized'] - 1
+        status = ""
+        if change > tolerance:
+            status = "REGRESSION"
+            regressions += 1
+        print("%-28s %10.1f %10.3f %6.0f%% %10.3f %+7.0f%% %s" % (name, result['seconds'] * 1000, result['normalized'],
+                                                                 result['spread'] * 100, base['normalized'],
+                                                                 change * 100, status))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="fmfexporter microbenchmarks")
+    parser.add_argument("--count", type=int, default=1000, help="Number of test cases")
+    parser.add_argument("--depth", type=int, default=2, help="Directory levels of the tree")
+    parser.add_argument("--fanout", type=int, default=4, help="Sub directories per directory")
+    parser.add_argument("--steps", type=int, default=3, help="Test steps per test case")
+    parser.add_argument("--description-size", type=int, default=200, help="Characters of each description")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Minimum runs of each benchmark per round (best one is kept)")
+    parser.add_argument("--rounds", type=int, default=7, help="Rounds of runs (their median is compared)")
+    parser.add_argument("--only", action='append', help="Benchmark to run (can be repeated)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file")
+    parser.add_argument("--save-baseline", action='store_true', help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slowdown ratio before a result is flagged as a regression")
+    parser.add_argument("--workdir", help="Directory for the generated tree (temporary one by default)")
+    args = parser.parse_args()
+
+    report = run(args)
+    baseline = None
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    regressions = compare(report, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        print("Baseline saved: %s" % args.baseline)
+    elif regressions:
+        print("%d regression(s) found" % regressions)
+        sys.exit(1)
@@ -0,0 +1,99 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.fmf_tree_generator import generate_tree
+from fmfexporter.adapters.polarion.utils.polarion_importer_stub import PolarionImporterStub
+
+"""
+End to end load benchmark: drives the fmfexporter CLI against the local Polarion
+importer stand-in, for FMF trees of increasing sizes, reporting the throughput
+and the latency percentiles observed by the stand-in.
+
+Usage:
+    python benchmarks/polarion_load.py --sizes 1000,10000,50000 --delay 2
+    python benchmarks/polarion_load.py --sizes 1000 -- --one-by-one
+(arguments after "--" are given to the polarion adapter)
+"""
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Returns the given percentile (nearest rank) of the values.
+    :param values:
+    :param pct:
+    :return:
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, int(round(pct / 100.0 * len(values))) - 1))]
+
+
+def run(size: int, workdir: str, settings: dict, cli_args: list, delay: float, failure_rate: float) -> dict:
+    """
+    Exports a synthetic tree with the given number of test cases to a new stand-in.
+    :return: measurements
+    """
+    tree = generate_tree(os.path.join(workdir, 'tree-%d' % size), size)
+    with PolarionImporterStub(delay=delay, failure_rate=failure_rate, seed=size) as stub:
+        config_file = os.path.join(workdir, 'config-%d.ini' % size)
+        with open(config_file, 'w') as config:
+            config.write("[polarion]\nTestCaseImporterUrl=%s\nuser=bench\npass=bench\n" % stub.test_case_url)
+            config.write("".join(["%s=%s\n" % item for item in settings.items()]))
+
+        command = [sys.executable, os.path.join(ROOT_DIR, 'bin', 'fmfexporter'), '--log-level', 'WARNING',
+                   '-p', tree, 'polarion', '-c', config_file, '--submit', '--jira-populate-tc'] + cli_args
+        env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+        start = time.monotonic()
+        process = subprocess.run(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, universal_newlines=True)
+        elapsed = time.monotonic() - start
+        if process.returncode != 0 and not failure_rate:
+            print(process.stderr[-2000:])
+
+        stats = stub.stats
+        return {'size': size, 'elapsed': elapsed, 'rc': process.returncode, 'uploads': stats.uploads,
+                'polls': stats.polls, 'log_bytes': stats.log_bytes, 'lags': stats.detection_lags}
+
+
+def report(result: dict):
+    uploads, lags = result['uploads'], result['lags']
+    print("%7d cases | %7.1fs | %8.1f cases/s | rc=%d" % (result['size'], result['elapsed'],
+                                                          result['size'] / result['elapsed'], result['rc']))
+    print("        uploads: %6d | p50 %7.1fms | p90 %7.1fms | p99 %7.1fms"
+          % (len(uploads), percentile(uploads, 50) * 1000, percentile(uploads, 90) * 1000,
+             percentile(uploads, 99) * 1000))
+    print("        polls:   %6d | %.1f KB of job logs | detection lag p50 %.2fs p90 %.2fs p99 %.2fs"
+          % (result['polls'], result['log_bytes'] / 1024.0, percentile(lags, 50), percentile(lags, 90),
+             percentile(lags, 99)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="fmfexporter end to end load benchmark")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma separated number of test cases")
+    parser.add_argument("--delay", type=float, default=1, help="Seconds until import jobs finish")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Ratio of failed import jobs (0-1)")
+    parser.add_argument("--chunk-max-testcases", type=int, default=1000,
+                        help="ChunkMaxTestCases config (batch mode)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="ChunkConcurrency, SubmitConcurrency and JobPollConcurrency config")
+    parser.add_argument("--workdir", help="Directory for the generated trees (temporary if not set)")
+    parser.add_argument("cli_args", nargs=argparse.REMAINDER, help="Extra polarion adapter arguments")
+    args = parser.parse_args()
+
+    settings = {'ChunkMaxTestCases': args.chunk_max_testcases, 'ChunkConcurrency': args.concurrency,
+                'SubmitConcurrency': args.concurrency, 'JobPollConcurrency': args.concurrency}
+    cli_args = [arg for arg in args.cli_args if arg != '--']
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for size in [int(size) for size in args.sizes.split(',')]:
+            report(run(size, workdir, settings, cli_args, args.delay, args.failure_rate))
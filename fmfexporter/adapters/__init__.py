@@ -1,5 +1,10 @@
 #
-# All concrete adapters should be imported here, otherwise they
-# won't be recognized as subclasses of FMFAdapter (__subclasses__()).
+# All concrete adapters should be registered here (see FMFAdapterRegistry).
+# Only the location of their classes is registered, so an adapter and its
+# dependencies are only imported when the adapter is used.
 #
-from fmfexporter.adapters.polarion.fmf_adapter_polarion import *
+from fmfexporter.fmf_adapter import FMFAdapterRegistry
+
+FMFAdapterRegistry.register('polarion',
+                            'fmfexporter.adapters.polarion.fmf_adapter_polarion:FMFAdapterPolarion',
+                            'fmfexporter.adapters.polarion.args.polarion_args_parser:PolarionArgParser')
@@ -19,6 +19,15 @@ class PolarionArgParser(FMFAdapterArgParser):
     ONE_BY_ONE: bool = False
     JIRA_CONFIG: str = None
     POPUL_TC: bool = False
+    STATE_FILE: str = None
+    JOBS: int = 1
+    ASYNC_JOURNAL: str = None
+    COLLECT_JOURNAL: str = None
+    CHECKPOINT_FILE: str = None
+    RESUME: bool = False
+    RESULTS: list = None
+    TEST_RUN_ID: str = None
+    TEST_RUN_TITLE: str = None
 
     def add_arguments(self, parser: argparse.ArgumentParser):
         """
@@ -40,6 +49,35 @@ class PolarionArgParser(FMFAdapterArgParser):
                             help="Populate Test Work Item in JIRA if linked defect is present")
         parser.add_argument("--jira-config", action="store",
                             help="Provide configuration file for JIRA project")
+        parser.add_argument("--jobs", action="store", type=int, default=1,
+                            help="Number of processes used to convert and render test cases")
+        parser.add_argument("--incremental", action="store", dest='state_file', metavar='STATE_FILE',
+                            help="Submit only test cases that are new or changed since the last successful "
+                                 "submission (fingerprints are kept in the given state file). Import jobs are "
+                                 "waited for, so that only test cases reported as imported are recorded "
+                                 "(with --async, once collected, see --collect)")
+        parser.add_argument("--checkpoint", action="store", dest='checkpoint_file', metavar='CHECKPOINT_FILE',
+                            help="Records the progress of each test case (submitted, imported and "
+                                 "populated in Jira) into the given checkpoint file")
+        parser.add_argument("--resume", action="store_true",
+                            help="Resumes an interrupted export, skipping the test cases completed "
+                                 "according to the checkpoint file (see --checkpoint)")
+        parser.add_argument("--async", action="store", dest='async_journal', metavar='JOURNAL_FILE',
+                            help="Do not wait for the import jobs: submitted job urls and test cases are recorded "
+                                 "in the given journal file, to be collected later on (see --collect)")
+        parser.add_argument("--collect", action="store", dest='collect_journal', metavar='JOURNAL_FILE',
+                            help="Waits for the pending import jobs recorded in the given journal file "
+                                 "(by --async) and applies their results (populating Jira if --jira-config set). "
+                                 "No test cases are submitted.")
+        parser.add_argument("--results", action="append", metavar='JUNIT_FILE',
+                            help="Maps the results from the given JUnit XML file (can be repeated) to the FMF "
+                                 "test cases and submits them as a test run to the xunit importer (if --submit "
+                                 "is set, otherwise the test run files are only generated). "
+                                 "No test cases are submitted.")
+        parser.add_argument("--test-run-id", action="store", dest='test_run_id',
+                            help="Id of the Polarion test run the results are submitted to (see --results)")
+        parser.add_argument("--test-run-title", action="store", dest='test_run_title',
+                            help="Title of the Polarion test run (see --results)")
 
     def parse_arguments(self, parsed_arguments: argparse.Namespace):
         """
@@ -65,6 +103,25 @@ class PolarionArgParser(FMFAdapterArgParser):
         PolarionArgParser.ONE_BY_ONE = bool(parsed_arguments.one_by_one)
         PolarionArgParser.POPUL_TC = bool(parsed_arguments.jira_populate_tc)
         PolarionArgParser.JIRA_CONFIG = parsed_arguments.jira_config
+        PolarionArgParser.STATE_FILE = parsed_arguments.state_file
+        PolarionArgParser.JOBS = max(1, parsed_arguments.jobs)
+        PolarionArgParser.ASYNC_JOURNAL = parsed_arguments.async_journal
+        PolarionArgParser.COLLECT_JOURNAL = parsed_arguments.collect_journal
+        PolarionArgParser.CHECKPOINT_FILE = parsed_arguments.checkpoint_file
+        PolarionArgParser.RESUME = bool(parsed_arguments.resume)
+        if PolarionArgParser.RESUME and not PolarionArgParser.CHECKPOINT_FILE:
+            print("A checkpoint file must be provided to resume an export.")
+            sys.exit(1)
+        if PolarionArgParser.COLLECT_JOURNAL and not os.path.isfile(PolarionArgParser.COLLECT_JOURNAL):
+            print("Invalid journal file provided.")
+            sys.exit(1)
+        PolarionArgParser.RESULTS = parsed_arguments.results
+        PolarionArgParser.TEST_RUN_ID = parsed_arguments.test_run_id
+        PolarionArgParser.TEST_RUN_TITLE = parsed_arguments.test_run_title
+        for results_file in PolarionArgParser.RESULTS or []:
+            if not os.path.isfile(results_file):
+                print("Invalid results file provided: %s" % results_file)
+                sys.exit(1)
 
     @staticmethod
     def generate_sample_config(config_file):
@@ -84,6 +141,22 @@ class PolarionArgParser(FMFAdapterArgParser):
             cfg.write("%s=https://127.0.0.1/polarion/import/xunit\n" % PolarionConfig.KEY_XUNIT_URL)
             cfg.write("%s=user\n" % PolarionConfig.KEY_USER)
             cfg.write("%s=pass\n" % PolarionConfig.KEY_PASS)
+            cfg.write("%s=0\n" % PolarionConfig.KEY_CHUNK_MAX_TCS)
+            cfg.write("%s=0\n" % PolarionConfig.KEY_CHUNK_MAX_BYTES)
+            cfg.write("%s=1\n" % PolarionConfig.KEY_CHUNK_CONCURRENCY)
+            cfg.write("%s=1\n" % PolarionConfig.KEY_SUBMIT_CONCURRENCY)
+            cfg.write("%s=0\n" % PolarionConfig.KEY_SUBMIT_RATE)
+            cfg.write("%s=1\n" % PolarionConfig.KEY_SUBMIT_BURST)
+            cfg.write("%s=0.5\n" % PolarionConfig.KEY_JOB_POLL_INTERVAL)
+            cfg.write("%s=10\n" % PolarionConfig.KEY_JOB_POLL_MAX_INTERVAL)
+            cfg.write("%s=600\n" % PolarionConfig.KEY_JOB_POLL_TIMEOUT)
+            cfg.write("%s=4\n" % PolarionConfig.KEY_JOB_POLL_CONCURRENCY)
+            cfg.write("%s=10\n" % PolarionConfig.KEY_HTTP_POOL_SIZE)
+            cfg.write("%s=120\n" % PolarionConfig.KEY_HTTP_TIMEOUT)
+            cfg.write("%s=3\n" % PolarionConfig.KEY_HTTP_RETRIES)
+            cfg.write("%s=1.0\n" % PolarionConfig.KEY_HTTP_RETRY_BACKOFF)
+            cfg.write("%s=0\n" % PolarionConfig.KEY_RESULTS_CHUNK_MAX_TCS)
+            cfg.write("%s=10485760\n" % PolarionConfig.KEY_RESULTS_CHUNK_MAX_BYTES)
             cfg.close()
 
         print("Config file has been generated: %s" % config_file)
@@ -1,5 +1,19 @@
 import configparser
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import jira
+import requests
+from jira.exceptions import JIRAError
+
+from fmfexporter.metrics import METRICS
+from fmfexporter.rate_limit import TokenBucket
+
+LOGGER = logging.getLogger(__name__)
 
 
 class JiraConfig(object):
@@ -16,6 +30,13 @@ class JiraConfig(object):
     KEY_TC_WI = "testcase_work_item"
     KEY_QE_TC = "qe_test_coverage"
     KEY_VER_IR = "verified_in_release"
+    KEY_UPDATE_CONCURRENCY = "update_concurrency"
+    KEY_UPDATE_RATE = "update_rate"
+    KEY_UPDATE_RETRIES = "update_retries"
+    KEY_UPDATE_RETRY_BACKOFF = "update_retry_backoff"
+    KEY_COOKIE_FILE = "cookie_file"
+    KEY_ISSUE_CACHE_FILE = "issue_cache_file"
+    KEY_ISSUE_CACHE_TTL = "issue_cache_ttl"
 
     def __init__(self, config_file):
         self.config = configparser.ConfigParser()
@@ -78,44 +99,433 @@ class JiraConfig(object):
         """
         return self.config[JiraConfig.KEY_SECTION][JiraConfig.KEY_VER_IR] or None
 
+    @property
+    def update_concurrency(self) -> int:
+        """
+        Returns the maximum number of issues being updated at the same time
+        :return:
+        """
+        return max(1, self.config[JiraConfig.KEY_SECTION].getint(JiraConfig.KEY_UPDATE_CONCURRENCY, fallback=4))
+
+    @property
+    def update_rate(self) -> float:
+        """
+        Returns the maximum number of issue updates started per second (0 means unlimited)
+        :return:
+        """
+        return self.config[JiraConfig.KEY_SECTION].getfloat(JiraConfig.KEY_UPDATE_RATE, fallback=0)
+
+    @property
+    def update_retries(self) -> int:
+        """
+        Returns the number of retries for updates rejected as rate limited (HTTP 429) or unavailable
+        :return:
+        """
+        return self.config[JiraConfig.KEY_SECTION].getint(JiraConfig.KEY_UPDATE_RETRIES, fallback=3)
+
+    @property
+    def update_retry_backoff(self) -> float:
+        """
+        Returns the backoff (in seconds, doubled on each retry) used when no Retry-After is given
+        :return:
+        """
+        return self.config[JiraConfig.KEY_SECTION].getfloat(JiraConfig.KEY_UPDATE_RETRY_BACKOFF, fallback=1.0)
+
+    @property
+    def cookie_file(self) -> str:
+        """
+        Returns the file used to keep the jira session cookies between executions (if any)
+        :return:
+        """
+        return self.config[JiraConfig.KEY_SECTION].get(JiraConfig.KEY_COOKIE_FILE) or None
+
+    @property
+    def issue_cache_file(self) -> str:
+        """
+        Returns the file used to cache the populated issue fields between executions (if any)
+        :return:
+        """
+        return self.config[JiraConfig.KEY_SECTION].get(JiraConfig.KEY_ISSUE_CACHE_FILE) or None
+
+    @property
+    def issue_cache_ttl(self) -> float:
+        """
+        Returns for how long (in seconds) cached issue fields are used
+        :return:
+        """
+        return self.config[JiraConfig.KEY_SECTION].getfloat(JiraConfig.KEY_ISSUE_CACHE_TTL, fallback=3600)
+
+
+class FMFJiraIssueCache(object):
+    """
+    On disk cache of the (populated) fields of Jira issues, so that issues fetched
+    recently (within the TTL) are not fetched again by the next executions.
+    """
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_file: str, ttl: float):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.issues = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def get(self, key: str) -> dict:
+        """
+        Returns the cached (raw) issue, or None if not cached or expired.
+        :param key:
+        :return:
+        """
+        entry = self.issues.get(key)
+        if entry is None or time.time() - entry['time'] > self.ttl:
+            return None
+        return entry['raw']
+
+    def put(self, raw: dict, fields: list):
+        """
+        Caches the given fields of the given (raw) issue.
+        :param raw:
+        :param fields:
+        :return:
+        """
+        cached = {'key': raw['key'], 'id': raw.get('id'), 'self': raw.get('self'),
+                  'fields': {field: raw.get('fields', {}).get(field) for field in fields}}
+        with self._lock:
+            self.issues[raw['key']] = {'time': time.time(), 'raw': cached}
+
+    def load(self):
+        """
+        Loads the cache file (if it exists), dropping expired entries.
+        :return:
+        """
+        if not os.path.isfile(self.cache_file):
+            return
+        with open(self.cache_file, 'r') as cache:
+            content = json.load(cache)
+        if content.get('version') != FMFJiraIssueCache.CACHE_VERSION:
+            LOGGER.warning("Ignoring incompatible issue cache file: %s" % self.cache_file)
+            return
+        now = time.time()
+        self.issues = {key: entry for key, entry in content.get('issues', {}).items()
+                       if now - entry['time'] <= self.ttl}
+
+    def save(self):
+        """
+        Writes the cache file atomically.
+        :return:
+        """
+        tmp_file = "%s.tmp" % self.cache_file
+        with self._lock, open(tmp_file, 'w') as cache:
+            json.dump({'version': FMFJiraIssueCache.CACHE_VERSION, 'issues': self.issues}, cache)
+        os.replace(tmp_file, self.cache_file)
+
+
 class FMFJiraPopulator(object):
     TEST_WI = 'test-work-item'
     QE_TEST_COV = 'qe-test-coverage'
     VERIFIED_IN_REL = 'verified-in-release'
 
+    # Number of issue keys looked up by each JQL search
+    SEARCH_PAGE_SIZE = 100
+    # Responses for which updates are retried (rate limited or unavailable)
+    RETRY_STATUSES = [429, 503]
+
+    # Jira clients shared by all populators of this process (by url and username)
+    _clients = {}
+    _clients_lock = threading.Lock()
+
     def __init__(self, config_file):
         self.config = JiraConfig(config_file)
-        credentials = (self.config.username, self.config.password)
-        self.jira_login = jira.JIRA(self.config.url,
-                              basic_auth=credentials)
+        self._jira_login = None
+        self.rate_limiter = TokenBucket(self.config.update_rate)
+        self.issue_cache = None
+        if self.config.issue_cache_file:
+            self.issue_cache = FMFJiraIssueCache(self.config.issue_cache_file, self.config.issue_cache_ttl)
+
+    @property
+    def jira_login(self) -> jira.JIRA:
+        """
+        Returns the Jira client, shared by the populators of this process. It is only created
+        (and authenticated) when first needed.
+        :return:
+        """
+        if self._jira_login is None:
+            self._jira_login = FMFJiraPopulator.get_client(self.config)
+        return self._jira_login
+
+    @jira_login.setter
+    def jira_login(self, client: jira.JIRA):
+        self._jira_login = client
+
+    @staticmethod
+    def get_client(config: JiraConfig) -> jira.JIRA:
+        """
+        Returns the Jira client for the given config, creating it on first use.
+        Session cookies saved by previous executions (if a cookie file is configured)
+        are restored, so the server side session is reused.
+        :param config:
+        :return:
+        """
+        client_id = (config.url, config.username)
+        with FMFJiraPopulator._clients_lock:
+            client = FMFJiraPopulator._clients.get(client_id)
+            if client is None:
+                credentials = (config.username, config.password)
+                # Server info is not retrieved, so no request is sent until needed
+                # Rate limited updates are retried by update_issue, not by the jira session
+                client = jira.JIRA(config.url,
+                                   basic_auth=credentials, get_server_info=False, max_retries=0)
+                if config.cookie_file and os.path.isfile(config.cookie_file):
+                    with open(config.cookie_file, 'r') as cookies:
+                        client._session.cookies.update(requests.utils.cookiejar_from_dict(json.load(cookies)))
+                FMFJiraPopulator._clients[client_id] = client
+            return client
 
-    def populate_testcases(self, tc_list: list):
-        tc_list_len = len(tc_list)
-        tc_counter = 1
+    def save_session(self):
+        """
+        Saves the session cookies and the issue cache (if configured).
+        :return:
+        """
+        if self.config.cookie_file and self._jira_login is not None:
+            tmp_file = "%s.tmp" % self.config.cookie_file
+            # Cookies hold a live session, so only the owner can read them
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, 'w') as cookies:
+                json.dump(requests.utils.dict_from_cookiejar(self._jira_login._session.cookies), cookies)
+            os.replace(tmp_file, self.config.cookie_file)
+        if self.issue_cache:
+            self.issue_cache.save()
+
+    @staticmethod
+    def get_defect_key(defect) -> str:
+        """
+        Returns the Jira issue key of the given defect (None if not a Jira defect).
+        :param defect:
+        :return:
+        """
+        if not defect.jira:
+            return None
+        if "http" in defect['jira']:
+            return defect['jira'][defect['jira'].rfind("/") + 1:]
+        return defect['jira']
+
+    def prefetch_issues(self, keys: list) -> dict:
+        """
+        Fetches the given issues (just the fields updated by the populator) through
+        paged "key in (...)" JQL searches, instead of one request per issue.
+        Fetched issues are added to the issue cache (if configured).
+        :param keys:
+        :return: dict of issues by key
+        """
+        keys = list(dict.fromkeys(keys))
+        issues = {}
+        for start in range(0, len(keys), FMFJiraPopulator.SEARCH_PAGE_SIZE):
+            page = keys[start:start + FMFJiraPopulator.SEARCH_PAGE_SIZE]
+            # Not validated, so that unknown keys do not fail the whole search
+            with METRICS.phase('jira_search'):
+                found = self.jira_login.search_issues("key in (%s)" % ",".join(page), maxResults=len(page),
+                                                      validate_query=False, fields=self.get_populated_fields())
+            for issue in found:
+                issues[issue.key] = issue
+                if self.issue_cache:
+                    self.issue_cache.put(issue.raw, self.get_populated_fields())
+        return issues
+
+    def get_populated_fields(self) -> list:
+        """
+        Returns the (custom) fields updated by the populator.
+        :return:
+        """
+        fields = [self.config.test_case_work_item_custom_field, self.config.qe_test_coverage_custom_field]
+        if self.config.verified_release_custom_field:
+            fields.append(self.config.verified_release_custom_field)
+        return fields
+
+    @staticmethod
+    def group_by_issue(tc_list: list, tc_wi_urls: dict) -> dict:
+        """
+        Returns the work item urls (without duplicates) to be linked to each Jira issue,
+        referenced as a defect by the given test cases.
+        :param tc_list:
+        :param tc_wi_urls: work item url of each test case id
+        :return: dict of lists of urls by issue key
+        """
+        urls_by_issue = {}
         for tc in tc_list:  # type: PolarionTestCase
-            list_tcwi = []
+            tc_wi_url = tc_wi_urls[tc.id]
+            if tc_wi_url is None:
+                continue
             for defect in tc.defects:
-                if defect.jira != "":
-                    if "http" in defect['jira']:
-                        defect_key = defect['jira'][defect['jira'].rfind("/") + 1:]
-                    else:
-                        defect_key = defect['jira']
-                    print("Populating %s test case %s of %s (%s)" % (self.config.url + "/browse/" + defect_key,
-                                                                     tc_counter, tc_list_len, tc.id))
-                    issue = self.jira_login.issue(defect_key)
-                    list_tcwi = issue.raw.get("fields").get(self.config.test_case_work_item_custom_field)
-                    if list_tcwi is None:
-                        list_tcwi = [tc.test_case_work_item_url]
-                    else:
-                        list_tcwi.append(tc.test_case_work_item_url)
-
-                    updated_fields = {
-                        self.config.test_case_work_item_custom_field: ",".join(list_tcwi),
-                        self.config.qe_test_coverage_custom_field: {"value": "+"},
-                    }
-                    if self.config.verified_release_custom_field:
-                        updated_fields[self.config.verified_release_custom_field] = [{"value": "Verified in a release"}]
-
-                    issue.update(fields=updated_fields)
-            tc_counter += 1
+                defect_key = FMFJiraPopulator.get_defect_key(defect)
+                if defect_key:
+                    urls_by_issue.setdefault(defect_key, {})[tc_wi_url] = None
+        return {key: list(urls) for key, urls in urls_by_issue.items()}
+
+    def get_updated_fields(self, fields: dict, urls: list) -> dict:
+        """
+        Returns the fields to update on an issue (given its current fields) so it links
+        all given urls, or None if the issue is already up to date.
+        :param fields:
+        :param urls:
+        :return:
+        """
+        list_tcwi = fields.get(self.config.test_case_work_item_custom_field)
+        # Urls are stored as a comma separated string
+        if isinstance(list_tcwi, str):
+            list_tcwi = list_tcwi.split(",") if list_tcwi else []
+        list_tcwi = list(list_tcwi or [])
+        new_urls = [url for url in urls if url not in list_tcwi]
+
+        updated_fields = {
+            self.config.test_case_work_item_custom_field: ",".join(list_tcwi + new_urls),
+            self.config.qe_test_coverage_custom_field: {"value": "+"},
+        }
+        unchanged = not new_urls and \
+            (fields.get(self.config.qe_test_coverage_custom_field) or {}).get("value") == "+"
+        if self.config.verified_release_custom_field:
+            updated_fields[self.config.verified_release_custom_field] = [{"value": "Verified in a release"}]
+            unchanged = unchanged and "Verified in a release" in \
+                [option.get("value") for option in fields.get(self.config.verified_release_custom_field) or []]
+
+        return None if unchanged else updated_fields
+
+    @METRICS.timed('jira_populate')
+    def populate_testcases(self, tc_list: list, import_result) -> list:
+        """
+        Links the work item of each test case to the Jira issues referenced as its defects.
+        Each issue is updated at most once (with the urls of all its test cases merged),
+        and issues already linking all urls are not updated.
+        Failed updates do not raise, but are reported by the returned updates.
+        :param tc_list:
+        :param import_result: PolarionImportResult holding the work item url of the test cases
+        :return: FMFJiraUpdate of each issue updated
+        """
+        # Work item urls are given by the import result (PolarionImportResult)
+        tc_wi_urls = {tc.id: import_result.work_item_url(tc.id) for tc in tc_list}
+        urls_by_issue = FMFJiraPopulator.group_by_issue(tc_list, tc_wi_urls)
+
+        # Issues cached as linking all urls already are skipped. Any other issue is read from
+        # Jira before being updated, so links added (or removed) by others meanwhile are kept
+        cached = []
+        if self.issue_cache:
+            for defect_key, urls in urls_by_issue.items():
+                raw = self.issue_cache.get(defect_key)
+                if raw is not None and self.get_updated_fields(raw.get('fields') or {}, urls) is None:
+                    cached.append(defect_key)
+        issues = self.prefetch_issues([key for key in urls_by_issue if key not in cached])
+
+        updates = []
+        not_found = []
+        issue_counter = 1
+        for defect_key, urls in urls_by_issue.items():
+            updated_fields = None
+            if defect_key not in cached:
+                issue = issues.get(defect_key)
+                if issue is None:
+                    # Not found by the search (i.e: issue moved, so its key has changed)
+                    try:
+                        issue = self.jira_login.issue(defect_key, fields=",".join(self.get_populated_fields()))
+                    except JIRAError as ex:
+                        # i.e: issue deleted, the remaining issues are still populated
+                        update = FMFJiraUpdate(defect_key, None, {}, len(urls))
+                        update.error = ex
+                        not_found.append(update)
+                        issue_counter += 1
+                        continue
+                updated_fields = self.get_updated_fields(issue.raw.get("fields") or {}, urls)
+            if updated_fields is None:
+                print("Skipping %s issue %s of %s (already up to date)" % (self.config.url + "/browse/" + defect_key,
+                                                                          issue_counter, len(urls_by_issue)))
+            else:
+                updates.append(FMFJiraUpdate(defect_key, issue, updated_fields, len(urls)))
+            issue_counter += 1
+
+        # Updates are sent concurrently
+        try:
+            self.update_issues(updates)
+        finally:
+            self.save_session()
+        updates.extend(not_found)
+        for update in updates:
+            if update.error:
+                print("Error populating %s: %s" % (self.config.url + "/browse/" + update.key, update.error))
+            else:
+                print("Populated %s (%d test cases)" % (self.config.url + "/browse/" + update.key, update.testcases))
+        return updates
+
+    def update_issues(self, updates: list) -> list:
+        """
+        Sends the given updates with up to the configured concurrency, starting no more
+        updates per second than the configured rate. Rate limited (429) or unavailable (503)
+        responses are retried after the given Retry-After (or an exponential backoff).
+        The outcome of each update is recorded into the update itself.
+        :param updates: list of FMFJiraUpdate
+        :return: given updates
+        """
+        if not updates:
+            return updates
+        with ThreadPoolExecutor(max_workers=min(self.config.update_concurrency, len(updates))) as executor:
+            list(executor.map(self.update_issue, updates))
+        return updates
+
+    def update_issue(self, update: 'FMFJiraUpdate') -> 'FMFJiraUpdate':
+        retries = self.config.update_retries
+        while True:
+            self.rate_limiter.acquire()
+            update.attempts += 1
+            try:
+                with METRICS.phase('jira_update'):
+                    update.issue.update(fields=update.fields)
+                update.error = None
+                # Issue is reloaded by the update
+                if self.issue_cache:
+                    self.issue_cache.put(update.issue.raw, self.get_populated_fields())
+                return update
+            except JIRAError as ex:
+                update.error = ex
+                if ex.status_code not in FMFJiraPopulator.RETRY_STATUSES or update.attempts > retries:
+                    return update
+                delay = FMFJiraPopulator.get_retry_after(ex)
+                if delay is None:
+                    delay = self.config.update_retry_backoff * 2 ** (update.attempts - 1)
+                LOGGER.warning("Jira update of %s rejected (HTTP %s), retrying in %.1fs"
+                               % (update.key, ex.status_code, delay))
+                METRICS.increment('jira_retries')
+                time.sleep(delay)
+            except Exception as ex:
+                update.error = ex
+                return update
+
+    @staticmethod
+    def get_retry_after(error: JIRAError) -> float:
+        """
+        Returns the delay (in seconds) requested by the Retry-After header of the failed response (if any).
+        :param error:
+        :return:
+        """
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        try:
+            return max(0.0, float(retry_after)) if retry_after else None
+        except ValueError:
+            # HTTP dates are not expected from Jira
+            return None
+
+
+class FMFJiraUpdate(object):
+    """
+    Update of a Jira issue (linking the work items of its test cases), along with its outcome.
+    """
+
+    def __init__(self, key: str, issue, fields: dict, testcases: int = 0):
+        self.key = key
+        self.issue = issue
+        self.fields = fields
+        self.testcases = testcases
+        # Populated once sent
+        self.attempts = 0
+        self.error = None
 
+    def __str__(self):
+        return "%s (%s)" % (self.key, self.error if self.error else "updated")
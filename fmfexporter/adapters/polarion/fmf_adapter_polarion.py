@@ -1,11 +1,19 @@
+import itertools
 import logging
+import time
+from typing import Iterable, Iterator, Tuple
 
 from fmfexporter.adapters.polarion.args.polarion_args_parser import PolarionArgParser
 from fmfexporter import FMFTestCase
-from fmfexporter.adapters.polarion.connectors.jira.fmf_jira import FMFJiraPopulator
 from fmfexporter.adapters.polarion.polarion_reporter import PolarionReporter
 from fmfexporter.adapters.polarion.polarion_test_case import PolarionTestCase
+from fmfexporter.adapters.polarion.utils.polarion_checkpoint import PolarionCheckpoint
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult
+from fmfexporter.adapters.polarion.utils.polarion_journal import PolarionJobJournal
+from fmfexporter.adapters.polarion.utils.polarion_state import PolarionExportState
 from fmfexporter.fmf_adapter import FMFAdapter, FMFAdapterArgParser
+from fmfexporter.junit import JUnitResult, iter_junit_results
+from fmfexporter.metrics import METRICS
 """
 FMF Adapter for the Polarion ALM tool.
 """
@@ -21,11 +29,13 @@ class FMFAdapterPolarion(FMFAdapter):
     FMF Adapter implementation for the Polarion ALM tool.
     """
 
-    def __init__(self, fmf_tree_path: str = '.'):
-        super(FMFAdapterPolarion, self).__init__(fmf_tree_path)
-        # If the config file has been parsed, create a reporter...
+    def __init__(self, fmf_tree_path: str = '.', cache_file: str = None):
+        super(FMFAdapterPolarion, self).__init__(fmf_tree_path, cache_file)
+        # If the config file has been parsed and test cases (or results) are submitted or collected, create a reporter...
         self._reporter = None
-        if PolarionArgParser.CONFIG_FILE:
+        self._jira_populator = None
+        if PolarionArgParser.CONFIG_FILE and (PolarionArgParser.SUBMIT or PolarionArgParser.COLLECT_JOURNAL or
+                                              PolarionArgParser.RESULTS):
             self._reporter: PolarionReporter = PolarionReporter(PolarionArgParser.CONFIG_FILE)
 
     @staticmethod
@@ -39,6 +49,16 @@ class FMFAdapterPolarion(FMFAdapter):
     def convert_from(self, fmf_testcase: FMFTestCase):
         return PolarionTestCase.from_fmf_testcase(fmf_testcase)
 
+    def __getstate__(self):
+        """
+        The reporter and the Jira populator (holding locks and sessions) are not sent
+        to worker processes either, as conversions do not submit anything.
+        :return:
+        """
+        state = super(FMFAdapterPolarion, self).__getstate__()
+        state.update(_reporter=None, _jira_populator=None)
+        return state
+
     def submit_testcase(self, fmf_testcase: FMFTestCase):
         ptc = self.convert_from(fmf_testcase)
 
@@ -48,17 +68,80 @@ class FMFAdapterPolarion(FMFAdapter):
         #
         if self._reporter and PolarionArgParser.SUBMIT:
             LOGGER.info("Submitting test case: %s" % ptc.id)
-            tc = self._reporter.submit_testcase(ptc, PolarionArgParser.POPUL_TC)
-            self.populate_jira(tc)
+            result = self._reporter.import_testcase(ptc, PolarionArgParser.POPUL_TC)
+            FMFAdapterPolarion.raise_failed_updates(self.populate_jira(result.testcases, result))
             return ptc
         else:
             print("Dumping test case: %s\n%s\n" % (ptc.id, ptc.to_xml()))
 
-    def submit_testcases(self, fmf_testcases: list):
+    def run_command(self) -> bool:
+        if PolarionArgParser.COLLECT_JOURNAL:
+            self.collect_testcases(PolarionArgParser.COLLECT_JOURNAL)
+            return True
+        if PolarionArgParser.RESULTS:
+            self.submit_results(PolarionArgParser.RESULTS)
+            return True
+        return False
+
+    def submit_testcases(self, fmf_testcases: Iterable[FMFTestCase]):
         submitted_tc = []
-        polarion_test_cases = []
-        for fmf_testcase in fmf_testcases:
-            polarion_test_cases.append(self.convert_from(fmf_testcase))
+        failed_tc = []
+        failed_updates = []
+        jobs = PolarionArgParser.JOBS
+        if jobs > 1:
+            # Conversions run by the worker processes are recorded as a single call (under its own
+            # phase, as conversions run in process, i.e: a single test case, are recorded as well)
+            with METRICS.phase('convert_parallel'):
+                polarion_test_cases = self.convert_from_list(fmf_testcases, jobs)
+        else:
+            # Converted lazily, so one by one submissions start before all test cases are read
+            polarion_test_cases = (self.convert_from(fmf_testcase) for fmf_testcase in fmf_testcases)
+
+        # Incremental export: only new or changed test cases are submitted
+        state = None
+        if PolarionArgParser.STATE_FILE:
+            state = PolarionExportState(PolarionArgParser.STATE_FILE)
+            polarion_test_cases = state.filter_changed(polarion_test_cases)
+
+        # Import jobs are waited for to populate Jira, or to record only the imported test cases (incremental)
+        wait_import = PolarionArgParser.POPUL_TC or state is not None
+
+        # Asynchronous submission: import jobs are journaled instead of waited for
+        journal = None
+        if PolarionArgParser.ASYNC_JOURNAL:
+            journal = PolarionJobJournal(PolarionArgParser.ASYNC_JOURNAL)
+            wait_import = False
+
+        # Checkpoint: records the last phase completed by each test case (resumed exports skip completed ones)
+        # Jira is populated once all test cases have been submitted, so each issue is updated once
+        imported_results = []
+
+        # Test cases already submitted by the resumed export are only populated
+        checkpoint = None
+        checkpointed_tc = []
+        if PolarionArgParser.CHECKPOINT_FILE and self._reporter and PolarionArgParser.SUBMIT:
+            checkpoint = PolarionCheckpoint(PolarionArgParser.CHECKPOINT_FILE, PolarionArgParser.RESUME)
+            submit_phase = PolarionCheckpoint.IMPORTED if wait_import else PolarionCheckpoint.SUBMITTED
+            final_phase = submit_phase
+            if PolarionArgParser.JIRA_CONFIG is not None and not journal:
+                final_phase = PolarionCheckpoint.POPULATED
+            polarion_test_cases = checkpoint.filter_pending(polarion_test_cases, final_phase, submit_phase,
+                                                            checkpointed_tc)
+
+        # All test cases are sent as one file (or chunks of it), streamed as they are read
+        testcase_elements = None
+        if not PolarionArgParser.ONE_BY_ONE:
+            polarion_test_cases = iter(polarion_test_cases)
+            first_tc = next(polarion_test_cases, None)
+            if first_tc is None and not checkpointed_tc:
+                print("No test cases to submit")
+                return
+            polarion_test_cases = itertools.chain([first_tc] if first_tc else [], polarion_test_cases)
+            if jobs > 1:
+                # Converted by worker processes already, so rendered by them as well
+                polarion_test_cases = list(polarion_test_cases)
+                testcase_elements = PolarionReporter.to_elements(polarion_test_cases, jobs)
+
         #
         # If config file has been parsed (and there is a reporter available)
         # and --submit has been given, submit. Otherwise simply prints the tc.
@@ -66,26 +149,261 @@ class FMFAdapterPolarion(FMFAdapter):
 
         if self._reporter and PolarionArgParser.SUBMIT:
             if PolarionArgParser.ONE_BY_ONE:
-                for ptc in polarion_test_cases:
-                    LOGGER.info("Submitting test case: %s" % ptc.id)
-                    submitted_tc.append(self._reporter.submit_testcase(ptc, PolarionArgParser.POPUL_TC))
+                try:
+                    for submission in self._reporter.submit_testcases_one_by_one(polarion_test_cases,
+                                                                                wait_import):
+                        if submission.error:
+                            LOGGER.error("Error submitting test case %s: %s"
+                                         % (submission.testcase.id, submission.error))
+                            failed_tc.append(submission.testcase)
+                            continue
+                        submitted_tc.extend(submission.result.testcases)
+                        if state:
+                            # Only recorded once reported as imported (see wait_import)
+                            state.update(submission.result.testcases, submission.result)
+                        if checkpoint:
+                            checkpoint.record(submission.result.testcases, submit_phase, submission.result)
+                        if journal:
+                            journal.add(submission.result, state is not None)
+                        else:
+                            imported_results.append(submission.result)
+                    failed_updates = self.populate_submitted(imported_results, checkpoint, checkpointed_tc)
+                finally:
+                    # Test cases submitted before an eventual failure are kept
+                    if state:
+                        state.save()
+                    if journal:
+                        journal.save()
+                    if checkpoint:
+                        checkpoint.close()
             else:
-                for ptc in polarion_test_cases:
-                    LOGGER.info("Submitting test case: %s" % ptc.id)
-                submitted_tc.extend(self._reporter.submit_testcases(polarion_test_cases, PolarionArgParser.POPUL_TC))
+                try:
+                    results = self._reporter.iter_submit_testcases(
+                        FMFAdapterPolarion.log_submitting(polarion_test_cases), wait_import, testcase_elements)
+                    for result in results:
+                        submitted_tc.extend(result.testcases)
+                        if state:
+                            state.update(result.testcases, result)
+                        if checkpoint:
+                            checkpoint.record(result.testcases, submit_phase, result)
+                        if journal:
+                            journal.add(result, state is not None)
+                        else:
+                            imported_results.append(result)
+                    failed_updates = self.populate_submitted(imported_results, checkpoint, checkpointed_tc)
+                finally:
+                    if state:
+                        state.save()
+                    if journal:
+                        journal.save()
+                    if checkpoint:
+                        checkpoint.close()
         else:
             if PolarionArgParser.ONE_BY_ONE:
                 for ptc in polarion_test_cases:
                     print("Dumping test case: %s\n%s\n" % (ptc.id, ptc.to_xml()))
             else:
-                print("Dumping test cases: \n%s\n" % (PolarionReporter.to_xml(polarion_test_cases)))
+                print("Dumping test cases: \n%s\n" % (PolarionReporter.to_xml(polarion_test_cases, testcase_elements)))
+
+        if journal:
+            # Nothing is journaled by dry runs (no --submit)
+            if submitted_tc:
+                print("Import jobs recorded in %s (see --collect)" % PolarionArgParser.ASYNC_JOURNAL)
+        elif PolarionArgParser.JIRA_CONFIG is None:
+            LOGGER.warning("Jira configuration not provided")
+
+        if failed_tc:
+            raise Exception('Error submitting %d test case(s) to Polarion: %s'
+                            % (len(failed_tc), ", ".join([tc.id for tc in failed_tc])))
+        FMFAdapterPolarion.raise_failed_updates(failed_updates)
+
+    @staticmethod
+    def log_submitting(polarion_test_cases: Iterable[PolarionTestCase]) -> Iterator[PolarionTestCase]:
+        """
+        Logs each given test case as it is read to be submitted.
+        :param polarion_test_cases:
+        :return:
+        """
+        for ptc in polarion_test_cases:
+            LOGGER.info("Submitting test case: %s" % ptc.id)
+            yield ptc
+
+    def populate_submitted(self, import_results: list, checkpoint: PolarionCheckpoint = None,
+                           checkpointed: list = None):
+        """
+        Populates Jira once with the test cases of all given import results, so that each
+        issue is updated at most once, along with the test cases submitted already by the
+        resumed export (see --resume), using the work item urls recorded by the checkpoint.
+        :param import_results:
+        :param checkpoint:
+        :param checkpointed:
+        :return: failed updates (FMFJiraUpdate)
+        """
+        if PolarionArgParser.JIRA_CONFIG is None or PolarionArgParser.ASYNC_JOURNAL:
+            return []
+        if checkpointed:
+            import_results = import_results + [checkpoint.get_import_result(checkpointed)]
+        import_result = PolarionImportResult.merge(import_results)
+        if not import_result.testcases:
+            return []
+        failed_updates = self.populate_jira(import_result.testcases, import_result)
+        if checkpoint:
+            # Test cases linked to a failed issue are populated again by a resumed export
+            failed_keys = {update.key for update in failed_updates}
+            populated = import_result.testcases
+            if failed_keys:
+                populated = [tc for tc in populated if not failed_keys.intersection(
+                    [self._jira_populator.get_defect_key(defect) for defect in tc.defects])]
+            checkpoint.record(populated, PolarionCheckpoint.POPULATED)
+        return failed_updates
+
+    @staticmethod
+    def raise_failed_updates(failed_updates: list):
+        """
+        Raises an error if any of the given Jira updates (FMFJiraUpdate) failed.
+        :param failed_updates:
+        :return:
+        """
+        if failed_updates:
+            raise Exception('Error populating %d Jira issue(s): %s'
+                            % (len(failed_updates), ", ".join([update.key for update in failed_updates])))
+
+    def collect_testcases(self, journal_file: str):
+        """
+        Waits for the pending import jobs recorded in the given journal (see --async),
+        populating Jira as each one finishes. Collected jobs are removed from the journal,
+        while jobs that could not be collected yet remain pending.
+        :param journal_file:
+        :return:
+        """
+        if not self._reporter:
+            print("A config file is required to collect import jobs")
+            return
+
+        journal = PolarionJobJournal(journal_file)
+        jobs = journal.pending_jobs()
+        if not jobs:
+            print("No pending import jobs")
+            return
+
+        # Incremental export: test cases are recorded once their import jobs are collected
+        state = None
+        if PolarionArgParser.STATE_FILE:
+            state = PolarionExportState(PolarionArgParser.STATE_FILE)
+
+        collected_jobs = []
+        failed_jobs = []
+        failed_updates = []
+        try:
+            for job in self._reporter.poll_import_jobs(jobs):
+                if job.error and not job.finished:
+                    LOGGER.warning("Import job still pending: %s (%s)" % (job.url, job.error))
+                    continue
+                if job.error:
+                    LOGGER.error("Import job failed: %s (%s)" % (job.url, job.error))
+                    failed_jobs.append(job)
+                    journal.remove(job.url)
+                else:
+                    LOGGER.info("Collected import job: %s" % job.result)
+                    collected_jobs.append(job)
+                    if state:
+                        state.update_fingerprints(journal.fingerprints(job.url), job.result)
+
+            # Jira is populated once for all collected jobs, so each issue is updated once
+            if PolarionArgParser.JIRA_CONFIG is not None and collected_jobs:
+                import_result = PolarionImportResult.merge([job.result for job in collected_jobs])
+                failed_updates = self.populate_jira(import_result.testcases, import_result)
+            # Collected jobs remain pending until Jira has been populated
+            for job in collected_jobs:
+                journal.remove(job.url)
+        finally:
+            journal.save()
+            if state:
+                state.save()
+
+        print("Collected %d of %d import jobs (%d pending)" % (len(collected_jobs), len(jobs), len(journal.jobs)))
+        if PolarionArgParser.JIRA_CONFIG is None:
+            LOGGER.warning("Jira configuration not provided")
+        if failed_jobs:
+            raise Exception('Polarion Import error for %d job(s): %s'
+                            % (len(failed_jobs), ", ".join([job.url for job in failed_jobs])))
+        FMFAdapterPolarion.raise_failed_updates(failed_updates)
+
+    def submit_results(self, junit_files: list):
+        """
+        Submits the results found in the given JUnit XML files to a Polarion test run
+        (see --results). Results that do not belong to any FMF test case are skipped.
+        :param junit_files:
+        :return:
+        """
+        if not self._reporter:
+            print("A config file is required to submit results")
+            return
+
+        test_run_id = PolarionArgParser.TEST_RUN_ID or time.strftime("fmfexporter-%Y%m%d-%H%M%S")
+        unmatched = []
+        chunks = self._reporter.submit_test_run(self.map_results(junit_files, unmatched), test_run_id,
+                                                PolarionArgParser.TEST_RUN_TITLE, PolarionArgParser.SUBMIT)
+
+        mapped = sum([chunk.results for chunk in chunks])
+        if PolarionArgParser.SUBMIT:
+            print("Submitted %d results to test run %s (%d not found in the FMF Tree)"
+                  % (mapped, test_run_id, len(unmatched)))
+        else:
+            print("Generated %s with %d results (%d not found in the FMF Tree)"
+                  % (", ".join([chunk.file_name for chunk in chunks]), mapped, len(unmatched)))
+
+    def map_results(self, junit_files: list, unmatched: list,
+                    batch_size: int = 1000) -> Iterator[Tuple[JUnitResult, PolarionTestCase]]:
+        """
+        Streams the results from the given JUnit XML files, yielding each one along with the
+        Polarion test case it belongs to (matched by "classname.name", see get_testcase).
+        Results are matched in batches, so memory usage does not grow with the files size.
+        :param junit_files:
+        :param unmatched: list the (classname, name) of the unmatched results are added to
+        :param batch_size:
+        :return:
+        """
+        def map_batch(batch: list):
+            fmf_testcases, not_found = self.get_testcases([(r.classname, r.name) for r in batch])
+            for pair in not_found:
+                LOGGER.warning("Test case not found in the FMF Tree: %s.%s" % pair)
+            unmatched.extend(not_found)
+            # Parameterized results share the same test case
+            converted = {}
+            for result in batch:
+                fmf_testcase = fmf_testcases.get((result.classname, result.name))
+                if fmf_testcase is None:
+                    continue
+                if id(fmf_testcase) not in converted:
+                    converted[id(fmf_testcase)] = self.convert_from(fmf_testcase)
+                yield result, converted[id(fmf_testcase)]
 
-        self.populate_jira(submitted_tc)
+        for junit_file in junit_files:
+            batch = []
+            for result in iter_junit_results(junit_file):
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    yield from map_batch(batch)
+                    batch = []
+            yield from map_batch(batch)
 
-    def populate_jira(self, submitted_testcases: list):
+    def populate_jira(self, submitted_testcases: list, import_result: PolarionImportResult) -> list:
+        """
+        Links the work items of the given test cases to their Jira issues.
+        :param submitted_testcases:
+        :param import_result:
+        :return: failed updates (FMFJiraUpdate)
+        """
         # Linking Test Case Work items in jira
         if PolarionArgParser.JIRA_CONFIG is not None:
-            jira_pop = FMFJiraPopulator(PolarionArgParser.JIRA_CONFIG)
-            jira_pop.populate_testcases(submitted_testcases)
+            # The same populator is reused by all submissions
+            if self._jira_populator is None:
+                # jira is only imported when a configuration is provided
+                from fmfexporter.adapters.polarion.connectors.jira.fmf_jira import FMFJiraPopulator
+                self._jira_populator = FMFJiraPopulator(PolarionArgParser.JIRA_CONFIG)
+            updates = self._jira_populator.populate_testcases(submitted_testcases, import_result)
+            return [update for update in updates if update.error]
         else:
-            LOGGER.warning("Jira configuration not provided")
\ No newline at end of file
+            LOGGER.warning("Jira configuration not provided")
+            return []
\ No newline at end of file
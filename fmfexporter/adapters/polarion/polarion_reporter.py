@@ -3,26 +3,35 @@
 """
 Provides mechanisms to submit TestCase XML files to Polarion.
 """
+import collections
+import itertools
 import json
-import time
-import requests
 import logging
 
-from requests import RequestException, Response
-from requests.auth import HTTPBasicAuth
-import urllib3
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Tuple, TYPE_CHECKING
 
 from fmfexporter.adapters.polarion.polarion_test_case import PolarionTestCase
 from fmfexporter.adapters.polarion.utils.polarion_config import PolarionConfig
+from fmfexporter.adapters.polarion.utils.polarion_import_job import PolarionImportJob, PolarionJobLogParser, \
+    PolarionJobPoller
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult, \
+    PolarionImportedTestCase
 
 import xml.etree.ElementTree as etree
-from xml.dom import minidom
+from xml.sax.saxutils import quoteattr
 from html import escape
 from fmfexporter.adapters.polarion.utils.polarion_xml import PolarionXmlUtils
+from fmfexporter.junit import JUnitResult
+from fmfexporter.metrics import METRICS
+from fmfexporter.parallel import parallel_map
+from fmfexporter.rate_limit import TokenBucket
 
+# requests is only imported once a reporter is created (test cases are submitted)
+if TYPE_CHECKING:
+    from requests import Response
 
 LOGGER = logging.getLogger(__name__)
-urllib3.disable_warnings()
 
 
 class PolarionReporter(object):
@@ -31,9 +40,15 @@ class PolarionReporter(object):
     """
 
     def __init__(self, config_file):
+        from fmfexporter.adapters.polarion.utils.polarion_session import PolarionSession
         self.config = PolarionConfig(config_file)
         self.headers = {'Accept': 'application/json'}
-        self.auth = HTTPBasicAuth(self.config.username(), self.config.password())
+        # Pooled session (keep-alive, retries and timeout) used for all requests
+        self.session = PolarionSession(self.config)
+        # Limits how fast test cases are submitted in one by one mode
+        self.rate_limiter = TokenBucket(self.config.submit_rate(), self.config.submit_burst())
+        # Waits for the import jobs when the imported work items are needed
+        self.job_poller = PolarionJobPoller(self.session, self.config)
 
     def submit_testcase(self, testcase: PolarionTestCase, parse_response=False):
         """
@@ -44,17 +59,26 @@ class PolarionReporter(object):
         :param parse_response
         :return:
         """
-        xml = testcase.to_xml()
+        return self.import_testcase(testcase, parse_response).testcases
+
+    def import_testcase(self, testcase: PolarionTestCase, parse_response=False) -> PolarionImportResult:
+        """
+        Submits the given testcase instance to Polarion (see submit_testcase), returning
+        the import result (holding the imported work item when parse_response is set).
+        :param testcase:
+        :param parse_response
+        :return:
+        """
+        from requests import RequestException
+        with METRICS.phase('render'):
+            xml = testcase.to_xml()
 
         xml_file = {'file': ('testcase.xml', xml)}
-        submitted_tc = []
 
         try:
-            response: Response = requests.post(self.config.test_case_url(),
-                                               auth=self.auth,
-                                               headers=self.headers,
-                                               verify=False,
-                                               files=xml_file)
+            response: 'Response' = self.session.post(self.config.test_case_url(),
+                                                     headers=self.headers,
+                                                     files=xml_file)
         except RequestException as req_ex:
             err_msg = "Error submitting test case: %s" % req_ex
             LOGGER.error(err_msg)
@@ -64,66 +88,393 @@ class PolarionReporter(object):
 
         if response.status_code != 200 or "Project id not specified or invalid" in response.content.decode('utf-8'):
             raise Exception('Error submitting test-case to Polarion: %s' % response.content)
-        else:
-            submitted_tc.extend(self.handle_response(response, [testcase], parse_response))
-        return submitted_tc
+        return self.handle_response(response, [testcase], parse_response)
 
-    def submit_testcases(self, testcases: list, parse_response=False):
+    def submit_testcases_one_by_one(self, testcases: Iterable[PolarionTestCase],
+                                    parse_response=False) -> Iterator['PolarionSubmission']:
         """
-        Submits the given testcases instance to Polarion as ONE file.
+        Submits each one of the given test cases to Polarion (as individual files) concurrently,
+        keeping up to the configured submit concurrency in flight and starting no more
+        submissions per second than the configured submit rate.
+        Results are yielded in the same order as the given test cases, and a failure
+        does not prevent the remaining test cases from being submitted.
+        :param testcases:
+        :param parse_response:
+        :return:
+        """
+        concurrency = self.config.submit_concurrency()
+        pending = collections.deque()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for ptc in testcases:
+                # Bounded: test cases are only read as the oldest submissions complete
+                if len(pending) >= concurrency * 2:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(self._submit_one, ptc, parse_response))
+            while pending:
+                yield pending.popleft().result()
+
+    def _submit_one(self, testcase: PolarionTestCase, parse_response=False) -> 'PolarionSubmission':
+        submission = PolarionSubmission(testcase)
+        self.rate_limiter.acquire()
+        LOGGER.info("Submitting test case: %s" % testcase.id)
+        try:
+            submission.result = self.import_testcase(testcase, parse_response)
+        except Exception as ex:
+            submission.error = ex
+        return submission
+
+    def submit_testcases(self, testcases: list, parse_response=False, testcase_elements: list = None):
+        """
+        Submits the given testcases instance to Polarion as ONE file, or as multiple
+        files (chunks) when the chunk limits are set in the config file.
         If the given test case already exists (looking up by name as:
         "classname"."name") it will be updated. Created otherwise.
         :param testcases:
+        :param parse_response:
+        :param testcase_elements: testcase elements already rendered (see to_elements), if any
         :return:
         """
-        xml = PolarionReporter.to_xml(testcases)
+        return list(itertools.chain.from_iterable([result.testcases for result in
+                                                   self.iter_submit_testcases(testcases, parse_response,
+                                                                              testcase_elements)]))
 
-        xml_file = {'file': ('testcase.xml', xml)}
-        submitted_tc = []
+    def iter_submit_testcases(self, testcases: Iterable[PolarionTestCase], parse_response=False,
+                              testcase_elements: list = None) -> Iterator[PolarionImportResult]:
+        """
+        Submits the given testcases (see submit_testcases), yielding the import result of
+        each file. Chunks are submitted concurrently (up to the configured chunk concurrency)
+        as soon as they have been written.
+        When parse_response is set, the import jobs of all chunks are polled concurrently and
+        the result of each import job (with the imported work items) is yielded as soon as
+        the job finishes.
+        An error is raised once all the other chunks have been handled, if any chunk failed.
+        :param testcases:
+        :param parse_response:
+        :param testcase_elements: testcase elements already rendered (see to_elements), if any
+        :return:
+        """
+        chunks = []
+        with ThreadPoolExecutor(max_workers=self.config.chunk_concurrency()) as executor:
+            futures = []
+            for chunk in self.write_chunks(testcases, testcase_elements):
+                chunks.append(chunk)
+                futures.append(executor.submit(self.submit_chunk, chunk))
+            wait(futures)
+
+        if parse_response:
+            jobs = [PolarionImportJob(chunk.job_urls[0], chunk.result.testcases) for chunk in chunks
+                    if not chunk.error]
+            chunk_by_url = {chunk.job_urls[0]: chunk for chunk in chunks if not chunk.error}
+            for job in self.poll_import_jobs(jobs):
+                chunk_by_url[job.url].result = job.result
+                if job.error:
+                    chunk_by_url[job.url].error = job.error
+                else:
+                    yield job.result
+        else:
+            for chunk in chunks:
+                if not chunk.error:
+                    yield chunk.result
+
+        failed = [chunk for chunk in chunks if chunk.error]
+        for chunk in failed:
+            LOGGER.error("Error submitting %s: %s" % (chunk, chunk.error))
+        if failed:
+            raise Exception('Error submitting %d of %d test case file(s) to Polarion: %s'
+                            % (len(failed), len(chunks), failed[0].error))
+
+    def submit_chunk(self, chunk: 'PolarionChunk', parse_response=False):
+        """
+        Submits the given chunk (test case XML file) to Polarion, recording the job urls,
+        submitted test cases or the error found into the chunk itself.
+        :param chunk:
+        :param parse_response: waits for the import job (see iter_submit_testcases to wait for many)
+        :return:
+        """
+        LOGGER.info("Submitting %s" % chunk)
         try:
-            response: Response = requests.post(self.config.test_case_url(),
-                                     auth=self.auth,
-                                     headers=self.headers,
-                                     verify=False,
-                                     files=xml_file)
-        except RequestException as req_ex:
-            err_msg = "Error submitting test case: %s" % req_ex
-            LOGGER.error(err_msg)
-            raise req_ex
+            with open(chunk.file_name, 'rb') as xml:
+                response: 'Response' = self.session.post(self.config.test_case_url(),
+                                                         headers=self.headers,
+                                                         files={'file': ('testcase.xml', xml)})
+
+            LOGGER.debug("HTTP Response [Code: %s]: %s" % (response.status_code, response.content))
+
+            if response.status_code != 200 or \
+                    "Project id not specified or invalid" in response.content.decode('utf-8'):
+                raise Exception('Error submitting test-case to Polarion: %s' % response.content)
+            chunk.job_urls = self.get_job_urls(response.json())
+            chunk.result = self.handle_response(response, chunk.testcases, parse_response)
+        except Exception as ex:
+            chunk.error = ex
+        return chunk
+
+    def write_chunks(self, testcases: Iterable[PolarionTestCase],
+                     testcase_elements: Iterable[etree.Element] = None) -> Iterator['PolarionChunk']:
+        """
+        Streams the XML representation of the given test cases into one or more files,
+        each one limited by the number of test cases and/or size in bytes set in the
+        config file. Each chunk is yielded once its file has been completely written.
+        A single file named testcase.xml is generated when no limits are set, and
+        no chunk at all when no test cases are given.
+        Test cases (and elements) are read lazily, one at a time.
+        :param testcases:
+        :param testcase_elements: testcase elements already rendered (see to_elements), if any
+        :return:
+        """
+        testcases = iter(testcases)
+        first_tc = next(testcases, None)
+        if first_tc is None:
+            return
+        testcases = itertools.chain([first_tc], testcases)
+        if testcase_elements is None:
+            rendered = ((ptc, PolarionReporter.to_element(ptc)) for ptc in testcases)
+        else:
+            rendered = zip(testcases, testcase_elements)
+        max_testcases = self.config.chunk_max_testcases()
+        max_bytes = self.config.chunk_max_bytes()
+
+        header = PolarionReporter._xml_header(first_tc)
+        footer = PolarionReporter._xml_footer()
+        overhead = len(header.encode('utf-8')) + len(footer.encode('utf-8'))
+
+        chunk = None
+        chunk_index = 0
+        out_file = None
+        chunk_bytes = 0
+        try:
+            for ptc, element in rendered:
+                fragment = PolarionReporter._xml_fragment(element)
+                fragment_bytes = len(fragment.encode('utf-8'))
+
+                # Close current chunk when limits would be exceeded (a chunk has 1 test case at least)
+                if chunk and ((max_testcases and len(chunk.testcases) >= max_testcases) or
+                              (max_bytes and chunk_bytes + fragment_bytes > max_bytes)):
+                    out_file.write(footer)
+                    out_file.close()
+                    LOGGER.info("Generated: %s", chunk.file_name)
+                    yield chunk
+                    chunk = None
+
+                if chunk is None:
+                    chunk = PolarionChunk(chunk_index)
+                    chunk_index += 1
+                    out_file = open(chunk.file_name, 'w')
+                    out_file.write(header)
+                    chunk_bytes = overhead
+
+                out_file.write(fragment)
+                chunk.testcases.append(ptc)
+                chunk_bytes += fragment_bytes
+
+            if chunk:
+                out_file.write(footer)
+                out_file.close()
+                LOGGER.info("Generated: %s", chunk.file_name)
+                yield chunk
+        finally:
+            if out_file and not out_file.closed:
+                out_file.close()
+
+    def submit_test_run(self, results: Iterable[Tuple[JUnitResult, PolarionTestCase]], test_run_id: str,
+                        test_run_title: str = None, submit: bool = True) -> list:
+        """
+        Streams the given results (along with the Polarion test case each one belongs to) into
+        test run (xunit) files limited by the results chunk limits set in the config file, submitting
+        each file to the xunit importer as soon as it has been written (up to the chunk concurrency).
+        All files are submitted to the same test run.
+        An error is raised once all the other files have been handled, if any file failed.
+        :param results:
+        :param test_run_id:
+        :param test_run_title:
+        :param submit: if not set, the test run files are only written
+        :return: list of PolarionTestRunChunk
+        """
+        chunks = []
+        with ThreadPoolExecutor(max_workers=self.config.chunk_concurrency()) as executor:
+            futures = []
+            for chunk in self.write_test_run_chunks(results, test_run_id, test_run_title):
+                chunks.append(chunk)
+                if submit:
+                    futures.append(executor.submit(self.submit_test_run_chunk, chunk))
+            wait(futures)
+
+        failed = [chunk for chunk in chunks if chunk.error]
+        for chunk in failed:
+            LOGGER.error("Error submitting %s: %s" % (chunk, chunk.error))
+        if failed:
+            raise Exception('Error submitting %d of %d test run file(s) to Polarion: %s'
+                            % (len(failed), len(chunks), failed[0].error))
+        return chunks
+
+    def submit_test_run_chunk(self, chunk: 'PolarionTestRunChunk') -> 'PolarionTestRunChunk':
+        """
+        Submits the given test run file to the xunit importer, recording the
+        job urls or the error found into the chunk itself.
+        :param chunk:
+        :return:
+        """
+        LOGGER.info("Submitting %s" % chunk)
+        try:
+            with open(chunk.file_name, 'rb') as xml:
+                response: 'Response' = self.session.post(self.config.test_run_url(),
+                                                         headers=self.headers,
+                                                         files={'file': (chunk.file_name, xml)})
+
+            LOGGER.debug("HTTP Response [Code: %s]: %s" % (response.status_code, response.content))
+
+            if response.status_code != 200:
+                raise Exception('Error submitting test run to Polarion: %s' % response.content)
+            chunk.job_urls = self.get_job_urls(response.json(), self.config.test_run_url())
+            self.print_tc_job_urls(chunk.job_urls)
+        except Exception as ex:
+            chunk.error = ex
+        return chunk
+
+    def write_test_run_chunks(self, results: Iterable[Tuple[JUnitResult, PolarionTestCase]], test_run_id: str,
+                              test_run_title: str = None) -> Iterator['PolarionTestRunChunk']:
+        """
+        Streams the given results into one or more test run (xunit) files, each one limited by
+        the number of results and/or size in bytes set in the config file (see write_chunks).
+        As a test run file belongs to a single project, a new file is also started
+        whenever the project of the test cases changes.
+        :param results:
+        :param test_run_id:
+        :param test_run_title:
+        :return:
+        """
+        max_results = self.config.results_chunk_max_testcases()
+        max_bytes = self.config.results_chunk_max_bytes()
+        footer = PolarionReporter._test_run_footer()
+
+        chunk = None
+        chunk_index = 0
+        out_file = None
+        chunk_bytes = 0
+        try:
+            for result, ptc in results:
+                fragment = PolarionReporter._xml_fragment(PolarionReporter.to_result_element(result, ptc), level=2)
+                fragment_bytes = len(fragment.encode('utf-8'))
+
+                # Close current chunk when limits would be exceeded (a chunk has 1 result at least)
+                if chunk and (chunk.project != ptc.project or
+                              (max_results and chunk.results >= max_results) or
+                              (max_bytes and chunk_bytes + fragment_bytes > max_bytes)):
+                    out_file.write(footer)
+                    out_file.close()
+                    LOGGER.info("Generated: %s", chunk.file_name)
+                    yield chunk
+                    chunk = None
+
+                if chunk is None:
+                    chunk = PolarionTestRunChunk(chunk_index, ptc.project)
+                    chunk_index += 1
+                    header = self._test_run_header(ptc, test_run_id, test_run_title)
+                    out_file = open(chunk.file_name, 'w')
+                    out_file.write(header)
+                    chunk_bytes = len(header.encode('utf-8')) + len(footer.encode('utf-8'))
+
+                out_file.write(fragment)
+                chunk.results += 1
+                chunk_bytes += fragment_bytes
+
+            if chunk:
+                out_file.write(footer)
+                out_file.close()
+                LOGGER.info("Generated: %s", chunk.file_name)
+                yield chunk
+        finally:
+            if out_file and not out_file.closed:
+                out_file.close()
 
-        LOGGER.debug("HTTP Response [Code: %s]: %s" % (response.status_code, response.content))
+    @staticmethod
+    def to_result_element(result: JUnitResult, ptc: PolarionTestCase) -> etree.Element:
+        """
+        Returns the xunit 'testcase' element of the given result, which is looked up
+        in Polarion as the given test case (by title or id, see lookup-method).
+        :param result:
+        :param ptc:
+        :return:
+        """
+        element = etree.Element('testcase')
+        element.set('name', ptc.title)
+        if result.time:
+            element.set('time', result.time)
+        if result.status != JUnitResult.PASSED:
+            outcome = etree.SubElement(element, result.status)
+            if result.message is not None:
+                outcome.set('message', result.message)
+            outcome.text = result.text
+        properties = etree.SubElement(element, 'properties')
+        PolarionXmlUtils.new_property_sub_element(properties, 'polarion-testcase-id', ptc.id)
+        return element
+
+    def _test_run_header(self, first_tc: PolarionTestCase, test_run_id: str, test_run_title: str = None,
+                         indent: str = '\t') -> str:
+        """
+        Returns the XML declaration, the opening root (testsuites) element with the
+        test run properties and the opening testsuite element.
+        :param first_tc:
+        :param test_run_id:
+        :param test_run_title:
+        :param indent:
+        :return:
+        """
+        properties = etree.Element('properties')
+        PolarionXmlUtils.new_property_sub_element(properties, 'polarion-project-id', first_tc.project)
+        PolarionXmlUtils.new_property_sub_element(properties, 'polarion-lookup-method', first_tc.lookup_method)
+        PolarionXmlUtils.new_property_sub_element(properties, 'polarion-user-id', self.config.username())
+        PolarionXmlUtils.new_property_sub_element(properties, 'polarion-testrun-id', test_run_id)
+        PolarionXmlUtils.new_property_sub_element(properties, 'polarion-testrun-title', test_run_title)
 
-        if response.status_code != 200 or "Project id not specified or invalid" in response.content.decode('utf-8'):
-            raise Exception('Error submitting test-case to Polarion: %s' % response.content)
-        else:
-            submitted_tc.extend(self.handle_response(response, testcases, parse_response))
-        return submitted_tc
+        return '<?xml version="1.0" ?>\n<testsuites>\n' + \
+               PolarionReporter._xml_fragment(properties, indent) + \
+               '%s<testsuite name=%s>\n' % (indent, quoteattr(test_run_id))
 
+    @staticmethod
+    def _test_run_footer(indent: str = '\t') -> str:
+        return '%s</testsuite>\n</testsuites>\n' % indent
 
-    def assign_imported_work_item(self, msg_content_json, testcases):
-        test_wi_map = {}
-        testcase_tuples = [(testcase.id, testcase) for testcase in testcases]
+    def map_import_result(self, msg_content_json: dict, result: PolarionImportResult) -> PolarionImportResult:
+        """
+        Records the import outcome (status and work item) reported for each
+        one of the submitted test cases into the given result.
+        :param msg_content_json: message content (UMB message reply) of the import job
+        :param result:
+        :return:
+        """
+        result.status = msg_content_json['status']
+        testcases_by_id = {testcase.id: testcase for testcase in result.testcases}
 
-        # construct http://polarion.devel.engineering.redhat.com/polarion/#/project/AMQ/workitem?id=AMQ-94
-        polarion_main_url = "/".join(self.config.test_case_url().split("/")[:-2])
         for imp_tc in msg_content_json['import-testcases']:
-            if imp_tc['status'] == "passed":
-                for tc_tuple in testcase_tuples:
-                    if imp_tc['name'] == tc_tuple[0]:
-                        tc_wi_url = "/".join([polarion_main_url, "#", "project", tc_tuple[1].project,
-                                              "workitem?id=%s" % imp_tc['id']])
-                        LOGGER.debug(tc_wi_url)
-                        tc_tuple[1].test_case_work_item_url = tc_wi_url
-            else:
-                raise Exception('Polarion Import error for Testcase %s %s!' % (imp_tc['name'], imp_tc['id']))
+            testcase = testcases_by_id.get(imp_tc['name'])
+            if testcase is None:
+                continue
+            imported = PolarionImportedTestCase(testcase.id, imp_tc['status'], imp_tc.get('id'))
+            if imported.passed:
+                imported.work_item_url = self.get_work_item_url(testcase.project, imported.work_item_id)
+                LOGGER.debug(imported.work_item_url)
+            result.add(imported)
 
-        return testcases
+        return result
 
-    def get_job_urls(self, response: dict):
+    def get_work_item_url(self, project: str, work_item_id: str) -> str:
+        """
+        Returns the url of the given work item.
+        :param project:
+        :param work_item_id:
+        :return:
+        """
+        # construct http://polarion.devel.engineering.redhat.com/polarion/#/project/AMQ/workitem?id=AMQ-94
+        polarion_main_url = "/".join(self.config.test_case_url().split("/")[:-2])
+        return "/".join([polarion_main_url, "#", "project", project, "workitem?id=%s" % work_item_id])
+
+    def get_job_urls(self, response: dict, importer_url: str = None):
         """
         Parse response (dict) and extract "job-url" for each associated XML file.
         :param tc:
         :param response:
+        :param importer_url: importer the files were submitted to (test case importer by default)
         :return:
         """
         job_urls = []
@@ -135,17 +486,18 @@ class PolarionReporter(object):
             if 'job-ids' not in response['files'][file]:
                 continue
             for j in response['files'][file]['job-ids']:
-                job_urls.append(self.get_job_url(j))
+                job_urls.append(self.get_job_url(j, importer_url))
         return job_urls
 
-    def get_job_url(self, job_id: str):
+    def get_job_url(self, job_id: str, importer_url: str = None):
         """
         Create the test case id along with a statically generated URL for submitted job id.
         :param tc_id:
         :param job_id:
+        :param importer_url: importer the job belongs to (test case importer by default)
         :return:
         """
-        tc_job_url = "%s-log?jobId=%s" % (self.config.test_case_url(), job_id)
+        tc_job_url = "%s-log?jobId=%s" % (importer_url or self.config.test_case_url(), job_id)
         return tc_job_url
 
     def print_tc_job_urls(self, tc_job_urls: list):
@@ -159,151 +511,247 @@ class PolarionReporter(object):
             LOGGER.info(tc_job_url)
 
     @staticmethod
-    def to_xml(polarion_testcase_list: list):
+    def to_element(ptc: PolarionTestCase) -> etree.Element:
+        """
+        Returns the 'testcase' XML element for the given Polarion TestCase.
+        :param ptc:
+        :return:
+        """
+        # testcase and attributes
+        tc = etree.Element('testcase')
+        tc.set('assignee-id', ptc.assignee)
+        if ptc.approvals:
+            tc.set('approver-ids', ",".join([ap + ":approved" for ap in ptc.approvals]))
+        tc.set('id', ptc.id)
+
+        # workflow is:
+        # - proposed if description, level and importance defined
+        # - approved if proposed conditions met, plus:
+        #   - automation_script set (when automated)
+        #   - requirement with role 'verifies' populated
+        if ptc.description != "" and ptc.level != "" and ptc.importance != "":
+            ptc.status = "proposed"
+            if len(ptc.verifies) > 0 and (ptc.automated == "notautomated" or ptc.automation_script != ""):
+                ptc.status = "approved"
+        tc.set('status-id', ptc.status)
+
+        # testcase child elements
+        # testcase/title
+        tc_title = etree.SubElement(tc, 'title')
+        tc_title.text = ptc.title
+
+        # testcase/description
+        tc_description = etree.SubElement(tc, 'description')
+        tc_description.text = PolarionTestCase.DESC_PREFIX_SUFFIX
+        if ptc.description:
+            tc_description.text += "<br>"
+            tc_description.text += escape(ptc.description).replace('\n', '<br>')
+            tc_description.text += "<br>"
+            tc_description.text += PolarionTestCase.DESC_PREFIX_SUFFIX
+
+        # testcase/custom-fields
+        tc_custom = etree.SubElement(tc, 'custom-fields')
+        PolarionXmlUtils.new_custom_field(tc_custom, 'casecomponent', ptc.component)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'subcomponent', ptc.sub_component)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'testtype', ptc.type)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'subtype1', ptc.subtype1)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'subtype2', ptc.subtype2)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'caselevel', ptc.level)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'caseimportance', ptc.importance)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'caseposneg', ptc.positive)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'caseautomation', ptc.automated)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'setup', ptc.create_step_result_table(ptc.setup))
+        PolarionXmlUtils.new_custom_field(tc_custom, 'teardown', ptc.create_step_result_table(ptc.teardown))
+        PolarionXmlUtils.new_custom_field(tc_custom, 'automation_script', ptc.automation_script)
+        PolarionXmlUtils.new_custom_field(tc_custom, 'customerscenario', str(ptc.is_customer_scenario))
+        if ptc.tags:
+            PolarionXmlUtils.new_custom_field(tc_custom, 'tags', ', '.join(ptc.tags))
+
+        # testcase/linked-work-items
+        if ptc.verifies:
+            tc_linked = etree.SubElement(tc, 'linked-work-items')
+            for verify in [verify for verify in ptc.verifies if isinstance(verify, dict)]:
+                PolarionXmlUtils.new_linked_work_item(tc_linked,
+                                                      verify.get('polarion', verify.get('jira', '')),
+                                                      'verifies')
+
+        # testcase/test-steps
+        if ptc.steps:
+            tc_steps = etree.SubElement(tc, 'test-steps')
+
+            # If test case has parameters, add them
+            if ptc.parameters:
+                PolarionXmlUtils.new_test_step_params(tc_steps, ptc.parameters)
+
+            for step in ptc.steps:
+                PolarionXmlUtils.new_test_step(tc_steps, step.step, step.result)
+
+        # external links Jira, BZ
+        if ptc.defects:
+            tc_hyperlinks = etree.SubElement(tc, "hyperlinks")
+            for defect in ptc.defects:
+                # Flags (i.e: customer-case) are not links
+                for key in [key for key in defect if isinstance(defect[key], str)]:
+                    PolarionXmlUtils.new_hyperlink_sub_element(tc_hyperlinks, "tc_customerdefect", defect[key])
+                    # PolarionXmlUtils.new_hyperlink_sub_element(tc_hyperlinks, "testscript", defect[key])
+
+        return tc
+
+    @staticmethod
+    @METRICS.timed('render')
+    def to_elements(polarion_testcase_list: list, jobs: int = 1) -> list:
+        """
+        Returns the 'testcase' XML elements for the given Polarion TestCases,
+        rendered across a pool of processes when jobs > 1 (order is preserved).
+        :param polarion_testcase_list:
+        :param jobs:
+        :return:
+        """
+        rendered = parallel_map(PolarionReporter._render, polarion_testcase_list, jobs)
+        # Status is evaluated (on the worker's copy) while rendering
+        for ptc, (status, _) in zip(polarion_testcase_list, rendered):
+            ptc.status = status
+        return [element for _, element in rendered]
+
+    @staticmethod
+    def _render(ptc: PolarionTestCase) -> tuple:
+        element = PolarionReporter.to_element(ptc)
+        return ptc.status, element
+
+    @staticmethod
+    def to_xml(polarion_testcase_list: list, testcase_elements: list = None):
         """
         Returns an XML representation of a Polarion TestCase based
         on current state of this instance.
+        :param polarion_testcase_list:
+        :param testcase_elements: testcase elements already rendered (see to_element), if any
         :return: str representing the test case xml
         """
-        xmltree = etree.ElementTree(element=etree.Element('testcases'))
+        output_file_name = PolarionReporter.to_xml_file(polarion_testcase_list, testcase_elements=testcase_elements)
+        with open(output_file_name, 'r') as out_file:
+            return out_file.read()
 
-        # root element - testcases and attributes
-        xmlroot = xmltree.getroot()
-        xmlroot.attrib['project-id'] = polarion_testcase_list[0].project
+    @staticmethod
+    def to_xml_file(polarion_testcase_list: Iterable[PolarionTestCase], output_file_name: str = "testcase.xml",
+                    testcase_elements: Iterable[etree.Element] = None) -> str:
+        """
+        Streams the XML representation of the given Polarion TestCases into a file.
+        :param polarion_testcase_list:
+        :param output_file_name:
+        :param testcase_elements: testcase elements already rendered (see to_element), if any
+        :return: the output file name
+        """
+        with open(output_file_name, 'w') as out_file:
+            PolarionReporter.write_xml(polarion_testcase_list, out_file, testcase_elements=testcase_elements)
+        LOGGER.info("Generated: %s", output_file_name)
+        return output_file_name
+
+    @staticmethod
+    def write_xml(polarion_testcase_list: Iterable[PolarionTestCase], out, indent: str = '\t',
+                  testcase_elements: Iterable[etree.Element] = None):
+        """
+        Writes the XML representation of the given Polarion TestCases into out (a text
+        file-like object), one testcase element at a time, so memory usage does not grow
+        with the number of test cases.
+        The project id and lookup method are taken from the first test case.
+        :param polarion_testcase_list:
+        :param out:
+        :param indent: string used to indent each level (None or '' to disable pretty printing)
+        :param testcase_elements: testcase elements already rendered (see to_element), if any
+        :return:
+        """
+        testcases = iter(polarion_testcase_list)
+        first_tc = next(testcases)
+        if testcase_elements is None:
+            testcase_elements = (PolarionReporter.to_element(ptc) for ptc in itertools.chain([first_tc], testcases))
+
+        out.write(PolarionReporter._xml_header(first_tc, indent))
+        for tc in testcase_elements:
+            out.write(PolarionReporter._xml_fragment(tc, indent))
+        out.write(PolarionReporter._xml_footer(indent))
+
+    @staticmethod
+    def _xml_fragment(element: etree.Element, indent: str = '\t', level: int = 1) -> str:
+        """
+        Serializes the given element as a child of the root (testcases) element.
+        :param element:
+        :param indent:
+        :param level:
+        :return:
+        """
+        if indent:
+            PolarionXmlUtils.indent(element, indent, level)
+        element.tail = '\n' if indent else ''
+        return (indent * level if indent else '') + etree.tostring(element, encoding='unicode')
+
+    @staticmethod
+    def _xml_header(first_tc: PolarionTestCase, indent: str = '\t') -> str:
+        """
+        Returns the XML declaration, the opening root (testcases) element
+        and the properties, taken from the given test case.
+        :param first_tc:
+        :param indent:
+        :return:
+        """
+        newline = '\n' if indent else ''
 
         # properties
-        properties = etree.SubElement(xmlroot, 'properties')
-        PolarionXmlUtils.new_property_sub_element(properties, 'lookup-method', polarion_testcase_list[0].lookup_method)
-
-        for ptc in polarion_testcase_list:
-            # testcase and attributes
-            tc = etree.SubElement(xmlroot, 'testcase')
-            tc.set('assignee-id', ptc.assignee)
-            if ptc.approvals:
-                tc.set('approver-ids', ",".join([ap + ":approved" for ap in ptc.approvals]))
-            tc.set('id', ptc.id)
-
-            # workflow is:
-            # - proposed if description, level and importance defined
-            # - approved if proposed conditions met, plus:
-            #   - automation_script set (when automated)
-            #   - requirement with role 'verifies' populated
-            if ptc.description != "" and ptc.level != "" and ptc.importance != "":
-                ptc.status = "proposed"
-                if len(ptc.verifies) > 0 and (ptc.automated == "notautomated" or ptc.automation_script != ""):
-                    ptc.status = "approved"
-            tc.set('status-id', ptc.status)
-
-            # testcase child elements
-            # testcase/title
-            tc_title = etree.SubElement(tc, 'title')
-            tc_title.text = ptc.title
-
-            # testcase/description
-            tc_description = etree.SubElement(tc, 'description')
-            tc_description.text = PolarionTestCase.DESC_PREFIX_SUFFIX
-            if ptc.description:
-                tc_description.text += "<br>"
-                tc_description.text += escape(ptc.description).replace('\n', '<br>')
-                tc_description.text += "<br>"
-                tc_description.text += PolarionTestCase.DESC_PREFIX_SUFFIX
-
-            # testcase/custom-fields
-            tc_custom = etree.SubElement(tc, 'custom-fields')
-            PolarionXmlUtils.new_custom_field(tc_custom, 'casecomponent', ptc.component)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'subcomponent', ptc.sub_component)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'testtype', ptc.type)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'subtype1', ptc.subtype1)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'subtype2', ptc.subtype2)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'caselevel', ptc.level)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'caseimportance', ptc.importance)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'caseposneg', ptc.positive)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'caseautomation', ptc.automated)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'setup', ptc.create_step_result_table(ptc.setup))
-            PolarionXmlUtils.new_custom_field(tc_custom, 'teardown', ptc.create_step_result_table(ptc.teardown))
-            PolarionXmlUtils.new_custom_field(tc_custom, 'automation_script', ptc.automation_script)
-            PolarionXmlUtils.new_custom_field(tc_custom, 'customerscenario', str(ptc.is_customer_scenario))
-            if ptc.tags:
-                PolarionXmlUtils.new_custom_field(tc_custom, 'tags', ', '.join(ptc.tags))
-
-            # testcase/linked-work-items
-            if ptc.verifies:
-                tc_linked = etree.SubElement(tc, 'linked-work-items')
-                for verify in [verify for verify in ptc.verifies if isinstance(verify, dict)]:
-                    PolarionXmlUtils.new_linked_work_item(tc_linked,
-                                                          verify.get('polarion', verify.get('jira', '')),
-                                                          'verifies')
-
-            # testcase/test-steps
-            if ptc.steps:
-                tc_steps = etree.SubElement(tc, 'test-steps')
-
-                # If test case has parameters, add them
-                if ptc.parameters:
-                    PolarionXmlUtils.new_test_step_params(tc_steps, ptc.parameters)
-
-                for step in ptc.steps:
-                    PolarionXmlUtils.new_test_step(tc_steps, step.step, step.result)
-
-            # external links Jira, BZ
-            if ptc.defects:
-                tc_hyperlinks = etree.SubElement(tc, "hyperlinks")
-                for defect in ptc.defects:
-                    for key in defect:
-                        PolarionXmlUtils.new_hyperlink_sub_element(tc_hyperlinks, "tc_customerdefect", defect[key])
-                        # PolarionXmlUtils.new_hyperlink_sub_element(tc_hyperlinks, "testscript", defect[key])
-
-        xml_str = minidom.parseString(etree.tostring(xmlroot)).toprettyxml()
-
-        output_file_name = "testcase.xml"
-        LOGGER.info("Generated: %s", output_file_name)
-        with open(output_file_name, 'w') as out_file:
-            out_file.write(xml_str)
-            out_file.close()
+        properties = etree.Element('properties')
+        PolarionXmlUtils.new_property_sub_element(properties, 'lookup-method', first_tc.lookup_method)
 
-        return xml_str
+        # root element - testcases and attributes
+        return '<?xml version="1.0" ?>' + newline + \
+               '<testcases project-id=%s>%s' % (quoteattr(first_tc.project), newline) + \
+               PolarionReporter._xml_fragment(properties, indent)
 
-    def parse_import_job_data(self, import_job_url: list, testcases):
+    @staticmethod
+    def _xml_footer(indent: str = '\t') -> str:
+        return '</testcases>' + ('\n' if indent else '')
+
+    def parse_import_job_data(self, import_job_url: str, testcases) -> PolarionImportResult:
+        """
+        Waits for the given import job to finish, returning the import result
+        of the given test cases (see parse_import_result).
+        :param import_job_url:
+        :param testcases:
+        :return:
+        """
+        job = next(self.poll_import_jobs([PolarionImportJob(import_job_url, testcases)]))
+        if job.error:
+            raise job.error
+        return job.result
+
+    def poll_import_jobs(self, jobs: Iterable[PolarionImportJob]) -> Iterator[PolarionImportJob]:
+        """
+        Polls all given import jobs concurrently, yielding each one as soon as it finishes,
+        with its import result (or with an error).
+        :param jobs:
+        :return:
+        """
+        for job in self.job_poller.poll(jobs):
+            if not job.error:
+                try:
+                    self.parse_import_result(job)
+                except Exception as ex:
+                    job.error = ex
+            yield job
+
+    def parse_import_result(self, job: PolarionImportJob) -> PolarionImportResult:
         """
         Parse relevant part of import job output (UMB messsage reply), which contains critical data:
         test-case-id, name and status if imported test case.
-        :param import_job_urls:
-        :type import_job_urls:
+        The import result is recorded into the job, and an error is raised if the import failed.
+        :param job: finished import job
         :return:
-        :rtype:
-        """
-        import_successful = False
-        out = None
-        max_attempts = 120
-        attempt = 0
-        while not import_successful and attempt < max_attempts:
-            attempt += 1
-            try:
-                response: Response = requests.get(import_job_url, auth=self.auth, verify=False)
-            except RequestException as req_ex:
-                err_msg = "Error getting response from import job: %s" % req_ex
-                LOGGER.error(err_msg)
-                raise req_ex
-
-            if response.status_code != 200 or "Project id not specified or invalid" in response.content.decode('utf-8'):
-                raise Exception('Error getting import job data from Polarion: %s' % response.content)
-            else:
-                out = response.content.decode("UTF-8")
-                if "Ending import of test cases to Polarion" in out and "Rolling back test case import due to earlier errors" not in out:
-                    import_successful = True
-                else:
-                    # we need to give some time to Polarion, to import test case itself, else we'll get empty data
-                    LOGGER.debug("import data not yet available - attempt %d/%d" % (attempt, max_attempts))
-                    if attempt == max_attempts:
-                        break
-                    time.sleep(2)
-
-        out = out.replace("&#034;", "\"").splitlines()
-        msg_content_json = PolarionReporter.parse_message_content(out)
-        if msg_content_json['status'] == "passed":
-            self.assign_imported_work_item(msg_content_json, testcases)
-        else:
-            raise Exception('Polarion Import error for %s!' % import_job_url)
+        """
+        msg_content_json = job.message
+        job.result = self.map_import_result(msg_content_json, PolarionImportResult(job.url, job.testcases))
+        if msg_content_json['status'] != "passed":
+            raise Exception('Polarion Import error for %s!' % job.url)
+        for imported in job.result.failed:
+            raise Exception('Polarion Import error for Testcase %s %s!' % (imported.testcase_id,
+                                                                          imported.work_item_id))
+        return job.result
 
     @staticmethod
     def parse_message_content(out):
@@ -316,34 +764,75 @@ class PolarionReporter(object):
         :return: dict as json
         :rtype: dict
         """
-        started = False
-        json_lines = ""
+        parser = PolarionJobLogParser()
         for line in out:
-            if started:
-                json_lines += line
-            if "Message Content:" in line:
-                started = True
-                continue
-            if line.startswith("}"):
-                started = False
-        return json.loads(json_lines)
+            if parser.feed(line):
+                break
+        return parser.message
 
-    def handle_response(self, response, testcases, parse_response):
-        tcs = []
+    def handle_response(self, response, testcases, parse_response) -> PolarionImportResult:
         urls = self.get_job_urls(response.json())
         if len(urls) != 1:
             # We don't track testcase vs import job mapping (multiple import xml files).
             # All testcases submitted by this execution are imported from 1 xml file.
             raise RuntimeError("Error occurred when importing testcase! Multiple job urls found.")
 
-        for testcase in testcases:
-            tcs.append(testcase)
-
         self.print_tc_job_urls(urls)
 
         if parse_response:
-            self.parse_import_job_data(urls, testcases)
+            return self.parse_import_job_data(urls[0], testcases)
+        return PolarionImportResult(urls[0], list(testcases))
+
+
+class PolarionChunk(object):
+    """
+    Represents a test case XML file (chunk of a larger submission) sent to the
+    Polarion test case importer, along with the outcome of its submission.
+    """
+
+    def __init__(self, index: int):
+        self.index = index
+        self.file_name = "testcase.xml" if index == 0 else "testcase-%d.xml" % (index + 1)
+        self.testcases = []
+        # Populated once submitted
+        self.job_urls = []
+        self.result: PolarionImportResult = None
+        self.error = None
+
+    def __str__(self):
+        return "%s (%d test cases)" % (self.file_name, len(self.testcases))
 
 
+class PolarionSubmission(object):
+    """
+    Outcome of submitting a single test case to Polarion (one by one mode).
+    """
+
+    def __init__(self, testcase: PolarionTestCase):
+        self.testcase = testcase
+        # Populated once submitted
+        self.result: PolarionImportResult = None
+        self.error = None
+
+    def __str__(self):
+        return "%s (%s)" % (self.testcase.id, self.error if self.error else "submitted")
+
+
+class PolarionTestRunChunk(object):
+    """
+    Represents a test run (xunit) XML file with the results of a single project,
+    sent to the Polarion xunit importer, along with the outcome of its submission.
+    """
 
-        return tcs
\ No newline at end of file
+    def __init__(self, index: int, project: str):
+        self.index = index
+        self.project = project
+        self.file_name = "testrun.xml" if index == 0 else "testrun-%d.xml" % (index + 1)
+        # Only counted, as result files can be huge
+        self.results = 0
+        # Populated once submitted
+        self.job_urls = []
+        self.error = None
+
+    def __str__(self):
+        return "%s (%d results)" % (self.file_name, self.results)
@@ -1,9 +1,9 @@
 from fmfexporter import FMFTestCase
 import re
 import xml.etree.ElementTree as etree
-from xml.dom import minidom
 from html import escape
 from fmfexporter.adapters.polarion.utils.polarion_xml import PolarionXmlUtils
+from fmfexporter.metrics import METRICS
 
 # Static styles to be used while rendering HTML tables
 HTML_TABLE_TD_STYLE = 'height: 12px;text-align: left;vertical-align: top;line-height: 18px;border: 1px solid #CCCCCC;padding: 5px;'
@@ -35,6 +35,7 @@ class PolarionTestCase(object):
     DESC_PREFIX_SUFFIX = "-- DO NOT EDIT THROUGH THE POLARION UI --"
 
     @staticmethod
+    @METRICS.timed('convert')
     def from_fmf_testcase(fmf_testcase: FMFTestCase):
         """
         Creates an instance of PolarionTestCase based on the
@@ -289,10 +290,12 @@ class PolarionTestCase(object):
         if self.defects:
             tc_hyperlinks = etree.SubElement(tc, "hyperlinks")
             for defect in self.defects:
-                for key in defect:
+                # Flags (i.e: customer-case) are not links
+                for key in [key for key in defect if isinstance(defect[key], str)]:
                     PolarionXmlUtils.new_hyperlink_sub_element(tc_hyperlinks, "tc_customerdefect", defect[key])
                     # PolarionXmlUtils.new_hyperlink_sub_element(tc_hyperlinks, "testscript", defect[key])
 
+        from xml.dom import minidom
         xml_str = minidom.parseString(etree.tostring(xmlroot)).toprettyxml()
 
         with open("testcase.xml", 'w') as out_file:
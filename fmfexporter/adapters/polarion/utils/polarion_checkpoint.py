@@ -0,0 +1,138 @@
+"""
+Records the progress of each test case through an export, so that an
+interrupted export can be resumed without redoing the completed work.
+"""
+import json
+import logging
+import os
+from typing import Iterable, Iterator
+
+from fmfexporter.adapters.polarion.polarion_test_case import PolarionTestCase
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult, \
+    PolarionImportedTestCase
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PolarionCheckpoint(object):
+    """
+    Append-only checkpoint file, holding one JSON line for each phase completed
+    by a test case (along with its work item url, once imported). Only the most
+    advanced phase of each test case is kept in memory.
+    """
+
+    # Phases of an export, in the order they are completed
+    SUBMITTED = 'submitted'
+    IMPORTED = 'imported'
+    POPULATED = 'populated'
+    PHASES = [SUBMITTED, IMPORTED, POPULATED]
+
+    def __init__(self, checkpoint_file: str, resume: bool = False):
+        self.checkpoint_file = checkpoint_file
+        self.phases = {}
+        self.work_item_urls = {}
+        if resume:
+            self.load()
+        elif os.path.isfile(checkpoint_file):
+            # A new export (not resumed) starts from an empty checkpoint
+            open(checkpoint_file, 'w').close()
+        # Opened when the first entry is recorded
+        self._out = None
+
+    def is_done(self, testcase_id: str, phase: str) -> bool:
+        """
+        Whether the given test case has completed the given phase (or a later one).
+        :param testcase_id:
+        :param phase:
+        :return:
+        """
+        done = self.phases.get(testcase_id)
+        return done is not None and self.PHASES.index(done) >= self.PHASES.index(phase)
+
+    def filter_pending(self, testcases: Iterable[PolarionTestCase], phase: str, submit_phase: str = None,
+                       submitted: list = None) -> Iterator[PolarionTestCase]:
+        """
+        Yields only the test cases that have not completed the given phase yet.
+        Test cases that completed the given submit_phase (but not phase) are not yielded
+        either, but added to the submitted list instead, as they only miss the later phases.
+        :param testcases:
+        :param phase:
+        :param submit_phase:
+        :param submitted:
+        :return:
+        """
+        for tc in testcases:
+            if self.is_done(tc.id, phase):
+                LOGGER.info("Skipping test case already %s: %s" % (phase, tc.id))
+            elif submit_phase and self.is_done(tc.id, submit_phase):
+                LOGGER.info("Skipping test case already %s: %s" % (self.phases[tc.id], tc.id))
+                submitted.append(tc)
+            else:
+                yield tc
+
+    def get_import_result(self, testcases: list) -> PolarionImportResult:
+        """
+        Returns an import result holding the recorded work item url of each given test case.
+        :param testcases:
+        :return:
+        """
+        result = PolarionImportResult(self.checkpoint_file, testcases)
+        for tc in testcases:
+            if tc.id in self.work_item_urls:
+                result.add(PolarionImportedTestCase(tc.id, 'passed', work_item_url=self.work_item_urls[tc.id]))
+        return result
+
+    def record(self, testcases: Iterable[PolarionTestCase], phase: str, import_result: PolarionImportResult = None):
+        """
+        Records that the given test cases have completed the given phase.
+        :param testcases:
+        :param phase:
+        :param import_result: holding the work item url of the test cases (if imported)
+        :return:
+        """
+        if self._out is None:
+            self._open()
+        for tc in testcases:
+            self.phases[tc.id] = phase
+            entry = {'id': tc.id, 'phase': phase}
+            work_item_url = import_result.work_item_url(tc.id) if import_result else None
+            if work_item_url:
+                self.work_item_urls[tc.id] = entry['url'] = work_item_url
+            self._out.write(json.dumps(entry) + "\n")
+        # Flushed (not synced), so records survive the process being killed
+        self._out.flush()
+
+    def load(self):
+        """
+        Loads the checkpoint file (if it exists).
+        :return:
+        """
+        if not os.path.isfile(self.checkpoint_file):
+            return
+        with open(self.checkpoint_file, 'r') as checkpoint:
+            for line in checkpoint:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line may be incomplete if the export has been interrupted while writing it
+                    LOGGER.warning("Ignoring invalid checkpoint entry: %s" % line.strip())
+                    continue
+                self.phases[entry['id']] = entry['phase']
+                if entry.get('url'):
+                    self.work_item_urls[entry['id']] = entry['url']
+
+    def _open(self):
+        self._out = open(self.checkpoint_file, 'a')
+        if self._out.tell() > 0 and not self._ends_with_newline():
+            # Leaves an incomplete last entry on its own line
+            self._out.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.checkpoint_file, 'rb') as checkpoint:
+            checkpoint.seek(-1, os.SEEK_END)
+            return checkpoint.read(1) == b'\n'
+
+    def close(self):
+        if self._out is not None:
+            self._out.close()
+            self._out = None
@@ -15,6 +15,22 @@ class PolarionConfig(object):
     KEY_XUNIT_URL = 'XunitImporterUrl'
     KEY_USER = 'user'
     KEY_PASS = 'pass'
+    KEY_CHUNK_MAX_TCS = 'ChunkMaxTestCases'
+    KEY_CHUNK_MAX_BYTES = 'ChunkMaxBytes'
+    KEY_CHUNK_CONCURRENCY = 'ChunkConcurrency'
+    KEY_SUBMIT_CONCURRENCY = 'SubmitConcurrency'
+    KEY_SUBMIT_RATE = 'SubmitRate'
+    KEY_SUBMIT_BURST = 'SubmitBurst'
+    KEY_JOB_POLL_INTERVAL = 'JobPollInterval'
+    KEY_JOB_POLL_MAX_INTERVAL = 'JobPollMaxInterval'
+    KEY_JOB_POLL_TIMEOUT = 'JobPollTimeout'
+    KEY_JOB_POLL_CONCURRENCY = 'JobPollConcurrency'
+    KEY_HTTP_POOL_SIZE = 'HttpPoolSize'
+    KEY_HTTP_TIMEOUT = 'HttpTimeout'
+    KEY_HTTP_RETRIES = 'HttpRetries'
+    KEY_HTTP_RETRY_BACKOFF = 'HttpRetryBackoff'
+    KEY_RESULTS_CHUNK_MAX_TCS = 'ResultsChunkMaxTestCases'
+    KEY_RESULTS_CHUNK_MAX_BYTES = 'ResultsChunkMaxBytes'
 
     def __init__(self, config_file):
         self.config = configparser.ConfigParser()
@@ -48,3 +64,121 @@ class PolarionConfig(object):
         :return:
         """
         return self.config[PolarionConfig.KEY_SECTION][PolarionConfig.KEY_PASS]
+
+    def chunk_max_testcases(self) -> int:
+        """
+        Returns the maximum number of test cases submitted per file (0 means unlimited)
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_CHUNK_MAX_TCS, fallback=0)
+
+    def chunk_max_bytes(self) -> int:
+        """
+        Returns the maximum size in bytes of each submitted file (0 means unlimited)
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_CHUNK_MAX_BYTES, fallback=0)
+
+    def chunk_concurrency(self) -> int:
+        """
+        Returns the maximum number of files being submitted at the same time
+        :return:
+        """
+        return max(1, self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_CHUNK_CONCURRENCY,
+                                                                     fallback=1))
+
+    def results_chunk_max_testcases(self) -> int:
+        """
+        Returns the maximum number of test case results submitted per test run file (0 means unlimited)
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_RESULTS_CHUNK_MAX_TCS, fallback=0)
+
+    def results_chunk_max_bytes(self) -> int:
+        """
+        Returns the maximum size in bytes of each submitted test run file (0 means unlimited)
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_RESULTS_CHUNK_MAX_BYTES,
+                                                              fallback=10485760)
+
+    def submit_concurrency(self) -> int:
+        """
+        Returns the maximum number of test cases being submitted at the same time (one by one mode)
+        :return:
+        """
+        return max(1, self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_SUBMIT_CONCURRENCY,
+                                                                     fallback=1))
+
+    def submit_rate(self) -> float:
+        """
+        Returns the maximum number of submissions started per second (0 means unlimited)
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getfloat(PolarionConfig.KEY_SUBMIT_RATE, fallback=0)
+
+    def submit_burst(self) -> int:
+        """
+        Returns the number of submissions that can be started at once, before the rate limit applies
+        :return:
+        """
+        return max(1, self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_SUBMIT_BURST, fallback=1))
+
+    def job_poll_interval(self) -> float:
+        """
+        Returns the interval (in seconds) before an import job is polled again for the first time
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getfloat(PolarionConfig.KEY_JOB_POLL_INTERVAL, fallback=0.5)
+
+    def job_poll_max_interval(self) -> float:
+        """
+        Returns the maximum interval (in seconds) between polls of the same import job
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getfloat(PolarionConfig.KEY_JOB_POLL_MAX_INTERVAL,
+                                                                fallback=10)
+
+    def job_poll_timeout(self) -> float:
+        """
+        Returns the maximum time (in seconds) to wait for all import jobs to finish
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getfloat(PolarionConfig.KEY_JOB_POLL_TIMEOUT, fallback=600)
+
+    def job_poll_concurrency(self) -> int:
+        """
+        Returns the maximum number of import jobs being polled at the same time
+        :return:
+        """
+        return max(1, self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_JOB_POLL_CONCURRENCY,
+                                                                     fallback=4))
+
+    def http_pool_size(self) -> int:
+        """
+        Returns the number of HTTP connections kept alive (and reused) by the reporter
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_HTTP_POOL_SIZE, fallback=10)
+
+    def http_timeout(self) -> float:
+        """
+        Returns the timeout (in seconds) to connect and to wait for data from Polarion
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getfloat(PolarionConfig.KEY_HTTP_TIMEOUT, fallback=120)
+
+    def http_retries(self) -> int:
+        """
+        Returns the number of retries for HTTP requests failing with connection errors or 5xx
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getint(PolarionConfig.KEY_HTTP_RETRIES, fallback=3)
+
+    def http_retry_backoff(self) -> float:
+        """
+        Returns the backoff factor (in seconds) between retries (exponential, with random jitter)
+        :return:
+        """
+        return self.config[PolarionConfig.KEY_SECTION].getfloat(PolarionConfig.KEY_HTTP_RETRY_BACKOFF,
+                                                                fallback=1.0)
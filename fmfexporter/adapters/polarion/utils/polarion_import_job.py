@@ -0,0 +1,241 @@
+"""
+Tracks the Polarion import jobs created by test case submissions until they finish.
+"""
+import heapq
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterable, Iterator, TYPE_CHECKING
+
+from fmfexporter.adapters.polarion.utils.polarion_config import PolarionConfig
+from fmfexporter.metrics import METRICS
+
+if TYPE_CHECKING:
+    from requests import Session
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PolarionJobLogParser(object):
+    """
+    Incremental parser for the import job log, fed one line at a time.
+    It extracts the JSON document that follows the "Message Content:" line (UMB message reply),
+    which holds the status, job id and imported test case ids.
+    """
+
+    MESSAGE_MARKER = "Message Content:"
+
+    def __init__(self):
+        self.message_lines = []
+        self.started = False
+        self.message_complete = False
+        self.import_ended = False
+
+    def feed(self, line: str) -> bool:
+        """
+        Parses the given log line, returning True once the message content has been read.
+        An error is raised if the line reports an invalid project.
+        :param line:
+        :return:
+        """
+        if PolarionImportJob.PROJECT_ERROR in line:
+            raise Exception('Error getting import job data from Polarion: %s' % line)
+        if self.started:
+            self.message_lines.append(line.replace("&#034;", "\""))
+            if line.startswith("}"):
+                self.started = False
+                self.message_complete = True
+        elif self.MESSAGE_MARKER in line and not self.message_complete:
+            self.started = True
+        elif PolarionImportJob.FINISHED_MARKER in line:
+            self.import_ended = True
+        return self.message_complete
+
+    @property
+    def message(self) -> dict:
+        """
+        Returns the parsed message content. An error is raised if no (complete) message content
+        has been read.
+        :return:
+        """
+        if not self.message_complete:
+            raise Exception('No message content found in the import job log')
+        return json.loads("".join(self.message_lines))
+
+
+class PolarionImportJob(object):
+    """
+    Import job (log url) created by Polarion for a submitted test case XML file.
+    The job log is read incrementally: each poll only requests the bytes appended
+    since the previous one (HTTP Range).
+    """
+
+    # Written to the job log once the import has been completed (or rolled back)
+    FINISHED_MARKER = "Ending import of test cases to Polarion"
+    # Written to the job log when the submitted project is not valid
+    PROJECT_ERROR = "Project id not specified or invalid"
+
+    def __init__(self, url: str, testcases: list):
+        self.url = url
+        self.testcases = testcases
+        self.attempts = 0
+        self.interval = 0
+        # Log bytes consumed so far and incomplete trailing line
+        self.offset = 0
+        self.partial_line = b''
+        self.parser = PolarionJobLogParser()
+        # Populated once finished (result is set once the log has been parsed)
+        self.finished = False
+        self.result = None
+        self.error = None
+
+    def reset(self):
+        """
+        Restarts reading the log from the beginning.
+        :return:
+        """
+        self.offset = 0
+        self.partial_line = b''
+        self.parser = PolarionJobLogParser()
+
+    def feed(self, data: bytes) -> bool:
+        """
+        Parses the given log bytes (appended to the previously fed ones), returning
+        True as soon as the message content has been read.
+        :param data:
+        :return:
+        """
+        lines = (self.partial_line + data).split(b'\n')
+        self.partial_line = lines.pop()
+        for line in lines:
+            if self.parser.feed(line.rstrip(b'\r').decode('utf-8', errors='replace')):
+                return True
+        return False
+
+    def ended(self) -> bool:
+        """
+        Whether the log read so far shows that the import has ended (the
+        last line is parsed as well, as no more data is expected then).
+        :return:
+        """
+        if not self.parser.import_ended and PolarionImportJob.FINISHED_MARKER.encode('utf-8') in self.partial_line \
+                or PolarionImportJob.PROJECT_ERROR.encode('utf-8') in self.partial_line:
+            self.parser.feed(self.partial_line.decode('utf-8', errors='replace'))
+            self.partial_line = b''
+        return self.parser.import_ended
+
+    @property
+    def message(self) -> dict:
+        """
+        Returns the message content (UMB message reply) of the finished job. An error is raised
+        if the import ended without replying it (i.e: rolled back or failed before the reply).
+        :return:
+        """
+        if not self.parser.message_complete:
+            raise Exception('Polarion Import error for %s: import ended without a message content' % self.url)
+        return self.parser.message
+
+    def __str__(self):
+        return "%s (%d test cases)" % (self.url, len(self.testcases))
+
+
+class PolarionJobPoller(object):
+    """
+    Polls many import jobs at once, delivering each job as soon as it finishes.
+    Each job is first polled right away, then at growing intervals (up to a cap),
+    until it finishes or the overall deadline is reached.
+    """
+
+    # Growth of the interval between polls of the same job
+    BACKOFF_MULTIPLIER = 1.5
+    # Bytes read at a time from the job log
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, session: 'Session', config: PolarionConfig):
+        self.session = session
+        self.initial_interval = config.job_poll_interval()
+        self.max_interval = config.job_poll_max_interval()
+        self.timeout = config.job_poll_timeout()
+        self.concurrency = config.job_poll_concurrency()
+
+    def poll(self, jobs: Iterable[PolarionImportJob]) -> Iterator[PolarionImportJob]:
+        """
+        Yields the given jobs as they finish (or fail). Jobs that have not finished
+        within the configured timeout are yielded with an error.
+        :param jobs:
+        :return:
+        """
+        deadline = time.monotonic() + self.timeout
+        sequence = itertools.count()
+        # Jobs waiting for their next poll, ordered by due time
+        scheduled = [(time.monotonic(), next(sequence), job) for job in jobs]
+        heapq.heapify(scheduled)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while scheduled or running:
+                now = time.monotonic()
+                while scheduled and scheduled[0][0] <= now and len(running) < self.concurrency:
+                    job = heapq.heappop(scheduled)[2]
+                    running[executor.submit(self.check, job)] = job
+
+                # Wakes up when a poll completes or when the next job is due
+                wait_time = None
+                if scheduled and len(running) < self.concurrency:
+                    wait_time = max(0, scheduled[0][0] - now)
+                if not running:
+                    time.sleep(wait_time)
+                    continue
+                done, _ = wait(running, timeout=wait_time, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    job = running.pop(future)
+                    if job.finished or job.error:
+                        yield job
+                    elif time.monotonic() >= deadline:
+                        job.error = Exception("Timed out waiting for import job %s after %d attempts"
+                                              % (job.url, job.attempts))
+                        yield job
+                    else:
+                        job.interval = min(self.max_interval, max(self.initial_interval,
+                                                                  job.interval * self.BACKOFF_MULTIPLIER))
+                        LOGGER.debug("Import job not yet finished: %s - attempt %d, next poll in %.1fs"
+                                     % (job.url, job.attempts, job.interval))
+                        heapq.heappush(scheduled, (time.monotonic() + job.interval, next(sequence), job))
+
+    @METRICS.timed('import_poll')
+    def check(self, job: PolarionImportJob) -> PolarionImportJob:
+        """
+        Reads the job log appended since the previous check, line by line, flagging the job
+        as finished (or failed) as soon as the message content has been read (the rest of
+        the log is not downloaded).
+        :param job:
+        :return:
+        """
+        job.attempts += 1
+        headers = {'Range': 'bytes=%d-' % job.offset} if job.offset else {}
+        try:
+            with self.session.get(job.url, headers=headers, stream=True) as response:
+                if job.offset and response.status_code == 416:
+                    # Nothing has been appended since the previous check
+                    return job
+                if response.status_code not in (200, 206):
+                    raise Exception('Error getting import job data from Polarion: %s' % response.content)
+                if response.status_code == 200 and job.offset:
+                    # Range not supported by the server, so the whole log is read again
+                    job.reset()
+                # An invalid project is reported by the parser, as complete lines are fed to it
+                for data in response.iter_content(chunk_size=PolarionJobPoller.READ_SIZE):
+                    job.offset += len(data)
+                    if job.feed(data):
+                        job.finished = True
+                        break
+                else:
+                    # Import ended without (or before) a message content: nothing else to wait for
+                    job.finished = job.ended()
+        except Exception as ex:
+            LOGGER.error("Error getting response from import job %s: %s" % (job.url, ex))
+            job.error = ex
+        return job
@@ -0,0 +1,80 @@
+"""
+Outcome of importing test cases into Polarion, as reported by the import jobs.
+"""
+
+
+class PolarionImportedTestCase(object):
+    """
+    Import outcome of a single test case.
+    """
+
+    def __init__(self, testcase_id: str, status: str, work_item_id: str = None, work_item_url: str = None):
+        self.testcase_id = testcase_id
+        self.status = status
+        self.work_item_id = work_item_id
+        self.work_item_url = work_item_url
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "passed"
+
+    def __str__(self):
+        return "%s (%s: %s)" % (self.testcase_id, self.status, self.work_item_id)
+
+
+class PolarionImportResult(object):
+    """
+    Test cases submitted through an import job, along with the import outcome of
+    each one (indexed by test case id) once the job has been parsed.
+    """
+
+    def __init__(self, job_url: str, testcases: list):
+        self.job_url = job_url
+        self.testcases = testcases
+        # Populated once the import job has been parsed
+        self.status = None
+        self.imported = {}
+
+    def add(self, imported: PolarionImportedTestCase):
+        self.imported[imported.testcase_id] = imported
+
+    def get(self, testcase_id: str) -> PolarionImportedTestCase:
+        """
+        Returns the import outcome of the given test case (None if not reported).
+        :param testcase_id:
+        :return:
+        """
+        return self.imported.get(testcase_id)
+
+    def work_item_url(self, testcase_id: str) -> str:
+        """
+        Returns the url of the work item the given test case has been imported as (if any).
+        :param testcase_id:
+        :return:
+        """
+        imported = self.imported.get(testcase_id)
+        return imported.work_item_url if imported else None
+
+    @staticmethod
+    def merge(results: list) -> 'PolarionImportResult':
+        """
+        Returns a single import result holding the test cases and import outcomes of all given ones.
+        :param results:
+        :return:
+        """
+        merged = PolarionImportResult(None, [tc for result in results for tc in result.testcases])
+        for result in results:
+            merged.imported.update(result.imported)
+        return merged
+
+    @property
+    def failed(self) -> list:
+        """
+        Returns the test cases that have been reported as not imported.
+        :return:
+        """
+        return [imported for imported in self.imported.values() if not imported.passed]
+
+    def __str__(self):
+        return "%s (%d test cases, %d imported)" % (self.job_url, len(self.testcases),
+                                                    len(self.imported) - len(self.failed))
@@ -0,0 +1,257 @@
+"""
+Local stand-in for the Polarion test case importer, used to exercise and benchmark
+the PolarionReporter without a production Polarion instance.
+
+It accepts test case XML files (multipart upload), answers with the import job ids
+and serves the import job logs, which only show the import result (message content)
+after a configurable delay. A configurable ratio of the jobs fail.
+Test run (xunit) files are accepted as well, recording the results of each test run.
+
+Usage:
+    python -m fmfexporter.adapters.polarion.utils.polarion_importer_stub --port 8080 --delay 2
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+import xml.etree.ElementTree as etree
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from fmfexporter.adapters.polarion.utils.polarion_import_job import PolarionImportJob, PolarionJobLogParser
+
+
+class PolarionImporterStub(object):
+    """
+    Threaded HTTP server mimicking the test case importer endpoints:
+    - POST <path>: multipart test case XML upload, returns the job ids
+    - GET <path>-log?jobId=<id>: import job log (supports HTTP Range)
+    - POST <xunit path>: multipart test run XML upload, returns the job ids
+    """
+
+    TEST_CASE_PATH = '/polarion/import/testcase'
+    XUNIT_PATH = '/polarion/import/xunit'
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, delay: float = 0, failure_rate: float = 0,
+                 seed: int = None):
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.jobs = {}
+        # Results (testcase elements) received by test run id
+        self.test_runs = {}
+        self.stats = PolarionImporterStubStats()
+        self._job_ids = itertools.count(1)
+        self._work_item_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), PolarionImporterStubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def test_case_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d%s" % (host, port, PolarionImporterStub.TEST_CASE_PATH)
+
+    @property
+    def xunit_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d%s" % (host, port, PolarionImporterStub.XUNIT_PATH)
+
+    def start(self):
+        """
+        Starts serving requests on a background thread.
+        :return:
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def new_job(self, xml: bytes) -> int:
+        """
+        Creates an import job for the given test case XML file.
+        :param xml:
+        :return: job id
+        """
+        root = etree.fromstring(xml)
+        project = root.get('project-id')
+        testcase_ids = [tc.get('id') for tc in root.iter('testcase')]
+        with self._lock:
+            job_id = next(self._job_ids)
+            failed = self.random.random() < self.failure_rate
+            work_item_ids = ["%s-%d" % (project, next(self._work_item_ids)) for _ in testcase_ids]
+        self.jobs[job_id] = PolarionImporterStubJob(job_id, testcase_ids, work_item_ids, failed,
+                                                    time.monotonic() + self.delay)
+        return job_id
+
+
+    def new_test_run_job(self, xml: bytes) -> int:
+        """
+        Records the results of the given test run XML file.
+        :param xml:
+        :return: job id
+        """
+        root = etree.fromstring(xml)
+        properties = {prop.get('name'): prop.get('value') for prop in root.findall('properties/property')}
+        test_run_id = properties.get('polarion-testrun-id')
+        results = list(root.iter('testcase'))
+        with self._lock:
+            self.test_runs.setdefault(test_run_id, []).extend(results)
+            return next(self._job_ids)
+
+
+class PolarionImporterStubJob(object):
+    """
+    Import job created by the stub, whose log is complete once the delay has elapsed.
+    """
+
+    def __init__(self, job_id: int, testcase_ids: list, work_item_ids: list, failed: bool, ready_at: float):
+        self.job_id = job_id
+        self.testcase_ids = testcase_ids
+        self.work_item_ids = work_item_ids
+        self.failed = failed
+        self.ready_at = ready_at
+        self.finished_at = None
+
+    @property
+    def ready(self) -> bool:
+        return time.monotonic() >= self.ready_at
+
+    def log(self) -> bytes:
+        """
+        Returns the job log available so far (earlier content never changes, as in Polarion).
+        :return:
+        """
+        log = "Starting import of test cases to Polarion (job %d)\n" % self.job_id
+        if not self.ready:
+            return log.encode('utf-8')
+
+        status = "failed" if self.failed else "passed"
+        message = {'status': status, 'job-id': self.job_id,
+                   'import-testcases': [{'name': name, 'id': wi_id, 'status': status}
+                                        for name, wi_id in zip(self.testcase_ids, self.work_item_ids)]}
+        # Polarion logs are served with escaped quotes
+        log += "%s\n%s\n" % (PolarionJobLogParser.MESSAGE_MARKER,
+                             json.dumps(message, indent=1).replace('"', '&#034;'))
+        log += "%s\n" % PolarionImportJob.FINISHED_MARKER
+        return log.encode('utf-8')
+
+
+class PolarionImporterStubStats(object):
+    """
+    Request counters and latencies (in seconds) recorded by the stub.
+    """
+
+    def __init__(self):
+        self.uploads = []
+        self.polls = 0
+        self.log_bytes = 0
+        # Time between a job becoming ready and its finished log being served
+        self.detection_lags = []
+        self._lock = threading.Lock()
+
+    def record_upload(self, elapsed: float):
+        with self._lock:
+            self.uploads.append(elapsed)
+
+    def record_poll(self, job: PolarionImporterStubJob, log_bytes: int):
+        with self._lock:
+            self.polls += 1
+            self.log_bytes += log_bytes
+            if job.ready and job.finished_at is None:
+                job.finished_at = time.monotonic()
+                self.detection_lags.append(job.finished_at - job.ready_at)
+
+
+class PolarionImporterStubHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests sent to the PolarionImporterStub.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def stub(self) -> PolarionImporterStub:
+        return self.server.stub
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        start = time.monotonic()
+        path = urlparse(self.path).path
+        if path not in (PolarionImporterStub.TEST_CASE_PATH, PolarionImporterStub.XUNIT_PATH):
+            return self._reply(404, b'Not found')
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        message = BytesParser().parsebytes(b"Content-Type: " + self.headers['Content-Type'].encode('utf-8') +
+                                           b"\r\n\r\n" + body)
+        files = {part.get_filename(): part.get_payload(decode=True) for part in message.get_payload()
+                 if part.get_filename()}
+        if not files:
+            return self._reply(400, b'No file uploaded')
+
+        response = {'files': {}}
+        new_job = self.stub.new_job if path == PolarionImporterStub.TEST_CASE_PATH else self.stub.new_test_run_job
+        for name, xml in files.items():
+            response['files'][name] = {'job-ids': [new_job(xml)]}
+        self._reply(200, json.dumps(response).encode('utf-8'), 'application/json')
+        self.stub.stats.record_upload(time.monotonic() - start)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        job_ids = parse_qs(url.query).get('jobId')
+        job = self.stub.jobs.get(int(job_ids[0])) if job_ids and job_ids[0].isdigit() else None
+        if url.path != PolarionImporterStub.TEST_CASE_PATH + '-log' or job is None:
+            return self._reply(404, b'Not found')
+
+        log = job.log()
+        status = 200
+        byte_range = self.headers.get('Range')
+        if byte_range and byte_range.startswith('bytes=') and byte_range.endswith('-'):
+            offset = int(byte_range[6:-1])
+            if offset >= len(log):
+                self.stub.stats.record_poll(job, 0)
+                return self._reply(416, b'')
+            log = log[offset:]
+            status = 206
+        self.stub.stats.record_poll(job, len(log))
+        self._reply(status, log, 'text/plain; charset=utf-8')
+
+    def _reply(self, status: int, content: bytes, content_type: str = 'text/plain'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for the Polarion test case importer")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delay", type=float, default=0, help="Seconds until import jobs finish")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Ratio of failed import jobs (0-1)")
+    parser.add_argument("--seed", type=int, help="Seed used to decide which jobs fail")
+    args = parser.parse_args()
+
+    stub = PolarionImporterStub(args.host, args.port, args.delay, args.failure_rate, args.seed)
+    print("Test case importer url: %s" % stub.test_case_url)
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
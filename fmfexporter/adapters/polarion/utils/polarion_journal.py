@@ -0,0 +1,105 @@
+"""
+Keeps track of the import jobs created by asynchronous submissions, so that
+their results can be collected later on (by a separate execution).
+"""
+import json
+import logging
+import os
+from typing import List
+
+from fmfexporter.adapters.polarion.polarion_test_case import PolarionTestCase
+from fmfexporter.adapters.polarion.utils.polarion_import_job import PolarionImportJob
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult
+from fmfexporter.adapters.polarion.utils.polarion_state import PolarionExportState
+from fmfexporter.fmf_testcase import FMFTestCaseRelationship
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PolarionJobJournal(object):
+    """
+    Local journal file holding the pending import jobs, each one with the ids of the
+    test cases it imports (and the data needed to populate Jira once imported).
+    """
+    JOURNAL_VERSION = 1
+
+    def __init__(self, journal_file: str):
+        self.journal_file = journal_file
+        self.jobs = {}
+        self.load()
+
+    def add(self, result: PolarionImportResult, fingerprints: bool = False):
+        """
+        Records the import job of the given (submitted) result as pending.
+        :param result:
+        :param fingerprints: whether the fingerprint of each test case is recorded too (see --incremental)
+        :return:
+        """
+        entries = []
+        for tc in result.testcases:
+            entry = {'id': tc.id, 'project': tc.project, 'defects': tc.defects}
+            if fingerprints:
+                entry['fingerprint'] = PolarionExportState.fingerprint(tc)
+            entries.append(entry)
+        self.jobs[result.job_url] = entries
+
+    def remove(self, job_url: str):
+        """
+        Removes the given import job, once its results have been collected.
+        :param job_url:
+        :return:
+        """
+        self.jobs.pop(job_url, None)
+
+    def fingerprints(self, job_url: str) -> dict:
+        """
+        Returns the recorded fingerprints (by test case id) of the test cases imported by the given job.
+        :param job_url:
+        :return:
+        """
+        return {entry['id']: entry['fingerprint'] for entry in self.jobs.get(job_url, []) if 'fingerprint' in entry}
+
+    def pending_jobs(self) -> List[PolarionImportJob]:
+        """
+        Returns the pending import jobs, along with the test cases they import.
+        :return:
+        """
+        return [PolarionImportJob(url, [PolarionJobJournal.to_testcase(entry) for entry in testcases])
+                for url, testcases in self.jobs.items()]
+
+    @staticmethod
+    def to_testcase(entry: dict) -> PolarionTestCase:
+        """
+        Creates a PolarionTestCase holding the journaled attributes of a submitted test case.
+        :param entry:
+        :return:
+        """
+        tc = PolarionTestCase()
+        tc.id = entry['id']
+        tc.project = entry['project']
+        tc.defects = [FMFTestCaseRelationship(defect) for defect in entry['defects']]
+        return tc
+
+    def load(self):
+        """
+        Loads the journal file (if it exists).
+        :return:
+        """
+        if not os.path.isfile(self.journal_file):
+            return
+        with open(self.journal_file, 'r') as journal:
+            content = json.load(journal)
+        if content.get('version') != PolarionJobJournal.JOURNAL_VERSION:
+            raise ValueError("Incompatible journal file: %s" % self.journal_file)
+        self.jobs = content.get('jobs', {})
+
+    def save(self):
+        """
+        Writes the journal file atomically.
+        :return:
+        """
+        tmp_file = "%s.tmp" % self.journal_file
+        with open(tmp_file, 'w') as journal:
+            json.dump({'version': PolarionJobJournal.JOURNAL_VERSION, 'jobs': self.jobs},
+                      journal, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.journal_file)
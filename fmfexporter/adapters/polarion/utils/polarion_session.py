@@ -0,0 +1,86 @@
+"""
+HTTP session used to communicate with the Polarion importer APIs.
+"""
+import random
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+from fmfexporter.adapters.polarion.utils.polarion_config import PolarionConfig
+from fmfexporter.metrics import METRICS
+
+# Certificates are not verified (see PolarionSession)
+urllib3.disable_warnings()
+
+
+class JitteredRetry(Retry):
+    """
+    Retry policy that spreads the exponential backoff randomly (full jitter),
+    so concurrent clients do not retry in lockstep.
+    """
+
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super(JitteredRetry, self).get_backoff_time())
+
+
+class PolarionSession(requests.Session):
+    """
+    Pooled (keep-alive) and authenticated HTTP session, that retries requests
+    failing with connection errors or 5xx responses and applies a default timeout.
+    Pool size, timeout and retry settings are read from the [polarion] config section.
+    """
+
+    # Server side errors that are worth retrying
+    RETRY_STATUSES = [500, 502, 503, 504]
+
+    # Attributes kept when the session is pickled (i.e. sent to worker processes)
+    __attrs__ = requests.Session.__attrs__ + ['timeout']
+
+    def __init__(self, config: PolarionConfig):
+        super(PolarionSession, self).__init__()
+        self.auth = HTTPBasicAuth(config.username(), config.password())
+        self.verify = False
+        self.timeout = config.http_timeout()
+
+        # Test case imports are idempotent (test cases are looked up), so POST is retried as well
+        retry = JitteredRetry(total=config.http_retries(),
+                              status_forcelist=PolarionSession.RETRY_STATUSES,
+                              allowed_methods=None,
+                              backoff_factor=config.http_retry_backoff(),
+                              raise_on_status=False)
+        # Enough connections for all concurrent submissions to be kept alive
+        pool_size = max(config.http_pool_size(), config.submit_concurrency(), config.chunk_concurrency(),
+                        config.job_poll_concurrency())
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super(PolarionSession, self).request(method, url, *args, **kwargs)
+
+    def send(self, request, **kwargs):
+        """
+        Sends the prepared request, recording its latency (as an http_<method> phase),
+        the bytes sent and received and the retries made.
+        """
+        with METRICS.phase('http_%s' % request.method.lower()):
+            response = super(PolarionSession, self).send(request, **kwargs)
+
+        body = request.body
+        if isinstance(body, str):
+            # Bytes are counted, not characters
+            body = body.encode('utf-8')
+        METRICS.increment('http_bytes_sent', len(body) if isinstance(body, bytes) else 0)
+        # Streamed responses are not read here
+        received = response.headers.get('Content-Length') if kwargs.get('stream') else len(response.content)
+        METRICS.increment('http_bytes_received', int(received or 0))
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None and retries.history:
+            METRICS.increment('http_retries', len(retries.history))
+        return response
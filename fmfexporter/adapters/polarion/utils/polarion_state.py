@@ -0,0 +1,116 @@
+"""
+Keeps track of the test cases successfully submitted to Polarion, so that
+incremental exports only submit new or changed test cases.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Iterable, Iterator
+
+from fmfexporter.adapters.polarion.polarion_test_case import PolarionTestCase
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PolarionExportState(object):
+    """
+    Local state file holding a content fingerprint for each test case
+    imported by the last successful submission.
+    """
+    STATE_VERSION = 1
+
+    # Attributes that are either derived while rendering the XML or
+    # populated after submission, so they must not affect the fingerprint
+    EXCLUDED_ATTRIBUTES = ['status', 'test_case_work_item_url']
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.fingerprints = {}
+        self.load()
+
+    @staticmethod
+    def fingerprint(testcase: PolarionTestCase) -> str:
+        """
+        Returns a hash of the normalized test case content.
+        :param testcase:
+        :return:
+        """
+        content = {k: v for k, v in testcase.__dict__.items() if k not in PolarionExportState.EXCLUDED_ATTRIBUTES}
+        normalized = json.dumps(content, sort_keys=True, default=lambda o: getattr(o, '__dict__', str(o)))
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def is_changed(self, testcase: PolarionTestCase) -> bool:
+        """
+        Whether the given test case is new or has changed since it has been last submitted.
+        :param testcase:
+        :return:
+        """
+        return self.fingerprints.get(testcase.id) != self.fingerprint(testcase)
+
+    def filter_changed(self, testcases: Iterable[PolarionTestCase]) -> Iterator[PolarionTestCase]:
+        """
+        Yields only the new or changed test cases from the given ones.
+        :param testcases:
+        :return:
+        """
+        for tc in testcases:
+            if self.is_changed(tc):
+                yield tc
+            else:
+                LOGGER.info("Skipping unchanged test case: %s" % tc.id)
+
+    def update(self, testcases: list, import_result: PolarionImportResult = None):
+        """
+        Records the given test cases. When an import result is given, only the test cases
+        it reports as successfully imported are recorded.
+        :param testcases:
+        :param import_result:
+        :return:
+        """
+        for tc in testcases:
+            if import_result is None or PolarionExportState.is_imported(tc.id, import_result):
+                self.fingerprints[tc.id] = self.fingerprint(tc)
+
+    def update_fingerprints(self, fingerprints: dict, import_result: PolarionImportResult):
+        """
+        Records the given fingerprints (by test case id) of the test cases reported as
+        successfully imported by the given import result (i.e: collected import jobs).
+        :param fingerprints:
+        :param import_result:
+        :return:
+        """
+        for testcase_id, fingerprint in fingerprints.items():
+            if PolarionExportState.is_imported(testcase_id, import_result):
+                self.fingerprints[testcase_id] = fingerprint
+
+    @staticmethod
+    def is_imported(testcase_id: str, import_result: PolarionImportResult) -> bool:
+        imported = import_result.get(testcase_id)
+        return imported is not None and imported.passed
+
+    def load(self):
+        """
+        Loads the state file (if it exists).
+        :return:
+        """
+        if not os.path.isfile(self.state_file):
+            return
+        with open(self.state_file, 'r') as state:
+            content = json.load(state)
+        if content.get('version') != PolarionExportState.STATE_VERSION:
+            LOGGER.warning("Ignoring incompatible state file: %s" % self.state_file)
+            return
+        self.fingerprints = content.get('testcases', {})
+
+    def save(self):
+        """
+        Writes the state file atomically.
+        :return:
+        """
+        tmp_file = "%s.tmp" % self.state_file
+        with open(tmp_file, 'w') as state:
+            json.dump({'version': PolarionExportState.STATE_VERSION, 'testcases': self.fingerprints},
+                      state, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.state_file)
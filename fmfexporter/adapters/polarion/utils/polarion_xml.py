@@ -127,3 +127,25 @@ class PolarionXmlUtils(object):
         sub_elem = etree.SubElement(parent, 'hyperlink')
         sub_elem.set('role-id', role_id)
         sub_elem.set('uri', uri_link)
+
+    @staticmethod
+    def indent(element: etree.Element, space: str = '\t', level: int = 0) -> None:
+        """
+        Indents the given element (and its descendants) in place, adding
+        new lines and the given space for each level through text and tail.
+        The tail of the element itself is not changed, neither is mixed content
+        (elements with text and children, like test step parameters).
+        :param element:
+        :param space:
+        :param level:
+        :return:
+        """
+        if not len(element) or (element.text and element.text.strip()):
+            return
+        child_indent = "\n" + space * (level + 1)
+        element.text = child_indent
+        for child in element:
+            PolarionXmlUtils.indent(child, space, level + 1)
+            if not child.tail or not child.tail.strip():
+                child.tail = child_indent
+        child.tail = "\n" + space * level
@@ -1,10 +1,11 @@
 import argparse
 import sys
 
-import fmf
-
 from fmfexporter.fmf_adapter import FMFAdapter
-from fmfexporter.adapters import *
+from fmfexporter.fmf_query import FMFQueryIndex
+from fmfexporter.metrics import METRICS
+# Registers the available adapters
+import fmfexporter.adapters
 
 """
 Common arguments for the fmfexporter tool.
@@ -30,6 +31,16 @@ class FMFExporterArgParser(object):
             "test cases")
         self._parser.add_argument(
             "--tc", action="append", help="FMF Test Case filter (by name)")
+        self._parser.add_argument(
+            "--query", help="FMF Test Case attribute query, i.e: "
+            "'importance=critical and components=router and (tags=TAG1 or not level=component)'. "
+            "Supported keys: %s, adapter.<adapter>.<key>" % ", ".join(FMFQueryIndex.KEYS))
+        self._parser.add_argument(
+            "--limit", type=int, help="Maximum number of test cases to export")
+        self._parser.add_argument(
+            "--cache-file", dest='cache_file',
+            help="Cache file used to store the parsed FMF Tree (only modified "
+            "metadata files are parsed on subsequent runs)")
         self._parser.add_argument(
             "--log-level", choices=['WARNING', 'INFO', 'DEBUG'], default='INFO',
             # action='store_true', dest='log_level',
@@ -37,12 +48,19 @@ class FMFExporterArgParser(object):
         self._parser.add_argument(
             "--show-scheme", action='store_true', dest='show_scheme',
             help="Show metadata scheme")
+        self._parser.add_argument(
+            "--profile", action='store_true',
+            help="Print the time spent per phase (and other counters) when done")
+        self._parser.add_argument(
+            "--metrics-file", dest='metrics_file',
+            help="Write the time spent per phase (and other counters) to the given file, "
+            "as JSON if it ends with .json, or in the Prometheus textfile format otherwise")
 
         # Sub-commands from available adapters
         sp = self._parser.add_subparsers(title='Adapter', help='Adapter help', dest='adapter')
         for adapter in adapters:
             parser = sp.add_parser(adapter, add_help=True)
-            FMFAdapter.get_adapter_class(adapter).get_args_parser().add_arguments(parser)
+            FMFAdapter.get_adapter_args_parser(adapter).add_arguments(parser)
 
         self._parsed_args = None
         self._adapter = None
@@ -57,13 +75,18 @@ class FMFExporterArgParser(object):
         """
         self._parsed_args = self._parser.parse_args(args, namespace)
 
+        # Phases are only timed when reported
+        METRICS.enabled = bool(self._parsed_args.profile or self._parsed_args.metrics_file)
+
         # Give a change for adapter's arg parser
-        adapter_parser = FMFAdapter.get_adapter_class(self.parsed_args.adapter).get_args_parser()
+        adapter_parser = FMFAdapter.get_adapter_args_parser(self.parsed_args.adapter)
         adapter_parser.parse_arguments(self._parsed_args)
 
         # Validate if parsed arguments are ok
+        import fmf.utils
         try:
-            self._adapter = FMFAdapter.get_adapter(self._parsed_args.adapter, self._parsed_args.path)
+            self._adapter = FMFAdapter.get_adapter(self._parsed_args.adapter, self._parsed_args.path,
+                                                   self._parsed_args.cache_file)
         except fmf.utils.FileError:
             print("Invalid FMF Tree path: %s" % self._parsed_args.path)
             sys.exit(1)
@@ -1,12 +1,15 @@
 import abc
+import importlib
 import os
 import re
 import logging
 import argparse
-import fmf
-from typing import List
+from typing import List, Tuple, Dict, Iterator
 
+from fmfexporter.fmf_query import FMFQueryIndex
 from fmfexporter.fmf_testcase import FMFTestCase
+from fmfexporter.metrics import METRICS
+from fmfexporter.parallel import parallel_map
 
 
 """
@@ -44,6 +47,54 @@ class FMFAdapterArgParser(abc.ABC, object):
         raise NotImplementedError()
 
 
+class FMFAdapterRegistry(object):
+    """
+    Lightweight registry of the available adapters. It only holds where each adapter
+    and its argument parser are defined, so that an adapter (and its dependencies)
+    is only imported when it is actually used.
+    """
+
+    # adapter id -> (adapter class path, argument parser class path)
+    _adapters = {}
+
+    @staticmethod
+    def register(adapter_id: str, adapter_class: str, args_parser_class: str):
+        """
+        Registers an adapter, given its classes as "module:ClassName" paths.
+        :param adapter_id:
+        :param adapter_class:
+        :param args_parser_class:
+        :return:
+        """
+        FMFAdapterRegistry._adapters[adapter_id] = (adapter_class, args_parser_class)
+
+    @staticmethod
+    def adapter_ids() -> list:
+        return list(FMFAdapterRegistry._adapters)
+
+    @staticmethod
+    def load(class_path: str):
+        """
+        Imports and returns the class from the given "module:ClassName" path.
+        :param class_path:
+        :return:
+        """
+        module_name, class_name = class_path.split(':')
+        return getattr(importlib.import_module(module_name), class_name)
+
+    @staticmethod
+    def get_adapter_class(adapter_id: str):
+        if adapter_id not in FMFAdapterRegistry._adapters:
+            return None
+        return FMFAdapterRegistry.load(FMFAdapterRegistry._adapters[adapter_id][0])
+
+    @staticmethod
+    def get_args_parser(adapter_id: str) -> FMFAdapterArgParser:
+        if adapter_id not in FMFAdapterRegistry._adapters:
+            return None
+        return FMFAdapterRegistry.load(FMFAdapterRegistry._adapters[adapter_id][1])()
+
+
 class FMFAdapter(abc.ABC, object):
     """
     Abstract FMF Adapter class that defines the generic behaviors and
@@ -51,9 +102,20 @@ class FMFAdapter(abc.ABC, object):
     FMF Adapter implementations.
     """
 
-    def __init__(self, fmf_tree_path: str = '.'):
+    def __init__(self, fmf_tree_path: str = '.', cache_file: str = None):
         self._cur_path = os.path.abspath(fmf_tree_path)
-        self._tree = fmf.Tree(self._cur_path)
+        # When a cache file is provided, unchanged metadata files are not parsed again
+        with METRICS.phase('tree_load'):
+            if cache_file:
+                from fmfexporter.fmf_cache import FMFTreeCache
+                self._tree = FMFTreeCache(cache_file).load(self._cur_path)
+            else:
+                import fmf
+                self._tree = fmf.Tree(self._cur_path)
+        # Index of tree nodes by name (built on first lookup)
+        self._node_index = None
+        # Attribute indexes used by queries (built on first query)
+        self._query_index = None
 
     @staticmethod
     @abc.abstractmethod
@@ -105,50 +167,84 @@ class FMFAdapter(abc.ABC, object):
         """
         raise NotImplementedError()
 
+    def run_command(self) -> bool:
+        """
+        Hook method used by adapters to run a command that does not export test cases
+        (i.e: collecting the results of previous submissions).
+        :return: True if a command has been run (so no test cases are exported)
+        """
+        return False
+
     @staticmethod
-    def get_adapter(adapter_id: str, fmf_tree_path: str):
+    def get_adapter(adapter_id: str, fmf_tree_path: str, cache_file: str = None):
         """
         Returns an instance of an adapter based on its unique ID.
         The fmf_tree_path is also mandatory in the initialization.
         :param adapter_id:
         :param fmf_tree_path:
+        :param cache_file: optional FMF Tree cache file
         :return:
         """
         adapter_class = FMFAdapter.get_adapter_class(adapter_id)
-        return adapter_class(fmf_tree_path)
+        return adapter_class(fmf_tree_path, cache_file)
 
     @staticmethod
     def get_adapter_class(adapter_id: str):
         """
         Returns the concrete FMFAdapter class based on the unique ID.
+        Registered adapters (see FMFAdapterRegistry) are imported on demand.
         :param adapter_id:
         :return:
         """
+        adapter_class = FMFAdapterRegistry.get_adapter_class(adapter_id)
+        if adapter_class:
+            return adapter_class
         for sc in FMFAdapter.__subclasses__():
             if sc.adapter_id() == adapter_id:
                 return sc
         # Should not happen if invoked from arg parser
         raise ValueError("Invalid Adapter ID")
 
+    @staticmethod
+    def get_adapter_args_parser(adapter_id: str) -> FMFAdapterArgParser:
+        """
+        Returns the argument parser of the given adapter, without importing
+        the adapter itself when it is registered (see FMFAdapterRegistry).
+        :param adapter_id:
+        :return:
+        """
+        return FMFAdapterRegistry.get_args_parser(adapter_id) or \
+            FMFAdapter.get_adapter_class(adapter_id).get_args_parser()
+
     @staticmethod
     def get_available_adapters():
         """
-        Return adapter id of each subclass of FMFAdapter
+        Return adapter id of each registered adapter and subclass of FMFAdapter
         :return:
         """
-        return [sc.adapter_id() for sc in FMFAdapter.__subclasses__() if sc.adapter_id() != 'test']
+        adapters = FMFAdapterRegistry.adapter_ids()
+        return adapters + [sc.adapter_id() for sc in FMFAdapter.__subclasses__()
+                           if sc.adapter_id() not in adapters and sc.adapter_id() != 'test']
 
-    def convert_from_list(self, fmf_testcase_list: List[FMFTestCase]):
+    def convert_from_list(self, fmf_testcase_list: List[FMFTestCase], jobs: int = 1):
         """
         Convert list of FMFTestCase objects into a list of test cases
         based on Adapter's customized version of an FMFTestCase.
         :param fmf_testcase_list:
+        :param jobs: number of processes used to convert the test cases (order is preserved)
         :return: list
         """
-        tc_list = []
-        for tc in fmf_testcase_list:
-            tc_list.append(self.convert_from(tc))
-        return tc_list
+        return parallel_map(self.convert_from, fmf_testcase_list, jobs)
+
+    def __getstate__(self):
+        """
+        Adapters are sent to worker processes (see convert_from_list) without the FMF Tree
+        and its indexes, as conversions only depend on the given FMFTestCase.
+        :return:
+        """
+        state = self.__dict__.copy()
+        state.update(_tree=None, _node_index=None, _query_index=None)
+        return state
 
     @staticmethod
     def _get_name_in_tree(classname: str, testname: str):
@@ -175,12 +271,43 @@ class FMFAdapter(abc.ABC, object):
         :return:
         """
         name_in_tree = self._get_name_in_tree(classname, testname)
-        node = self._tree.find(name_in_tree)
+        node = self._get_node_index().get(name_in_tree)
         if node:
             return FMFTestCase.from_fmf_testcase_node(node)
 
         return None
 
+    def get_testcases(self, pairs: List[Tuple[str, str]]) -> Tuple[Dict[Tuple[str, str], FMFTestCase], list]:
+        """
+        Resolves many "classname.testname" pairs at once (see get_testcase).
+        Pairs resolving to the same node (i.e: parameterized tests) share the same FMFTestCase.
+        :param pairs: list of (classname, testname) tuples
+        :return: dict of matched (classname, testname) to FMFTestCase, and the list of unmatched pairs
+        """
+        index = self._get_node_index()
+        testcases = {}
+        converted = {}
+        unmatched = []
+        for classname, testname in pairs:
+            name_in_tree = self._get_name_in_tree(classname, testname)
+            if name_in_tree not in converted:
+                node = index.get(name_in_tree)
+                converted[name_in_tree] = FMFTestCase.from_fmf_testcase_node(node) if node else None
+            if converted[name_in_tree] is None:
+                unmatched.append((classname, testname))
+            else:
+                testcases[(classname, testname)] = converted[name_in_tree]
+        return testcases, unmatched
+
+    def _get_node_index(self) -> dict:
+        """
+        Returns the index of all nodes in the tree (keyed by name), building it once.
+        :return:
+        """
+        if self._node_index is None:
+            self._node_index = {node.name: node for node in self._tree.climb(whole=True)}
+        return self._node_index
+
     def get_testcases_matching(self, name: str):
         """
         Returns a list of FMFTestCase elements whose provided name argument
@@ -188,13 +315,75 @@ class FMFAdapter(abc.ABC, object):
         :param name:
         :return:
         """
-        nodes = []
+        return self.get_testcases_matching_any([name])
+
+    def get_testcases_matching_any(self, names: List[str]):
+        """
+        Returns a list of FMFTestCase elements whose "FMFTestCase.name" property
+        contains any of the provided names. The tree is walked only once and each
+        matching node is converted (and returned) just once, regardless of how
+        many names it matches.
+        :param names:
+        :return:
+        """
+        return list(self.iter_testcases(names))
+
+    def get_testcases_by_query(self, query: str, names: List[str] = None):
+        """
+        Returns a list of FMFTestCase elements matching the given attribute query
+        (see fmfexporter.fmf_query) and, optionally, containing any of the provided names.
+        Only the selected nodes are converted into FMFTestCase.
+        :param query:
+        :param names:
+        :return:
+        """
+        return list(self.iter_testcases(names, query))
 
-        for node in self._tree.climb():
-            if not name or name in node.name:
-                nodes.append(FMFTestCase.from_fmf_testcase_node(node))
+    def iter_testcases(self, names: List[str] = None, query: str = None,
+                       limit: int = None) -> Iterator[FMFTestCase]:
+        """
+        Generator that yields an FMFTestCase for each test case (node selected by
+        climb, i.e: leaves) in the tree containing any of the provided names and matching the optional attribute query.
+        Nodes are converted lazily, as they are consumed, and iteration stops once
+        limit test cases have been yielded.
+        :param names:
+        :param query:
+        :param limit:
+        :return:
+        """
+        if limit is not None and limit <= 0:
+            return
+        matcher = self._get_name_matcher(names)
+
+        if query is not None:
+            if self._query_index is None:
+                self._query_index = FMFQueryIndex(self._tree)
+            nodes = self._query_index.select(query)
+        else:
+            nodes = self._tree.climb()
+
+        count = 0
+        for node in nodes:
+            if matcher is not None and not matcher.search(node.name):
+                continue
+            yield FMFTestCase.from_fmf_testcase_node(node)
+            count += 1
+            if limit is not None and count >= limit:
+                return
 
-        return nodes
+    @staticmethod
+    def _get_name_matcher(names: List[str]):
+        """
+        Returns a regular expression matching any of the given names,
+        or None if all names must be matched.
+        :param names:
+        :return:
+        """
+        # An empty name matches everything
+        if not names or not all(names):
+            return None
+        # All names combined into a single (escaped) alternation
+        return re.compile('|'.join([re.escape(name) for name in sorted(set(names))]))
 
 
 class FMFAdapterTest(FMFAdapter):
@@ -0,0 +1,363 @@
+import hashlib
+import logging
+import os
+import pickle
+
+import fmf
+import fmf.utils
+from ruamel.yaml import YAML
+from ruamel.yaml.error import YAMLError
+
+"""
+Provides an on-disk cache for the FMF Tree, so that large trees do not
+need to be parsed (and have their inheritance resolved) on every run.
+"""
+
+LOGGER = logging.getLogger(__name__)
+
+# Same naming rules adopted by fmf while growing a tree from a directory
+SUFFIX = ".fmf"
+MAIN = "main" + SUFFIX
+
+
+class FMFCachedNode(object):
+    """
+    Lightweight node rebuilt from the resolved data stored in the cache.
+    It provides the subset of the fmf.Tree interface used by the adapters.
+    """
+
+    def __init__(self, name: str, data: dict, select: bool, parent=None):
+        self.name = name
+        self.data = data
+        self.parent = parent
+        self.children = {}
+        self._select = select
+
+    @property
+    def select(self) -> bool:
+        return self._select
+
+    def get(self, name=None, default=None):
+        if name is None:
+            return self.data
+        return self.data.get(name, default)
+
+    def climb(self, whole: bool = False, sort: bool = True):
+        """
+        Iterates through the nodes (by default leaf nodes only), just like fmf.Tree.climb().
+        :param whole:
+        :param sort:
+        :return:
+        """
+        if whole or self.select:
+            yield self
+        children = [child for _, child in sorted(self.children.items())] if sort else self.children.values()
+        for child in children:
+            for node in child.climb(whole=whole, sort=sort):
+                yield node
+
+    def find(self, name: str):
+        """
+        Find node with given name
+        :param name:
+        :return:
+        """
+        for node in self.climb(whole=True):
+            if node.name == name:
+                return node
+        return None
+
+
+class FMFTreeCache(object):
+    """
+    Persistent cache of an FMF Tree.
+
+    Every metadata file is fingerprinted by path, mtime and content hash.
+    When none of the files have changed, the tree is rebuilt straight from the
+    resolved node data, skipping both YAML parsing and inheritance resolution.
+    Otherwise only the modified files are parsed again and the tree is built
+    from the (cached + re-parsed) raw data.
+    """
+
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_file: str):
+        self.cache_file = os.path.abspath(cache_file)
+        # Number of metadata files parsed during last load (0 on a warm run)
+        self.parsed_files = 0
+
+    def load(self, fmf_tree_path: str):
+        """
+        Returns the FMF Tree for the given path, using the cache whenever possible.
+        The cache file is updated when the tree had to be (partially) parsed.
+        :param fmf_tree_path:
+        :return: fmf.Tree or FMFCachedNode (root node)
+        """
+        root = self._find_root(fmf_tree_path)
+        cached = self._read()
+        if cached.get('root') != root:
+            cached = {}
+        cached_files = cached.get('files', {})
+
+        self.parsed_files = 0
+        files = {}
+        layout = self._scan(root, root, self._explore_include(root), cached_files, files, [])
+
+        # Nothing has changed, use the resolved data as is
+        unchanged = all(not rec.get('changed') for rec in files.values())
+        if unchanged and cached.get('nodes') and set(files) == set(cached_files):
+            LOGGER.debug("FMF Tree loaded from cache: %s" % self.cache_file)
+            # Refresh mtime of touched (but not modified) files, so they are not hashed again
+            if any([rec.pop('touched', False) for rec in files.values()]):
+                cached['files'] = files
+                self._write(cached)
+            return self._build_cached_tree(cached['nodes'])
+
+        # Parse modified files only and let fmf resolve the inheritance
+        for relpath, rec in files.items():
+            rec.pop('touched', None)
+            if rec.pop('changed', False):
+                rec['data'] = self._parse(os.path.join(root, relpath), rec.pop('content'))
+                self.parsed_files += 1
+        LOGGER.debug("FMF Tree parsed files: %d/%d" % (self.parsed_files, len(files)))
+
+        # Raw data is stored in the cache before fmf updates it in place
+        serialized_files = pickle.dumps(files, pickle.HIGHEST_PROTOCOL)
+        # An empty directive is used for empty trees, as fmf rejects empty data
+        tree = fmf.Tree(self._assemble(layout, files) or {'/': {}})
+        nodes = [(node.name, node.data, node.select) for node in tree.climb(whole=True)]
+        self._write({
+            'version': FMFTreeCache.CACHE_VERSION,
+            'fmf': getattr(fmf, '__version__', ''),
+            'root': root,
+            'files': pickle.loads(serialized_files),
+            'nodes': nodes,
+        })
+        return tree
+
+    @staticmethod
+    def _find_root(path: str) -> str:
+        """
+        Locates the FMF Tree root (directory containing the .fmf directory).
+        Raises the same errors as fmf.Tree.
+        :param path:
+        :return:
+        """
+        root = os.path.abspath(path)
+        if not os.path.isdir(root):
+            raise fmf.utils.FileError("Invalid directory path: {0}".format(root))
+        while not os.path.isdir(os.path.join(root, ".fmf")):
+            if root == "/":
+                raise fmf.utils.RootError("Unable to find tree root for '{0}'.".format(os.path.abspath(path)))
+            root = os.path.dirname(root)
+        return root
+
+    @staticmethod
+    def _explore_include(root: str) -> list:
+        """
+        Returns the hidden file names that must be explored according to .fmf/config.
+        :param root:
+        :return:
+        """
+        config_path = os.path.join(root, ".fmf", "config")
+        if not os.path.isfile(config_path):
+            return []
+        with open(config_path, encoding='utf-8') as config_file:
+            config = YAML(typ="safe").load(config_file.read()) or {}
+        return config.get('explore', {}).get('include', [])
+
+    def _read(self) -> dict:
+        """
+        Reads the cache file, returning an empty dict if missing, stale or corrupted.
+        :return:
+        """
+        try:
+            with open(self.cache_file, 'rb') as cache:
+                cached = pickle.load(cache)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+            LOGGER.debug("FMF Tree cache not used: %s" % e)
+            return {}
+        if not isinstance(cached, dict) or cached.get('version') != FMFTreeCache.CACHE_VERSION \
+                or cached.get('fmf') != getattr(fmf, '__version__', ''):
+            return {}
+        return cached
+
+    def _write(self, content: dict):
+        """
+        Writes the cache file atomically.
+        :param content:
+        :return:
+        """
+        cache_dir = os.path.dirname(self.cache_file)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = "%s.%d.tmp" % (self.cache_file, os.getpid())
+        try:
+            with open(tmp_file, 'wb') as cache:
+                pickle.dump(content, cache, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            LOGGER.warning("Unable to write FMF Tree cache %s: %s" % (self.cache_file, e))
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def _scan(self, root: str, path: str, explore_include: list, cached_files: dict, files: dict,
+              symlink_dirs: list):
+        """
+        Walks through the given directory the same way fmf.Tree.grow() does,
+        fingerprinting each metadata file found.
+        Returns the directory layout: (metadata files, {sub directory: layout}).
+        :return:
+        """
+        try:
+            dirpath, dirnames, filenames = next(os.walk(path))
+        except StopIteration:
+            return [], {}
+
+        # main.fmf must come first (for correct inheritance)
+        filenames = sorted([f for f in filenames if f.endswith(SUFFIX)])
+        if MAIN in filenames:
+            filenames.insert(0, filenames.pop(filenames.index(MAIN)))
+
+        layout_files = []
+        for filename in filenames:
+            if filename.startswith(".") and filename not in explore_include:
+                continue
+            fullpath = os.path.abspath(os.path.join(dirpath, filename))
+            relpath = os.path.relpath(fullpath, root)
+            files[relpath] = self._fingerprint(fullpath, cached_files.get(relpath))
+            layout_files.append((filename, relpath))
+
+        layout_dirs = {}
+        for dirname in sorted(dirnames):
+            if dirname.startswith(".") and dirname not in explore_include:
+                continue
+            fulldir = os.path.join(dirpath, dirname)
+            if os.path.islink(fulldir):
+                realpath = os.path.realpath(fulldir)
+                if realpath in symlink_dirs:
+                    continue
+                symlink_dirs.append(realpath)
+            # Ignore metadata subtrees
+            if os.path.isdir(os.path.join(fulldir, SUFFIX)):
+                continue
+            layout_dirs[dirname] = self._scan(root, fulldir, explore_include, cached_files, files, symlink_dirs)
+
+        return layout_files, layout_dirs
+
+    @staticmethod
+    def _fingerprint(fullpath: str, cached: dict) -> dict:
+        """
+        Compares the given file against its cached record (mtime first, then content hash).
+        Content is read (and hashed) only when the mtime or size differ.
+        :param fullpath:
+        :param cached:
+        :return: file record, flagged as changed when it must be parsed again
+        """
+        stat = os.stat(fullpath)
+        if cached and cached['mtime'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return dict(cached)
+
+        with open(fullpath, 'rb') as datafile:
+            content = datafile.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+        rec = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256}
+        if cached and cached['sha256'] == sha256:
+            # Touched but not modified
+            rec['data'] = cached['data']
+            rec['touched'] = True
+            return rec
+
+        rec['changed'] = True
+        rec['content'] = content
+        return rec
+
+    @staticmethod
+    def _parse(fullpath: str, content: bytes):
+        """
+        Parses the given metadata file content (YAML).
+        :param fullpath:
+        :param content:
+        :return:
+        """
+        try:
+            return YAML(typ="safe").load(content.decode('utf-8'))
+        except YAMLError as error:
+            raise fmf.utils.FileError("Failed to parse '{0}'.\n{1}".format(fullpath, error))
+
+    @staticmethod
+    def _assemble(layout, files: dict):
+        """
+        Builds the raw data dictionary for a directory layout, using the same
+        precedence fmf.Tree.grow() applies: main.fmf, other files, then directories.
+        Returns None for directories without metadata (removed by fmf as well).
+        :param layout:
+        :param files:
+        :return:
+        """
+        layout_files, layout_dirs = layout
+        data = None
+        for filename, relpath in layout_files:
+            file_data = files[relpath]['data']
+            if filename == MAIN:
+                data = FMFTreeCache._merge({} if data is None else data, file_data or {})
+            else:
+                data = {} if data is None else data
+                FMFTreeCache._merge(data, {'/' + os.path.splitext(filename)[0]: file_data})
+
+        for dirname, sub_layout in layout_dirs.items():
+            sub_data = FMFTreeCache._assemble(sub_layout, files)
+            if sub_data is None:
+                continue
+            data = {} if data is None else data
+            FMFTreeCache._merge(data, {'/' + dirname: sub_data})
+
+        return data
+
+    @staticmethod
+    def _merge(target: dict, data: dict) -> dict:
+        """
+        Merges data into target reproducing consecutive fmf.Tree.update() calls:
+        attributes are replaced while child nodes are merged recursively.
+        :param target:
+        :param data:
+        :return: target
+        """
+        for key, value in data.items():
+            if key == '/' and isinstance(target.get('/'), dict) and isinstance(value, dict):
+                target['/'].update(value)
+            elif key == '/':
+                target['/'] = value
+            elif isinstance(key, str) and key.startswith('/'):
+                name = key.lstrip('/')
+                if '/' in name:
+                    name, rest = name.split('/', 1)
+                    value = {'/' + rest: value}
+                child_key = '/' + name
+                current = target.get(child_key)
+                if isinstance(current, dict) and isinstance(value, dict):
+                    FMFTreeCache._merge(current, value)
+                elif child_key not in target or value is not None:
+                    target[child_key] = FMFTreeCache._merge({}, value) if isinstance(value, dict) else value
+            else:
+                target[key] = value
+        return target
+
+    @staticmethod
+    def _build_cached_tree(nodes: list) -> FMFCachedNode:
+        """
+        Rebuilds the tree from the resolved (name, data, select) entries.
+        Entries are stored parents first (as returned by climb).
+        :param nodes:
+        :return: root node
+        """
+        by_name = {}
+        root = None
+        for name, data, select in nodes:
+            parent = by_name.get(os.path.dirname(name)) if name != '/' else None
+            node = FMFCachedNode(name, data, select, parent)
+            by_name[name] = node
+            if parent is None:
+                root = node
+            else:
+                parent.children[os.path.basename(name)] = node
+        return root
@@ -0,0 +1,163 @@
+import re
+
+"""
+Provides an attribute query engine for selecting FMF Test Cases, backed by
+inverted indexes that are built once from the loaded FMF Tree.
+
+Query syntax examples:
+    importance=critical and level=acceptance
+    components=router and (tags=TAG1 or tags=TAG2)
+    adapter.polarion.automated=true and not tags=TAG2
+"""
+
+
+class FMFQueryIndex(object):
+    """
+    Inverted indexes (attribute -> value -> test case names) built from
+    the leaf nodes (test cases) of an FMF Tree.
+    """
+
+    # Test case attributes that can be queried (besides adapter.<adapter id>.*)
+    KEYS = ['tags', 'components', 'subcomponents', 'importance', 'level', 'type']
+    ADAPTER_KEY = 'adapter'
+
+    # Tokens: parentheses, key(=|!=)value comparisons and keywords
+    TOKEN_RE = re.compile(r"\s*(?:(\()|(\))|([\w.\-]+)\s*(!=|=)\s*('[^']*'|\"[^\"]*\"|[^\s()]+)|([^\s()]+))")
+
+    def __init__(self, tree):
+        self._nodes = {}
+        self._order = {}
+        self._index = {}
+        for node in tree.climb():
+            self._order[node.name] = len(self._order)
+            self._nodes[node.name] = node
+            for key, value in self._indexed_values(node.data):
+                self._index.setdefault(key, {}).setdefault(value, set()).add(node.name)
+        self._all = set(self._nodes)
+
+    @staticmethod
+    def _normalize(value) -> list:
+        """
+        Returns the given attribute value as a list of strings.
+        :param value:
+        :return:
+        """
+        values = value if isinstance(value, list) else [value]
+        return [str(v).lower() if isinstance(v, bool) else str(v) for v in values if not isinstance(v, dict)]
+
+    @staticmethod
+    def _indexed_values(data: dict):
+        """
+        Yields each (key, value) pair to be indexed for the given node data.
+        :param data:
+        :return:
+        """
+        for key in FMFQueryIndex.KEYS:
+            if key in data:
+                for value in FMFQueryIndex._normalize(data[key]):
+                    yield key, value
+
+        adapters = data.get(FMFQueryIndex.ADAPTER_KEY)
+        if not isinstance(adapters, dict):
+            return
+        for adapter_id, adapter_data in adapters.items():
+            if not isinstance(adapter_data, dict):
+                continue
+            for key, value in adapter_data.items():
+                for v in FMFQueryIndex._normalize(value):
+                    yield "%s.%s.%s" % (FMFQueryIndex.ADAPTER_KEY, adapter_id, key), v
+
+    def lookup(self, key: str, value: str) -> set:
+        """
+        Returns the names of the test cases whose attribute (key) contains the given value.
+        :param key:
+        :param value:
+        :return:
+        """
+        if key not in FMFQueryIndex.KEYS and not key.startswith(FMFQueryIndex.ADAPTER_KEY + '.'):
+            raise ValueError("Invalid query key '%s' (supported: %s, %s.*)"
+                             % (key, ", ".join(FMFQueryIndex.KEYS), FMFQueryIndex.ADAPTER_KEY))
+        return self._index.get(key, {}).get(value, set())
+
+    def select(self, query: str) -> list:
+        """
+        Returns the FMF Tree nodes matching the given query, in tree order.
+        :param query:
+        :return:
+        """
+        names = self.evaluate(query)
+        return [self._nodes[name] for name in sorted(names, key=self._order.get)]
+
+    def evaluate(self, query: str) -> set:
+        """
+        Evaluates the given query, returning the set of matching test case names.
+        :param query:
+        :return:
+        """
+        tokens = self._tokenize(query)
+        if not tokens:
+            return set(self._all)
+        result, pos = self._parse_or(tokens, 0)
+        if pos != len(tokens):
+            raise ValueError("Invalid query: unexpected '%s'" % self._token_text(tokens[pos]))
+        return result
+
+    @staticmethod
+    def _tokenize(query: str) -> list:
+        tokens = []
+        query = query.strip()
+        pos = 0
+        while pos < len(query):
+            match = FMFQueryIndex.TOKEN_RE.match(query, pos)
+            if not match or match.end() == pos:
+                raise ValueError("Invalid query: %s" % query)
+            lparen, rparen, key, operator, value, word = match.groups()
+            if lparen or rparen:
+                tokens.append(lparen or rparen)
+            elif key:
+                if value[0] in ('"', "'"):
+                    value = value[1:-1]
+                tokens.append((key, operator, value))
+            else:
+                tokens.append(word.lower())
+            pos = match.end()
+        return tokens
+
+    @staticmethod
+    def _token_text(token) -> str:
+        return "".join(token) if isinstance(token, tuple) else token
+
+    def _parse_or(self, tokens: list, pos: int):
+        result, pos = self._parse_and(tokens, pos)
+        while pos < len(tokens) and tokens[pos] == 'or':
+            right, pos = self._parse_and(tokens, pos + 1)
+            result = result | right
+        return result, pos
+
+    def _parse_and(self, tokens: list, pos: int):
+        result, pos = self._parse_not(tokens, pos)
+        while pos < len(tokens) and tokens[pos] == 'and':
+            right, pos = self._parse_not(tokens, pos + 1)
+            result = result & right
+        return result, pos
+
+    def _parse_not(self, tokens: list, pos: int):
+        if pos < len(tokens) and tokens[pos] == 'not':
+            result, pos = self._parse_not(tokens, pos + 1)
+            return self._all - result, pos
+        return self._parse_term(tokens, pos)
+
+    def _parse_term(self, tokens: list, pos: int):
+        if pos >= len(tokens):
+            raise ValueError("Invalid query: unexpected end of expression")
+        token = tokens[pos]
+        if token == '(':
+            result, pos = self._parse_or(tokens, pos + 1)
+            if pos >= len(tokens) or tokens[pos] != ')':
+                raise ValueError("Invalid query: missing ')'")
+            return result, pos + 1
+        if isinstance(token, tuple):
+            key, operator, value = token
+            result = self.lookup(key, value)
+            return (set(result) if operator == '=' else self._all - result), pos + 1
+        raise ValueError("Invalid query: unexpected '%s'" % token)
@@ -1,6 +1,9 @@
-from typing import Union, List
+from typing import Union, List, TYPE_CHECKING
 
-from fmf import Tree
+from fmfexporter.metrics import METRICS
+
+if TYPE_CHECKING:
+    from fmf import Tree
 
 """
 Provides FMF TestCase related classes.
@@ -100,7 +103,8 @@ class FMFTestCase(object):
         self.adapter: dict = {}
 
     @staticmethod
-    def from_fmf_testcase_node(fmf_node: Tree):
+    @METRICS.timed('parse_node')
+    def from_fmf_testcase_node(fmf_node: 'Tree'):
         """
         This method is used to create an instance of an FMFTestCase based on a given node in the FMF Tree.
         :param fmf_node:
@@ -0,0 +1,70 @@
+import xml.etree.ElementTree as etree
+from typing import Iterator
+
+"""
+Streaming parser for JUnit XML result files. Results are read one test case
+at a time (see iter_junit_results), so memory usage does not grow with the
+size of the file.
+"""
+
+
+class JUnitResult(object):
+    """
+    Result of a JUnit test case.
+    """
+    PASSED = 'passed'
+    FAILURE = 'failure'
+    ERROR = 'error'
+    SKIPPED = 'skipped'
+
+    def __init__(self, classname: str, name: str, time: str = None, status: str = PASSED,
+                 message: str = None, text: str = None):
+        self.classname = classname
+        self.name = name
+        self.time = time
+        self.status = status
+        self.message = message
+        self.text = text
+
+    @staticmethod
+    def from_element(element: etree.Element) -> 'JUnitResult':
+        """
+        Creates a JUnitResult from a 'testcase' element.
+        :param element:
+        :return:
+        """
+        result = JUnitResult(element.get('classname', ''), element.get('name', ''), element.get('time'))
+        for status in [JUnitResult.FAILURE, JUnitResult.ERROR, JUnitResult.SKIPPED]:
+            outcome = element.find(status)
+            if outcome is not None:
+                result.status = status
+                result.message = outcome.get('message')
+                result.text = outcome.text
+                break
+        return result
+
+    def __str__(self):
+        return "%s.%s (%s)" % (self.classname, self.name, self.status)
+
+
+def iter_junit_results(junit_file) -> Iterator[JUnitResult]:
+    """
+    Yields the result of each 'testcase' element (at any level) found in the given
+    JUnit XML file (name or file object). Elements are discarded as soon as they have
+    been read, along with the (usually large) captured output.
+    :param junit_file:
+    :return:
+    """
+    parents = []
+    for event, element in etree.iterparse(junit_file, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+
+        parents.pop()
+        if element.tag == 'testcase':
+            yield JUnitResult.from_element(element)
+            if parents:
+                parents[-1].remove(element)
+        elif element.tag in ('system-out', 'system-err'):
+            element.clear()
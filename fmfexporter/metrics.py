@@ -0,0 +1,230 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+"""
+Lightweight instrumentation of an export run: wall and CPU time spent per phase
+(i.e: tree load, conversion, rendering, HTTP requests, Jira population) and counters
+(i.e: bytes sent and received, retries). Results can be printed as a summary table
+(--profile) or written as a Prometheus textfile or JSON report (--metrics-file).
+
+Phases run by worker processes (see parallel_map) are recorded as a single
+phase call by the main process. Nothing is recorded unless enabled
+(--profile or --metrics-file).
+"""
+
+
+class PhaseStats(object):
+    """
+    Calls, wall and CPU time (in seconds) recorded for a phase.
+    Memory usage is bounded: latency percentiles are estimated from a
+    uniform sample (reservoir) of the call durations.
+    """
+
+    RESERVOIR_SIZE = 1000
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max = 0.0
+        # Wall time of a sample of the calls (latency percentiles)
+        self.durations = []
+
+    def add(self, wall: float, cpu: float = 0.0):
+        """
+        Adds a call of the given wall and CPU time.
+        :param wall:
+        :param cpu:
+        :return:
+        """
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max = max(self.max, wall)
+        if len(self.durations) < PhaseStats.RESERVOIR_SIZE:
+            self.durations.append(wall)
+        else:
+            index = random.randrange(self.calls)
+            if index < PhaseStats.RESERVOIR_SIZE:
+                self.durations[index] = wall
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns the given percentile (0-100) of the call durations.
+        :param p:
+        :return:
+        """
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+    def to_dict(self) -> dict:
+        return {'calls': self.calls, 'wall_seconds': self.wall, 'cpu_seconds': self.cpu,
+                'p50_seconds': self.percentile(50), 'p95_seconds': self.percentile(95),
+                'max_seconds': self.max}
+
+
+class Metrics(object):
+    """
+    Thread-safe registry of phase timings and counters.
+    CPU time is measured for the thread running the phase, so phases
+    run concurrently (i.e: HTTP requests) are not mixed up.
+    Phases and counters are only recorded when enabled.
+    """
+
+    PROMETHEUS_PREFIX = "fmfexporter"
+    QUANTILES = [0.5, 0.95, 0.99]
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.phases = {}
+            self.counters = {}
+
+    def record(self, name: str, wall: float, cpu: float = 0.0):
+        """
+        Records a call of the given phase.
+        :param name:
+        :param wall:
+        :param cpu:
+        :return:
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = PhaseStats(name)
+            stats.add(wall, cpu)
+
+    def increment(self, name: str, value: float = 1):
+        """
+        Increments the given counter.
+        :param name:
+        :param value:
+        :return:
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Context manager that records the enclosed block as a call of the given phase.
+        :param name:
+        :return:
+        """
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def timed(self, name: str):
+        """
+        Decorator that records each call of the decorated function as a call of the given phase.
+        :param name:
+        :return:
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.phase(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {'elapsed_seconds': time.perf_counter() - self.started,
+                    'phases': {name: stats.to_dict() for name, stats in self.phases.items()},
+                    'counters': dict(self.counters)}
+
+    def summary(self) -> str:
+        """
+        Returns a table with the recorded phases (slowest first) and counters.
+        :return:
+        """
+        report = self.to_dict()
+        lines = ["%-20s %8s %10s %10s %10s %10s %10s"
+                 % ("Phase", "Calls", "Wall (s)", "CPU (s)", "p50 (ms)", "p95 (ms)", "Max (ms)")]
+        for name, stats in sorted(report['phases'].items(), key=lambda item: -item[1]['wall_seconds']):
+            lines.append("%-20s %8d %10.3f %10.3f %10.1f %10.1f %10.1f"
+                         % (name, stats['calls'], stats['wall_seconds'], stats['cpu_seconds'],
+                            stats['p50_seconds'] * 1000, stats['p95_seconds'] * 1000, stats['max_seconds'] * 1000))
+        for name, value in sorted(report['counters'].items()):
+            lines.append("%-20s %8d" % (name, value))
+        lines.append("Elapsed: %.3fs (phases may overlap when run concurrently)" % report['elapsed_seconds'])
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format (node exporter textfile collector).
+        :return:
+        """
+        prefix = Metrics.PROMETHEUS_PREFIX
+        with self._lock:
+            phases = sorted(self.phases.items())
+            counters = sorted(self.counters.items())
+            elapsed = time.perf_counter() - self.started
+
+        lines = ["# HELP %s_elapsed_seconds Duration of the export run." % prefix,
+                 "# TYPE %s_elapsed_seconds gauge" % prefix,
+                 "%s_elapsed_seconds %f" % (prefix, elapsed),
+                 "# HELP %s_phase_duration_seconds Wall time spent per phase call." % prefix,
+                 "# TYPE %s_phase_duration_seconds summary" % prefix]
+        for name, stats in phases:
+            for quantile in Metrics.QUANTILES:
+                lines.append('%s_phase_duration_seconds{phase="%s",quantile="%s"} %f'
+                             % (prefix, name, quantile, stats.percentile(quantile * 100)))
+            lines.append('%s_phase_duration_seconds_sum{phase="%s"} %f' % (prefix, name, stats.wall))
+            lines.append('%s_phase_duration_seconds_count{phase="%s"} %d' % (prefix, name, stats.calls))
+        lines += ["# HELP %s_phase_cpu_seconds_total CPU time spent per phase." % prefix,
+                  "# TYPE %s_phase_cpu_seconds_total counter" % prefix]
+        for name, stats in phases:
+            lines.append('%s_phase_cpu_seconds_total{phase="%s"} %f' % (prefix, name, stats.cpu))
+        for name, value in counters:
+            lines += ["# TYPE %s_%s_total counter" % (prefix, name),
+                      "%s_%s_total %s" % (prefix, name, value)]
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_file: str):
+        """
+        Writes the metrics atomically (so they are never scraped half written),
+        as JSON if the file name ends with .json or in the Prometheus format otherwise.
+        :param metrics_file:
+        :return:
+        """
+        if metrics_file.endswith('.json'):
+            content = json.dumps(self.to_dict(), indent=1, sort_keys=True)
+        else:
+            content = self.to_prometheus()
+        tmp_file = "%s.tmp" % metrics_file
+        with open(tmp_file, 'w') as out:
+            out.write(content)
+        os.replace(tmp_file, metrics_file)
+
+
+# Metrics of the current process
+METRICS = Metrics()
@@ -0,0 +1,29 @@
+from typing import Callable, Iterable
+
+"""
+Helpers for running CPU bound work (i.e: converting and rendering test cases)
+on a pool of processes.
+"""
+
+
+def parallel_map(func: Callable, items: Iterable, jobs: int = 1) -> list:
+    """
+    Returns [func(item) for item in items], distributing the calls across
+    a pool of jobs processes. The result order always matches the items order.
+    Both func and items must be picklable.
+    :param func:
+    :param items:
+    :param jobs: number of worker processes (1 runs everything in the current process)
+    :return:
+    """
+    items = list(items)
+    if jobs is None or jobs <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    # Imported on demand, as most executions run a single job
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A few chunks per worker keeps them busy while limiting pickling overhead
+    chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=min(jobs, len(items))) as executor:
+        return list(executor.map(func, items, chunksize=chunksize))
@@ -0,0 +1,38 @@
+import threading
+import time
+
+"""
+Helpers for limiting the rate of requests sent to external services.
+"""
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket: tokens are refilled continuously at the given rate
+    (per second) up to the burst size, and each request consumes one token.
+    A rate <= 0 means unlimited.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes one token, blocking until it is available.
+        :return:
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Token is reserved right away (balance may go negative), so waiters are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
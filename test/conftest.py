@@ -0,0 +1,62 @@
+import os
+import pytest
+
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.polarion_reporter import PolarionReporter
+
+"""
+Fixtures shared by the test modules.
+"""
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope="module")
+def testcases(request):
+    """
+    Creates a list of PolarionTestCase converted from the static FMF test cases.
+    Modules needing more test cases repeat them by setting TESTCASES_REPEAT.
+    :param request:
+    :return:
+    """
+    fmf_adapter = FMFAdapterPolarion(TEST_DIR)
+    repeat = getattr(request.module, 'TESTCASES_REPEAT', 1)
+    return fmf_adapter.convert_from_list(fmf_adapter.get_testcases_matching('test_path') * repeat)
+
+
+@pytest.fixture
+def new_config_file(tmp_path):
+    """
+    Returns a function that writes a config file into tmp_path, holding the given [polarion] settings
+    on top of the test config file or, if a PolarionImporterStub is given, of the stub urls.
+    :param tmp_path:
+    :return:
+    """
+    def new_config_file(stub=None, **settings) -> str:
+        if stub is None:
+            with open(os.path.join(TEST_DIR, 'fmfexporter.config.ini')) as config:
+                content = config.read()
+        else:
+            content = "[polarion]\nTestCaseImporterUrl=%s\nXunitImporterUrl=%s\nuser=my_user\npass=my_pass\n" \
+                      % (stub.test_case_url, stub.xunit_url)
+        config_file = tmp_path / 'config.ini'
+        config_file.write_text(content + "".join(["%s=%s\n" % item for item in settings.items()]))
+        return str(config_file)
+    return new_config_file
+
+
+@pytest.fixture
+def new_reporter(tmp_path, monkeypatch, new_config_file):
+    """
+    Returns a function that creates a reporter using a new config file (see new_config_file).
+    Files generated by the reporter are written into tmp_path.
+    :param tmp_path:
+    :param monkeypatch:
+    :param new_config_file:
+    :return:
+    """
+    def new_reporter(stub=None, **settings) -> PolarionReporter:
+        config_file = new_config_file(stub, **settings)
+        monkeypatch.chdir(tmp_path)
+        return PolarionReporter(config_file)
+    return new_reporter
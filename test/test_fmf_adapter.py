@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import pytest
+
+from fmfexporter.fmf_adapter import FMFAdapter, FMFAdapterTest
+
+"""
+Validates how FMF Test Cases are selected from the FMF Tree.
+"""
+
+
+@pytest.fixture(scope="module")
+def adapter(request) -> FMFAdapterTest:
+    """
+    Generate an adapter fixture loaded with the static test tree.
+    :param request:
+    :return:
+    """
+    return FMFAdapterTest(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_fmf_adapter_matching_any(adapter):
+    """
+    Asserts that multiple name filters are matched in one pass, with no duplicates.
+    :param adapter:
+    :return:
+    """
+    names = [tc.name for tc in adapter.get_testcases_matching_any(['sample_01', 'TestFoo', 'foo_test'])]
+    assert names == ['/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_01',
+                     '/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_02']
+
+    names = [tc.name for tc in adapter.get_testcases_matching_any(['sample_02', 'no_match', '.*'])]
+    assert names == ['/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_02']
+
+    assert len(adapter.get_testcases_matching_any(['no_match', ''])) == 2
+    assert adapter.get_testcases_matching_any(['no_match']) == []
+
+
+def test_fmf_adapter_get_testcases(adapter):
+    """
+    Asserts that many classname/testname pairs are resolved in one call, reporting the unmatched ones.
+    :param adapter:
+    :return:
+    """
+    classname = 'test_path.some_test_class.foo_test.TestFoo'
+    pairs = [(classname, 'test_foo_sample_01[router-broker]'),
+             (classname, 'test_foo_sample_01[broker-client]'),
+             (classname, 'test_foo_sample_02'),
+             (classname, 'test_foo_sample_03')]
+    testcases, unmatched = adapter.get_testcases(pairs)
+
+    assert unmatched == [(classname, 'test_foo_sample_03')]
+    assert len(testcases) == 3
+    assert testcases[pairs[0]] is testcases[pairs[1]]
+    assert testcases[pairs[0]].name == '/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_01'
+    assert testcases[pairs[2]].name == adapter.get_testcase(classname, 'test_foo_sample_02').name
+
+
+def test_fmf_adapter_iter_testcases(adapter):
+    """
+    Asserts that test cases are yielded lazily, only for leaf nodes (by default), respecting the limit.
+    :param adapter:
+    :return:
+    """
+    tc_iter = adapter.iter_testcases()
+    assert next(tc_iter).name == '/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_01'
+    assert next(tc_iter).name == '/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_02'
+    assert next(tc_iter, None) is None
+
+    assert [tc.name for tc in adapter.iter_testcases(['TestFoo'], limit=1)] == \
+        ['/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_01']
+    assert list(adapter.iter_testcases(limit=0)) == []
+    assert [tc.name for tc in adapter.iter_testcases(query='tags=TAG2')] == \
+        ['/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_02']
+
+
+def test_fmf_adapter_iter_testcases_select(tmp_path):
+    """
+    Asserts that branch nodes selected by the fmf select directive are test cases too, with or without limit.
+    :param tmp_path:
+    :return:
+    """
+    (tmp_path / '.fmf').mkdir()
+    (tmp_path / '.fmf' / 'version').write_text("1\n")
+    (tmp_path / 'main.fmf').write_text("/branch:\n    /:\n        select: true\n    tags: [BRANCH]\n"
+                                       "    /leaf:\n        summary: Leaf\n/other:\n    summary: Other\n")
+    adapter = FMFAdapterTest(str(tmp_path))
+
+    names = ['/branch', '/branch/leaf', '/other']
+    assert [tc.name for tc in adapter.iter_testcases()] == names
+    assert [tc.name for tc in adapter.iter_testcases(limit=2)] == names[:2]
+    assert [tc.name for tc in adapter.get_testcases_matching('')] == names
+    assert [tc.name for tc in adapter.iter_testcases(query='tags=BRANCH')] == names[:2]
+
+
+def test_fmf_adapter_registry():
+    """
+    Asserts that registered adapters are listed and parsed without importing them (nor their dependencies).
+    :return:
+    """
+    code = "import sys\n" \
+           "from fmfexporter.args.args_parser import FMFExporterArgParser\n" \
+           "from fmfexporter.fmf_adapter import FMFAdapter\n" \
+           "FMFExporterArgParser()\n" \
+           "print(FMFAdapter.get_available_adapters())\n" \
+           "print(sorted(m for m in ['fmf', 'jira', 'requests', 'urllib3', " \
+           "'fmfexporter.adapters.polarion.fmf_adapter_polarion'] if m in sys.modules))\n"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, check=True, stdout=subprocess.PIPE,
+                         universal_newlines=True).stdout
+    assert out.splitlines() == ["['polarion']", "[]"]
+
+    # The adapter is imported once it is needed
+    assert FMFAdapter.get_adapter_class('polarion').adapter_id() == 'polarion'
+    assert FMFAdapter.get_adapter_class('test') is FMFAdapterTest
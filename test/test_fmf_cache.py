@@ -0,0 +1,122 @@
+import os
+import shutil
+import fmf
+import pytest
+
+from benchmarks.fmf_tree_generator import generate_tree
+from fmfexporter.fmf_adapter import FMFAdapterTest
+from fmfexporter.fmf_cache import FMFTreeCache, FMFCachedNode
+
+"""
+Validates that the FMF Tree cache produces the same test cases as a regular (cold) load.
+"""
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def fmf_tree(tmp_path):
+    """
+    Copies the static FMF Tree used by the tests into a temporary directory.
+    :param tmp_path:
+    :return:
+    """
+    shutil.copytree(os.path.join(TEST_DIR, '.fmf'), str(tmp_path / 'tree' / '.fmf'))
+    shutil.copytree(os.path.join(TEST_DIR, 'test_path'), str(tmp_path / 'tree' / 'test_path'))
+    return str(tmp_path / 'tree')
+
+
+def get_testcases_by_name(adapter):
+    return {tc.name: tc.__dict__ for tc in adapter.get_testcases_matching('')}
+
+
+def test_fmf_cache_warm_load(fmf_tree, tmp_path):
+    """
+    Asserts that a warm load does not parse any file and returns the same test cases.
+    :param fmf_tree:
+    :param tmp_path:
+    :return:
+    """
+    cache_file = str(tmp_path / 'cache' / 'tree.cache')
+    expected = get_testcases_by_name(FMFAdapterTest(fmf_tree))
+
+    cache = FMFTreeCache(cache_file)
+    cold = cache.load(fmf_tree)
+    assert cache.parsed_files == 1
+    assert not isinstance(cold, FMFCachedNode)
+    assert os.path.isfile(cache_file)
+
+    warm = cache.load(fmf_tree)
+    assert cache.parsed_files == 0
+    assert isinstance(warm, FMFCachedNode)
+
+    assert get_testcases_by_name(FMFAdapterTest(fmf_tree, cache_file)) == expected
+
+
+def test_fmf_cache_modified_file(fmf_tree, tmp_path):
+    """
+    Asserts that only modified or new files are parsed again.
+    :param fmf_tree:
+    :param tmp_path:
+    :return:
+    """
+    cache_file = str(tmp_path / 'tree.cache')
+    FMFTreeCache(cache_file).load(fmf_tree)
+
+    with open(os.path.join(fmf_tree, 'test_path', 'main.fmf'), 'w') as main:
+        main.write("importance: low\n")
+    with open(os.path.join(fmf_tree, 'test_path', 'some_test_class', 'bar_test.fmf'), 'w') as bar:
+        bar.write("/TestBar:\n  /test_bar_sample_01:\n    summary: Bar\n")
+
+    cache = FMFTreeCache(cache_file)
+    cache.load(fmf_tree)
+    assert cache.parsed_files == 2
+
+    testcases = get_testcases_by_name(FMFAdapterTest(fmf_tree, cache_file))
+    assert cache.load(fmf_tree) and cache.parsed_files == 0
+    assert testcases == get_testcases_by_name(FMFAdapterTest(fmf_tree))
+    assert testcases['/test_path/some_test_class/bar_test/TestBar/test_bar_sample_01']['importance'] == 'low'
+    assert testcases['/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_01']['importance'] == 'critical'
+
+
+def test_fmf_cache_touched_file(fmf_tree, tmp_path):
+    """
+    Asserts that a file with a new mtime but same content is not parsed again.
+    :param fmf_tree:
+    :param tmp_path:
+    :return:
+    """
+    cache_file = str(tmp_path / 'tree.cache')
+    FMFTreeCache(cache_file).load(fmf_tree)
+
+    foo_test = os.path.join(fmf_tree, 'test_path', 'some_test_class', 'foo_test.fmf')
+    stat = os.stat(foo_test)
+    os.utime(foo_test, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    cache = FMFTreeCache(cache_file)
+    assert isinstance(cache.load(fmf_tree), FMFCachedNode)
+    assert cache.parsed_files == 0
+
+
+def test_fmf_cache_inheritance(tmp_path):
+    """
+    Asserts that the cached tree resolves inheritance (nested main.fmf files and "+" merges)
+    just like fmf.Tree, on a generated tree.
+    :param tmp_path:
+    :return:
+    """
+    tree = generate_tree(str(tmp_path / 'tree'), 60, depth=2, fanout=2, steps=2, testcases_per_file=10)
+    with open(os.path.join(tree, 'main.fmf'), 'a') as main:
+        main.write("tags:\n  - root\n")
+    expected = {node.name: node.data for node in fmf.Tree(tree).climb(whole=True)}
+
+    cache_file = str(tmp_path / 'tree.cache')
+    FMFTreeCache(cache_file).load(tree)
+    cache = FMFTreeCache(cache_file)
+    warm = cache.load(tree)
+    assert isinstance(warm, FMFCachedNode) and cache.parsed_files == 0
+    assert {node.name: node.data for node in warm.climb(whole=True)} == expected
+
+    leaf = expected['/area0_01/area1_00/bench_0001/TestBench0001/test_000010']
+    assert leaf['tags'] == ['root', 'L0_01', 'L1_00', 'CLASS1']
+    assert leaf['components'] == ['component01'] and leaf['subcomponents'] == ['subcomponent00']
@@ -0,0 +1,222 @@
+import copy
+import os
+import stat
+import requests
+
+from jira.exceptions import JIRAError
+
+from fmfexporter.adapters.polarion.connectors.jira.fmf_jira import FMFJiraIssueCache, FMFJiraPopulator, \
+    FMFJiraUpdate, JiraConfig
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult, \
+    PolarionImportedTestCase
+from fmfexporter.fmf_testcase import FMFTestCaseRelationship
+from fmfexporter.rate_limit import TokenBucket
+
+"""
+Ensures that Jira issues linked to the test cases are populated with the imported work items.
+"""
+
+
+class FakeIssue(object):
+    def __init__(self, client, key: str):
+        self.client = client
+        self.key = key
+        self.raw = {'key': key, 'self': 'https://jira.local/rest/api/2/issue/%s' % key, 'fields': {}}
+        # Errors raised by the next updates
+        self.errors = []
+
+    def update(self, fields: dict):
+        self.client.updates.append((self.key, fields))
+        if self.errors:
+            raise self.errors.pop(0)
+        self.raw['fields'].update(fields)
+
+
+class FakeResponse(object):
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+
+class FakeJira(object):
+    """
+    Jira client holding the given issues, recording the requests.
+    """
+
+    def __init__(self, keys: list):
+        self.issues = {key: FakeIssue(self, key) for key in keys}
+        self._options = {}
+        self._session = None
+        self.searches = []
+        self.fetched = []
+        self.updates = []
+
+    def search_issues(self, jql_str, maxResults=50, validate_query=True, fields=None):
+        keys = jql_str[len("key in ("):-1].split(",")
+        self.searches.append((keys, fields))
+        return [self.issues[key] for key in keys if key in self.issues]
+
+    def issue(self, key, fields=None):
+        self.fetched.append(key)
+        if key not in self.issues:
+            raise JIRAError(status_code=404, text='Issue Does Not Exist')
+        return self.issues[key]
+
+
+def new_populator(tmp_path, client, **settings) -> FMFJiraPopulator:
+    """
+    Creates a populator that uses the given (fake) client.
+    """
+    config_file = tmp_path / 'jira.ini'
+    config_file.write_text("[jira]\nproject=ENTMQIC\nurl=https://jira.local\nusername=u\npassword=p\n"
+                           "testcase_work_item=customfield_1\nqe_test_coverage=customfield_2\n"
+                           "verified_in_release=\n%s" % "".join(["%s=%s\n" % item for item in settings.items()]))
+    populator = FMFJiraPopulator.__new__(FMFJiraPopulator)
+    populator.config = JiraConfig(str(config_file))
+    populator.jira_login = client
+    populator.rate_limiter = TokenBucket(populator.config.update_rate)
+    populator.issue_cache = None
+    if populator.config.issue_cache_file:
+        populator.issue_cache = FMFJiraIssueCache(populator.config.issue_cache_file, populator.config.issue_cache_ttl)
+    return populator
+
+
+def get_import_result(testcases, prefix='WI') -> PolarionImportResult:
+    result = PolarionImportResult('job', testcases)
+    for index, tc in enumerate(testcases):
+        result.add(PolarionImportedTestCase(tc.id, 'passed', '%s-%d' % (prefix, index),
+                                            'https://polarion/%s-%d' % (prefix, index)))
+    return result
+
+
+def test_fmf_jira_prefetch(testcases, tmp_path, monkeypatch):
+    """
+    Asserts that the linked issues are fetched by paged searches (only the needed fields).
+    :return:
+    """
+    monkeypatch.setattr(FMFJiraPopulator, 'SEARCH_PAGE_SIZE', 2)
+    client = FakeJira(['ENTMQIC-2222', 'ENTMQIC-1', 'ENTMQIC-2'])
+    populator = new_populator(tmp_path, client)
+
+    issues = populator.prefetch_issues(['ENTMQIC-2222', 'ENTMQIC-1', 'ENTMQIC-2222', 'ENTMQIC-2', 'MISSING-1'])
+    assert sorted(issues) == ['ENTMQIC-1', 'ENTMQIC-2', 'ENTMQIC-2222']
+    assert [keys for keys, fields in client.searches] == [['ENTMQIC-2222', 'ENTMQIC-1'], ['ENTMQIC-2', 'MISSING-1']]
+    assert all([fields == ['customfield_1', 'customfield_2'] for keys, fields in client.searches])
+
+
+def test_fmf_jira_populate(testcases, tmp_path):
+    """
+    Asserts that each issue is updated once, from the prefetched snapshot, with the urls of all its test cases.
+    :return:
+    """
+    client = FakeJira(['ENTMQIC-2222'])
+    client.issues['ENTMQIC-2222'].raw['fields']['customfield_1'] = 'https://polarion/OLD,https://polarion/WI-1'
+    populator = new_populator(tmp_path, client)
+    assert [update.key for update in populator.populate_testcases(testcases, get_import_result(testcases))] == \
+        ['ENTMQIC-2222']
+
+    assert len(client.searches) == 1 and client.fetched == []
+    assert [key for key, fields in client.updates] == ['ENTMQIC-2222']
+    assert client.issues['ENTMQIC-2222'].raw['fields']['customfield_1'] == \
+        'https://polarion/OLD,https://polarion/WI-1,https://polarion/WI-0'
+
+    # Nothing changes when populated again
+    assert populator.populate_testcases(testcases, get_import_result(testcases)) == []
+    assert len(client.updates) == 1
+
+
+def test_fmf_jira_populate_missing_issue(testcases, tmp_path):
+    """
+    Asserts that issues not found are reported as failed updates, while the remaining issues are populated.
+    :return:
+    """
+    client = FakeJira(['ENTMQIC-2222'])
+    populator = new_populator(tmp_path, client)
+    testcases = [testcases[0], copy.copy(testcases[1])]
+    testcases[1].defects = [FMFTestCaseRelationship(jira='ENTMQIC-9999')]
+
+    updates = populator.populate_testcases(testcases, get_import_result(testcases))
+    assert [(update.key, update.error is None) for update in updates] == \
+        [('ENTMQIC-2222', True), ('ENTMQIC-9999', False)]
+    assert client.fetched == ['ENTMQIC-9999']
+    assert [key for key, fields in client.updates] == ['ENTMQIC-2222']
+
+
+def test_fmf_jira_update_retries(tmp_path):
+    """
+    Asserts that rate limited updates are retried after Retry-After, and that failures are reported per issue.
+    :return:
+    """
+    client = FakeJira(['A-1', 'A-2', 'A-3'])
+    client.issues['A-1'].errors = [JIRAError(status_code=429, response=FakeResponse({'Retry-After': '0.05'}))]
+    client.issues['A-2'].errors = [JIRAError(status_code=400, response=FakeResponse({}))]
+    client.issues['A-3'].errors = [JIRAError(status_code=503, response=FakeResponse({}))] * 3
+    populator = new_populator(tmp_path, client, update_concurrency=3, update_retries=2, update_retry_backoff=0.01)
+
+    updates = populator.update_issues([FMFJiraUpdate(key, client.issues[key], {'customfield_1': 'url'})
+                                       for key in ['A-1', 'A-2', 'A-3']])
+    assert [(update.key, update.attempts) for update in updates] == [('A-1', 2), ('A-2', 1), ('A-3', 3)]
+    assert updates[0].error is None
+    assert updates[1].error.status_code == 400
+    assert updates[2].error.status_code == 503
+    assert client.issues['A-1'].raw['fields'] == {'customfield_1': 'url'}
+
+
+def test_fmf_jira_issue_cache(testcases, tmp_path):
+    """
+    Asserts that issues cached by a previous execution are not fetched again until they expire.
+    :return:
+    """
+    cache_file = str(tmp_path / 'issues.json')
+    client = FakeJira(['ENTMQIC-2222'])
+    populator = new_populator(tmp_path, client, issue_cache_file=cache_file)
+    populator.populate_testcases(testcases, get_import_result(testcases))
+    assert len(client.searches) == 1 and os.path.isfile(cache_file)
+
+    # Cached issue (with the populated urls) is used by the next execution
+    populator = new_populator(tmp_path, client, issue_cache_file=cache_file)
+    assert populator.populate_testcases(testcases, get_import_result(testcases)) == []
+    assert len(client.searches) == 1 and len(client.updates) == 1
+
+    # Issues missing urls are read from Jira before the update, keeping the links added meanwhile
+    client.issues['ENTMQIC-2222'].raw['fields']['customfield_1'] += ',https://polarion/OTHER'
+    populator = new_populator(tmp_path, client, issue_cache_file=cache_file)
+    assert len(populator.populate_testcases(testcases, get_import_result(testcases, 'NEW'))) == 1
+    assert len(client.searches) == 2
+    assert client.issues['ENTMQIC-2222'].raw['fields']['customfield_1'] == \
+        'https://polarion/WI-0,https://polarion/WI-1,https://polarion/OTHER,https://polarion/NEW-0,https://polarion/NEW-1'
+
+    # Expired entries are not used
+    populator = new_populator(tmp_path, client, issue_cache_file=cache_file, issue_cache_ttl=-1)
+    assert populator.issue_cache.get('ENTMQIC-2222') is None
+
+
+def test_fmf_jira_cookie_file(tmp_path):
+    """
+    Asserts that the session cookies are only readable by the owner.
+    :return:
+    """
+    client = FakeJira([])
+    client._session = requests.Session()
+    client._session.cookies.set('JSESSIONID', 'secret')
+    cookie_file = str(tmp_path / 'cookies.json')
+    populator = new_populator(tmp_path, client, cookie_file=cookie_file)
+    populator.save_session()
+    assert stat.S_IMODE(os.stat(cookie_file).st_mode) == 0o600
+
+
+def test_fmf_jira_shared_client(tmp_path, monkeypatch):
+    """
+    Asserts that the Jira client is only created when needed, and shared by the populators.
+    :return:
+    """
+    created = []
+    monkeypatch.setattr(FMFJiraPopulator, '_clients', {})
+    monkeypatch.setattr('jira.JIRA', lambda *args, **kwargs: created.append(kwargs) or FakeJira([]))
+    config_file = tmp_path / 'jira.ini'
+    config_file.write_text("[jira]\nproject=ENTMQIC\nurl=https://jira.local\nusername=u\npassword=p\n")
+
+    populators = [FMFJiraPopulator(str(config_file)) for _ in range(2)]
+    assert created == []
+    assert populators[0].jira_login is populators[1].jira_login
+    assert len(created) == 1 and created[0]['get_server_info'] is False
+    assert created[0]['max_retries'] == 0
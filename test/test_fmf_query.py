@@ -0,0 +1,64 @@
+import os
+import pytest
+
+from fmfexporter.fmf_adapter import FMFAdapterTest
+
+"""
+Validates that FMF Test Cases are selected properly through attribute queries.
+"""
+
+SAMPLE_01 = '/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_01'
+SAMPLE_02 = '/test_path/some_test_class/foo_test/TestFoo/test_foo_sample_02'
+
+
+@pytest.fixture(scope="module")
+def adapter(request) -> FMFAdapterTest:
+    """
+    Generate an adapter fixture loaded with the static test tree.
+    :param request:
+    :return:
+    """
+    return FMFAdapterTest(os.path.dirname(os.path.abspath(__file__)))
+
+
+def query(adapter, expression, names=None):
+    return [tc.name for tc in adapter.get_testcases_by_query(expression, names)]
+
+
+def test_fmf_query_single_attribute(adapter):
+    """
+    Asserts that list and string attributes can be queried.
+    :param adapter:
+    :return:
+    """
+    assert query(adapter, 'tags=TAG1') == [SAMPLE_01]
+    assert query(adapter, 'components=router') == [SAMPLE_01, SAMPLE_02]
+    assert query(adapter, 'adapter.polarion.automated=true') == [SAMPLE_01]
+    assert query(adapter, 'adapter.polarion.project="ENTMQIC"') == [SAMPLE_01, SAMPLE_02]
+    assert query(adapter, 'importance=low') == []
+    assert query(adapter, '') == [SAMPLE_01, SAMPLE_02]
+
+
+def test_fmf_query_expressions(adapter):
+    """
+    Asserts that boolean operators, negation and parentheses are evaluated properly.
+    :param adapter:
+    :return:
+    """
+    assert query(adapter, 'importance=critical and level=component and tags=TAG1') == [SAMPLE_01]
+    assert query(adapter, 'importance=critical and not tags=TAG1') == [SAMPLE_02]
+    assert query(adapter, 'tags!=TAG1') == [SAMPLE_02]
+    assert query(adapter, '(tags=TAG1 or tags=TAG2) and type=functional') == [SAMPLE_01, SAMPLE_02]
+    assert query(adapter, 'tags=TAG1 or tags=TAG2 and importance=low') == [SAMPLE_01]
+    assert query(adapter, 'components=router', ['sample_02']) == [SAMPLE_02]
+
+
+def test_fmf_query_invalid(adapter):
+    """
+    Asserts that invalid queries are rejected.
+    :param adapter:
+    :return:
+    """
+    for expression in ['unknown=value', 'tags=TAG1 and', '(tags=TAG1', 'tags=TAG1 tags=TAG2', 'tags']:
+        with pytest.raises(ValueError):
+            adapter.get_testcases_by_query(expression)
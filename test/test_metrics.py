@@ -0,0 +1,112 @@
+import json
+import threading
+
+from fmfexporter.adapters.polarion.utils.polarion_config import PolarionConfig
+from fmfexporter.adapters.polarion.utils.polarion_importer_stub import PolarionImporterStub
+from fmfexporter.adapters.polarion.utils.polarion_session import PolarionSession
+from fmfexporter.metrics import METRICS, Metrics, PhaseStats
+
+"""
+Ensures that phase timings and counters are recorded and reported properly.
+"""
+
+
+def new_metrics() -> Metrics:
+    metrics = Metrics(enabled=True)
+
+    @metrics.timed('convert')
+    def convert(value):
+        return value * 2
+
+    assert [convert(i) for i in range(4)] == [0, 2, 4, 6]
+    with metrics.phase('tree_load'):
+        pass
+    threads = [threading.Thread(target=metrics.increment, args=('http_bytes_sent', 10)) for _ in range(5)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    return metrics
+
+
+def test_metrics_phases():
+    """
+    Asserts that each call of a phase is recorded, as well as the counters.
+    :return:
+    """
+    metrics = new_metrics()
+    report = metrics.to_dict()
+    assert report['phases']['convert']['calls'] == 4
+    assert report['phases']['tree_load']['calls'] == 1
+    assert report['counters'] == {'http_bytes_sent': 50}
+    assert metrics.phases['convert'].percentile(50) <= report['phases']['convert']['max_seconds']
+    assert metrics.summary().splitlines()[0].split()[:2] == ['Phase', 'Calls']
+
+
+def test_metrics_disabled():
+    """
+    Asserts that nothing is recorded unless enabled (i.e: --profile or --metrics-file).
+    :return:
+    """
+    metrics = Metrics()
+
+    @metrics.timed('convert')
+    def convert(value):
+        return value * 2
+
+    assert convert(2) == 4
+    with metrics.phase('tree_load'):
+        pass
+    metrics.increment('http_bytes_sent', 10)
+    assert metrics.phases == {} and metrics.counters == {}
+
+
+def test_metrics_bounded(monkeypatch):
+    """
+    Asserts that the call durations kept per phase are bounded, while calls and totals are exact.
+    :return:
+    """
+    monkeypatch.setattr(PhaseStats, 'RESERVOIR_SIZE', 10)
+    metrics = Metrics(enabled=True)
+    for index in range(100):
+        metrics.record('convert', index / 100.0)
+
+    stats = metrics.phases['convert']
+    assert len(stats.durations) == 10
+    assert stats.to_dict()['calls'] == 100 and stats.to_dict()['max_seconds'] == 0.99
+    assert abs(stats.wall - 49.5) < 1e-9
+    assert 0 <= stats.percentile(50) <= 0.99
+
+
+def test_metrics_write(tmp_path):
+    """
+    Asserts that metrics are written as JSON or in the Prometheus textfile format.
+    :return:
+    """
+    metrics = new_metrics()
+    json_file = str(tmp_path / 'metrics.json')
+    metrics.write(json_file)
+    with open(json_file) as f:
+        assert json.load(f)['phases']['convert']['calls'] == 4
+
+    prom_file = str(tmp_path / 'metrics.prom')
+    metrics.write(prom_file)
+    with open(prom_file) as f:
+        lines = f.read().splitlines()
+    assert 'fmfexporter_phase_duration_seconds_count{phase="convert"} 4' in lines
+    assert 'fmfexporter_http_bytes_sent_total 50' in lines
+    assert '# TYPE fmfexporter_phase_duration_seconds summary' in lines
+
+
+def test_metrics_http_bytes(tmp_path, monkeypatch):
+    """
+    Asserts that the bytes (not characters) of the requests sent are counted.
+    :return:
+    """
+    monkeypatch.setattr(METRICS, 'enabled', True)
+    config_file = tmp_path / 'config.ini'
+    config_file.write_text("[polarion]\nuser=my_user\npass=my_pass\n")
+    with PolarionImporterStub() as stub:
+        session = PolarionSession(PolarionConfig(str(config_file)))
+        sent = METRICS.counters.get('http_bytes_sent', 0)
+        # Rejected (not found), but sent anyway
+        session.post(stub.test_case_url + '-unknown', data='é' * 10)
+        assert METRICS.counters['http_bytes_sent'] - sent == 20
@@ -0,0 +1,107 @@
+import os
+
+from fmfexporter.adapters.polarion.args.polarion_args_parser import PolarionArgParser
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.utils.polarion_checkpoint import PolarionCheckpoint
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult, \
+    PolarionImportedTestCase
+
+"""
+Ensures that interrupted exports can be resumed from the checkpoint file.
+"""
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_polarion_checkpoint_resume(testcases, tmp_path):
+    """
+    Asserts that resumed exports skip the test cases that completed the expected phase.
+    :return:
+    """
+    checkpoint_file = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = PolarionCheckpoint(checkpoint_file)
+    checkpoint.record(testcases, PolarionCheckpoint.IMPORTED)
+    checkpoint.record(testcases[:1], PolarionCheckpoint.POPULATED)
+    checkpoint.close()
+
+    # Simulates an export interrupted while writing
+    with open(checkpoint_file, 'a') as out:
+        out.write('{"id": "trunc')
+
+    checkpoint = PolarionCheckpoint(checkpoint_file, resume=True)
+    assert list(checkpoint.filter_pending(testcases, PolarionCheckpoint.IMPORTED)) == []
+    assert list(checkpoint.filter_pending(testcases, PolarionCheckpoint.POPULATED)) == testcases[1:]
+    checkpoint.record(testcases[1:], PolarionCheckpoint.POPULATED)
+    checkpoint.close()
+
+    checkpoint = PolarionCheckpoint(checkpoint_file, resume=True)
+    assert list(checkpoint.filter_pending(testcases, PolarionCheckpoint.POPULATED)) == []
+    checkpoint.close()
+
+    # A new (not resumed) export starts from scratch
+    checkpoint = PolarionCheckpoint(checkpoint_file)
+    assert list(checkpoint.filter_pending(testcases, PolarionCheckpoint.SUBMITTED)) == testcases
+    checkpoint.close()
+    assert os.path.getsize(checkpoint_file) == 0
+
+
+def test_polarion_checkpoint_imported(testcases, tmp_path):
+    """
+    Asserts that test cases imported (but not populated) by the resumed export are not submitted
+    again, and that their work item urls are kept.
+    :return:
+    """
+    checkpoint_file = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = PolarionCheckpoint(checkpoint_file)
+    assert not os.path.exists(checkpoint_file)
+    result = PolarionImportResult('job', testcases[:1])
+    result.add(PolarionImportedTestCase(testcases[0].id, 'passed', 'WI-1', 'https://polarion/WI-1'))
+    checkpoint.record(testcases[:1], PolarionCheckpoint.IMPORTED, result)
+    checkpoint.close()
+
+    checkpoint = PolarionCheckpoint(checkpoint_file, resume=True)
+    submitted = []
+    assert list(checkpoint.filter_pending(testcases, PolarionCheckpoint.POPULATED, PolarionCheckpoint.IMPORTED,
+                                          submitted)) == testcases[1:]
+    assert submitted == testcases[:1]
+    assert checkpoint.get_import_result(submitted).work_item_url(testcases[0].id) == 'https://polarion/WI-1'
+    checkpoint.close()
+
+
+def test_polarion_checkpoint_resume_submission(testcases, tmp_path, monkeypatch):
+    """
+    Asserts that resumed exports only populate the test cases imported already by the interrupted one.
+    :return:
+    """
+    checkpoint_file = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = PolarionCheckpoint(checkpoint_file)
+    result = PolarionImportResult('job', testcases[:1])
+    result.add(PolarionImportedTestCase(testcases[0].id, 'passed', 'WI-1', 'https://polarion/WI-1'))
+    checkpoint.record(testcases[:1], PolarionCheckpoint.IMPORTED, result)
+    checkpoint.close()
+
+    monkeypatch.setattr(PolarionArgParser, 'CONFIG_FILE', os.path.join(TEST_DIR, 'fmfexporter.config.ini'))
+    monkeypatch.setattr(PolarionArgParser, 'SUBMIT', True)
+    monkeypatch.setattr(PolarionArgParser, 'POPUL_TC', True)
+    monkeypatch.setattr(PolarionArgParser, 'JIRA_CONFIG', 'jira.ini')
+    monkeypatch.setattr(PolarionArgParser, 'CHECKPOINT_FILE', checkpoint_file)
+    monkeypatch.setattr(PolarionArgParser, 'RESUME', True)
+    adapter = FMFAdapterPolarion(TEST_DIR)
+
+    submitted = []
+    populated = []
+
+    def iter_submit_testcases(tcs, parse_response, testcase_elements):
+        # Test cases are streamed
+        tcs = list(tcs)
+        submitted.extend([tc.id for tc in tcs])
+        yield PolarionImportResult('job', tcs)
+
+    monkeypatch.setattr(adapter._reporter, 'iter_submit_testcases', iter_submit_testcases)
+    monkeypatch.setattr(adapter, 'populate_jira', lambda tcs, result: populated.extend(
+        [(tc.id, result.work_item_url(tc.id)) for tc in tcs]) or [])
+
+    adapter.submit_testcases(adapter.get_testcases_matching('test_path'))
+    assert submitted == [tc.id for tc in testcases[1:]]
+    assert sorted(populated) == sorted([(testcases[0].id, 'https://polarion/WI-1')] +
+                                       [(tc.id, None) for tc in testcases[1:]])
@@ -1,6 +1,7 @@
 import pytest
 import os
 from fmfexporter.adapters.polarion.utils.polarion_config import PolarionConfig
+from fmfexporter.adapters.polarion.utils.polarion_session import PolarionSession
 
 """
 Test if configuration file needed by Polarion adapter is being properly parsed.
@@ -28,3 +29,34 @@ def test_polarion_config_parser(polarion_config):
     assert polarion_config.test_run_url() == 'https://127.0.0.1/polarion/import/xunit'
     assert polarion_config.username() == 'my_user'
     assert polarion_config.password() == 'my_pass'
+
+
+def test_polarion_config_parser_chunk_defaults(polarion_config):
+    """
+    Asserts that submissions are not split into chunks unless configured.
+    :param polarion_config:
+    :return:
+    """
+    assert polarion_config.chunk_max_testcases() == 0
+    assert polarion_config.chunk_max_bytes() == 0
+    assert polarion_config.chunk_concurrency() == 1
+
+
+def test_polarion_config_parser_http_defaults(polarion_config):
+    """
+    Asserts the default HTTP session settings and that they are applied to the pooled session.
+    :param polarion_config:
+    :return:
+    """
+    assert polarion_config.http_pool_size() == 10
+    assert polarion_config.http_timeout() == 120
+    assert polarion_config.http_retries() == 3
+    assert polarion_config.http_retry_backoff() == 1.0
+
+    session = PolarionSession(polarion_config)
+    retry = session.get_adapter(polarion_config.test_case_url()).max_retries
+    assert session.timeout == 120
+    assert retry.total == 3 and retry.allowed_methods is None
+    assert 503 in retry.status_forcelist
+    for _ in range(10):
+        assert 0 <= retry.increment(error=ConnectionError()).get_backoff_time() <= 1.0
@@ -0,0 +1,90 @@
+import os
+
+from fmfexporter.adapters.polarion.args.polarion_args_parser import PolarionArgParser
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.utils.polarion_importer_stub import PolarionImporterStub
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult, \
+    PolarionImportedTestCase
+from fmfexporter.adapters.polarion.utils.polarion_state import PolarionExportState
+
+"""
+Ensures that incremental exports only select new or changed test cases.
+"""
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_polarion_export_state_fingerprint(testcases):
+    """
+    Asserts that fingerprints are stable and ignore attributes populated on submission.
+    :param testcases:
+    :return:
+    """
+    tc = testcases[0]
+    fingerprint = PolarionExportState.fingerprint(tc)
+    tc.status = 'approved'
+    tc.test_case_work_item_url = 'https://127.0.0.1/polarion/#/project/ENTMQIC/workitem?id=ENTMQIC-1'
+    assert PolarionExportState.fingerprint(tc) == fingerprint
+    assert PolarionExportState.fingerprint(testcases[1]) != fingerprint
+
+
+def test_polarion_export_state_filter_changed(testcases, tmp_path):
+    """
+    Asserts that only new or changed test cases are returned after a state has been saved.
+    :param testcases:
+    :param tmp_path:
+    :return:
+    """
+    state_file = str(tmp_path / 'state.json')
+    state = PolarionExportState(state_file)
+    assert list(state.filter_changed(testcases)) == testcases
+
+    state.update(testcases)
+    state.save()
+
+    state = PolarionExportState(state_file)
+    assert list(state.filter_changed(testcases)) == []
+
+    testcases[1].importance = 'low'
+    assert list(state.filter_changed(testcases)) == [testcases[1]]
+
+
+def test_polarion_export_state_imported_only(testcases, tmp_path):
+    """
+    Asserts that only the test cases reported as imported are recorded.
+    :param testcases:
+    :param tmp_path:
+    :return:
+    """
+    state = PolarionExportState(str(tmp_path / 'state.json'))
+    # Import not confirmed (i.e: import job not waited for)
+    state.update(testcases, PolarionImportResult('job', testcases))
+    assert list(state.filter_changed(testcases)) == testcases
+
+    result = PolarionImportResult('job', testcases)
+    result.add(PolarionImportedTestCase(testcases[0].id, 'passed', 'WI-1'))
+    result.add(PolarionImportedTestCase(testcases[1].id, 'failed', 'WI-2'))
+    state.update(testcases, result)
+    assert list(state.filter_changed(testcases)) == testcases[1:]
+
+
+def test_polarion_export_state_submit(tmp_path, monkeypatch, new_config_file):
+    """
+    Asserts that incremental exports record the imported test cases without --jira-populate-tc,
+    so that unchanged test cases are not submitted again.
+    :return:
+    """
+    state_file = str(tmp_path / 'state.json')
+    with PolarionImporterStub() as stub:
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(PolarionArgParser, 'CONFIG_FILE', new_config_file(stub, JobPollInterval=0.05))
+        monkeypatch.setattr(PolarionArgParser, 'SUBMIT', True)
+        monkeypatch.setattr(PolarionArgParser, 'STATE_FILE', state_file)
+        adapter = FMFAdapterPolarion(TEST_DIR)
+
+        adapter.submit_testcases(adapter.get_testcases_matching('test_path'))
+        assert len(stub.stats.uploads) == 1
+        assert len(PolarionExportState(state_file).fingerprints) == 2
+
+        adapter.submit_testcases(adapter.get_testcases_matching('test_path'))
+        assert len(stub.stats.uploads) == 1
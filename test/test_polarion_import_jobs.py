@@ -0,0 +1,175 @@
+import json
+import os
+import pytest
+
+from fmfexporter.adapters.polarion.polarion_reporter import PolarionReporter
+from fmfexporter.adapters.polarion.utils.polarion_import_job import PolarionImportJob
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult
+
+"""
+Ensures that import jobs are polled concurrently and delivered as soon as each one finishes.
+"""
+
+
+class FakeResponse(object):
+    """
+    Streamed response for the (partial) content of an import job log.
+    """
+
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.status_code = status_code
+        self.content = content
+        self.read = 0
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), 16):
+            self.read += len(self.content[start:start + 16])
+            yield self.content[start:start + 16]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def get_job_log(testcase, work_item_id: str) -> str:
+    """
+    Returns the log of a finished import job that imported the given test case.
+    """
+    message = {'status': 'passed',
+               'import-testcases': [{'name': testcase.id, 'id': work_item_id, 'status': 'passed'}]}
+    return "Import in progress\nMessage Content:\n%s\n}\n%s\n%s\n" % (json.dumps(message)[:-1].replace('"', '&#034;'),
+                                                                  PolarionImportJob.FINISHED_MARKER, "x" * 1000)
+
+
+def new_job_log_reporter(new_reporter, monkeypatch, job_logs: dict, **settings):
+    """
+    Creates a reporter whose import job urls return the given logs after the given number of polls.
+    """
+    reporter = new_reporter(**settings)
+
+    polls = {}
+    responses = []
+
+    def get(url, headers=None, **kwargs):
+        polls[url] = polls.get(url, 0) + 1
+        ready_after, log = job_logs[url]
+        content = (log if polls[url] > ready_after else "Import in progress\n").encode('utf-8')
+        offset = int(headers['Range'][6:-1]) if headers and 'Range' in headers else 0
+        response = FakeResponse(content[offset:], 206 if offset else 200) if offset < len(content) \
+            else FakeResponse(b'', 416)
+        responses.append((url, offset, response))
+        return response
+
+    reporter.responses = responses
+    monkeypatch.setattr(reporter.session, 'get', get)
+    return reporter
+
+
+def test_polarion_import_jobs_finish_order(testcases, monkeypatch, new_reporter):
+    """
+    Asserts that jobs are delivered as they finish, with the imported work items assigned.
+    :return:
+    """
+    job_logs = {'slow': (3, get_job_log(testcases[0], 'ENTMQIC-1')),
+                'fast': (0, get_job_log(testcases[1], 'ENTMQIC-2'))}
+    reporter = new_job_log_reporter(new_reporter, monkeypatch, job_logs, JobPollInterval=0.01,
+                                    JobPollMaxInterval=0.02)
+
+    jobs = [PolarionImportJob('slow', [testcases[0]]), PolarionImportJob('fast', [testcases[1]])]
+    finished = list(reporter.poll_import_jobs(jobs))
+
+    assert [job.url for job in finished] == ['fast', 'slow']
+    assert [job.attempts for job in finished] == [1, 4]
+    assert all([job.error is None for job in finished])
+    assert finished[1].result.work_item_url(testcases[0].id).endswith('workitem?id=ENTMQIC-1')
+    assert finished[0].result.work_item_url(testcases[1].id).endswith('workitem?id=ENTMQIC-2')
+    assert testcases[0].test_case_work_item_url is None
+
+
+def test_polarion_import_jobs_timeout(testcases, monkeypatch, new_reporter):
+    """
+    Asserts that jobs not finished before the deadline are delivered with an error.
+    :return:
+    """
+    job_logs = {'stuck': (1000, ''), 'fast': (0, get_job_log(testcases[1], 'ENTMQIC-2'))}
+    reporter = new_job_log_reporter(new_reporter, monkeypatch, job_logs, JobPollInterval=0.01,
+                                    JobPollMaxInterval=0.05, JobPollTimeout=0.2)
+
+    finished = list(reporter.poll_import_jobs([PolarionImportJob('stuck', [testcases[0]]),
+                                               PolarionImportJob('fast', [testcases[1]])]))
+    assert [job.url for job in finished] == ['fast', 'stuck']
+    assert finished[0].error is None
+    assert 'Timed out' in str(finished[1].error)
+
+    with pytest.raises(Exception):
+        reporter.parse_import_job_data('stuck', [testcases[0]])
+
+
+def test_polarion_import_jobs_incremental_read(testcases, monkeypatch, new_reporter):
+    """
+    Asserts that each poll only reads the log appended since the previous one,
+    and that reading stops once the message content is found.
+    :return:
+    """
+    job_logs = {'job': (2, get_job_log(testcases[0], 'ENTMQIC-1'))}
+    reporter = new_job_log_reporter(new_reporter, monkeypatch, job_logs, JobPollInterval=0.01)
+    result = reporter.parse_import_job_data('job', [testcases[0]])
+
+    assert [offset for url, offset, response in reporter.responses] == [0, 19, 19]
+    assert [response.status_code for url, offset, response in reporter.responses] == [200, 416, 206]
+    last_response = reporter.responses[-1][2]
+    assert last_response.read < len(last_response.content)
+    assert result.get(testcases[0].id).work_item_id == 'ENTMQIC-1'
+
+
+def test_polarion_import_job_log_parser(testcases):
+    """
+    Asserts that the message content is parsed from the log lines.
+    :return:
+    """
+    log = get_job_log(testcases[0], 'ENTMQIC-1').splitlines()
+    message = PolarionReporter.parse_message_content(log)
+    assert message['status'] == 'passed'
+    assert message['import-testcases'][0]['id'] == 'ENTMQIC-1'
+
+
+def test_polarion_import_result_mapping(testcases, monkeypatch, new_reporter):
+    """
+    Asserts that the reported status and work item of each test case are mapped by id.
+    :return:
+    """
+    reporter = new_job_log_reporter(new_reporter, monkeypatch, {})
+    message = {'status': 'passed',
+               'import-testcases': [{'name': testcases[1].id, 'id': 'ENTMQIC-2', 'status': 'passed'},
+                                    {'name': 'unknown', 'id': 'ENTMQIC-3', 'status': 'passed'},
+                                    {'name': testcases[0].id, 'id': 'ENTMQIC-1', 'status': 'failed'}]}
+    result = reporter.map_import_result(message, PolarionImportResult('job', testcases))
+
+    assert result.status == 'passed'
+    assert sorted(result.imported) == sorted([tc.id for tc in testcases])
+    assert result.get(testcases[1].id).passed
+    assert result.work_item_url(testcases[1].id) == \
+        'https://127.0.0.1/polarion/#/project/%s/workitem?id=ENTMQIC-2' % testcases[1].project
+    assert [imported.testcase_id for imported in result.failed] == [testcases[0].id]
+    assert result.work_item_url(testcases[0].id) is None
+
+
+def test_polarion_import_jobs_failed_log(testcases, monkeypatch, new_reporter):
+    """
+    Asserts that jobs ended without a message content, or reporting an invalid project
+    (split across read chunks), are delivered with a descriptive error.
+    :return:
+    """
+    job_logs = {'rolled-back': (0, "Import in progress\nRollback\n%s\n" % PolarionImportJob.FINISHED_MARKER),
+                'invalid': (0, "Import in progress\n%s\n" % PolarionImportJob.PROJECT_ERROR)}
+    reporter = new_job_log_reporter(new_reporter, monkeypatch, job_logs, JobPollInterval=0.01,
+                                    JobPollTimeout=1)
+
+    finished = {job.url: job for job in reporter.poll_import_jobs([PolarionImportJob(url, testcases)
+                                                                   for url in job_logs])}
+    assert str(finished['rolled-back'].error) == \
+        'Polarion Import error for rolled-back: import ended without a message content'
+    assert PolarionImportJob.PROJECT_ERROR in str(finished['invalid'].error)
+    assert finished['invalid'].attempts == 1
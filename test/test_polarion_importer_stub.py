@@ -0,0 +1,40 @@
+import os
+import pytest
+
+from fmfexporter.adapters.polarion.utils.polarion_importer_stub import PolarionImporterStub
+
+"""
+Exercises the PolarionReporter end to end, against the local test case importer stand-in.
+"""
+
+
+def test_polarion_importer_stub_submit(testcases, new_reporter):
+    """
+    Asserts that chunks are submitted and their import jobs are parsed.
+    :return:
+    """
+    with PolarionImporterStub(delay=0.2) as stub:
+        reporter = new_reporter(stub, ChunkMaxTestCases=1, JobPollInterval=0.05)
+        results = list(reporter.iter_submit_testcases(testcases, parse_response=True))
+
+        assert len(stub.jobs) == 2 and len(stub.stats.uploads) == 2
+        assert sorted([tc.id for result in results for tc in result.testcases]) == sorted([tc.id for tc in testcases])
+        for result in results:
+            assert result.status == 'passed'
+            imported = result.get(result.testcases[0].id)
+            assert imported.passed and imported.work_item_id.startswith(result.testcases[0].project)
+        # Job logs were read incrementally, while the jobs were running
+        assert stub.stats.polls > 2
+        assert len(stub.stats.detection_lags) == 2
+
+
+def test_polarion_importer_stub_failures(testcases, new_reporter):
+    """
+    Asserts that failed import jobs are reported.
+    :return:
+    """
+    with PolarionImporterStub(failure_rate=1) as stub:
+        reporter = new_reporter(stub)
+        with pytest.raises(Exception, match='Error submitting 1 of 1'):
+            reporter.submit_testcases(testcases, parse_response=True)
+        assert reporter.submit_testcase(testcases[0]) == [testcases[0]]
@@ -0,0 +1,92 @@
+import os
+
+from fmfexporter.adapters.polarion.args.polarion_args_parser import PolarionArgParser
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult, \
+    PolarionImportedTestCase
+from fmfexporter.adapters.polarion.utils.polarion_journal import PolarionJobJournal
+from fmfexporter.adapters.polarion.utils.polarion_state import PolarionExportState
+
+"""
+Ensures that asynchronous submissions are journaled and collected later on.
+"""
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_polarion_journal_pending_jobs(testcases, tmp_path):
+    """
+    Asserts that journaled jobs are restored with the test case ids, projects and defects.
+    :return:
+    """
+    journal_file = str(tmp_path / 'journal.json')
+    journal = PolarionJobJournal(journal_file)
+    journal.add(PolarionImportResult('job-1', testcases[:1]))
+    journal.add(PolarionImportResult('job-2', testcases[1:]))
+    journal.save()
+
+    jobs = PolarionJobJournal(journal_file).pending_jobs()
+    assert [job.url for job in jobs] == ['job-1', 'job-2']
+    assert [tc.id for tc in jobs[1].testcases] == [tc.id for tc in testcases[1:]]
+    assert jobs[0].testcases[0].project == testcases[0].project
+    assert [defect.jira for defect in jobs[0].testcases[0].defects] == \
+           [defect.jira for defect in testcases[0].defects]
+
+    journal = PolarionJobJournal(journal_file)
+    journal.remove('job-1')
+    journal.save()
+    assert [job.url for job in PolarionJobJournal(journal_file).pending_jobs()] == ['job-2']
+
+
+def test_polarion_journal_collect(testcases, tmp_path, monkeypatch):
+    """
+    Asserts that finished jobs are applied and removed from the journal, while unfinished ones are kept.
+    :return:
+    """
+    journal_file = str(tmp_path / 'journal.json')
+    journal = PolarionJobJournal(journal_file)
+    journal.add(PolarionImportResult('done', testcases[:1]), fingerprints=True)
+    journal.add(PolarionImportResult('running', testcases[1:]), fingerprints=True)
+    journal.save()
+
+    state_file = str(tmp_path / 'state.json')
+    monkeypatch.setattr(PolarionArgParser, 'STATE_FILE', state_file)
+    monkeypatch.setattr(PolarionArgParser, 'CONFIG_FILE', os.path.join(TEST_DIR, 'fmfexporter.config.ini'))
+    monkeypatch.setattr(PolarionArgParser, 'COLLECT_JOURNAL', journal_file)
+    monkeypatch.setattr(PolarionArgParser, 'JIRA_CONFIG', 'jira.ini')
+    adapter = FMFAdapterPolarion(TEST_DIR)
+
+    def poll_import_jobs(jobs):
+        for job in jobs:
+            if job.url == 'done':
+                job.finished = True
+                job.result = PolarionImportResult(job.url, job.testcases)
+                job.result.add(PolarionImportedTestCase(job.testcases[0].id, 'passed', 'WI-1'))
+            else:
+                job.error = Exception("Timed out")
+            yield job
+
+    populated = []
+    monkeypatch.setattr(adapter._reporter, 'poll_import_jobs', poll_import_jobs)
+    monkeypatch.setattr(adapter, 'populate_jira', lambda tcs, result: populated.append([tc.id for tc in tcs]) or [])
+
+    assert adapter.run_command()
+    assert populated == [[tc.id for tc in testcases[:1]]]
+    assert [job.url for job in PolarionJobJournal(journal_file).pending_jobs()] == ['running']
+    # Only the test cases of the collected job are recorded as exported
+    assert list(PolarionExportState(state_file).filter_changed(testcases)) == testcases[1:]
+
+
+def test_polarion_journal_dry_run(tmp_path, monkeypatch, capsys):
+    """
+    Asserts that dry runs (no --submit) do not report journaled import jobs.
+    :return:
+    """
+    journal_file = str(tmp_path / 'journal.json')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(PolarionArgParser, 'ASYNC_JOURNAL', journal_file)
+    adapter = FMFAdapterPolarion(TEST_DIR)
+    adapter.submit_testcases(adapter.get_testcases_matching('test_path'))
+
+    assert "Import jobs recorded" not in capsys.readouterr().out
+    assert not os.path.exists(journal_file)
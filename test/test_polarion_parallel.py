@@ -0,0 +1,83 @@
+import os
+import pytest
+
+from fmfexporter.adapters.polarion.args.polarion_args_parser import PolarionArgParser
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.polarion_reporter import PolarionReporter
+
+"""
+Ensures that converting and rendering test cases across a process pool
+produces the same results (and order) as doing it sequentially.
+"""
+
+
+@pytest.fixture(scope="module")
+def adapter(request):
+    """
+    Creates an FMF Polarion Adapter fixture loaded with the static test tree.
+    :param request:
+    :return:
+    """
+    return FMFAdapterPolarion(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_testcase_content(ptc):
+    content = dict(ptc.__dict__)
+    content.update(steps=[(s.step, s.result) for s in ptc.steps], environment=None)
+    return content
+
+
+def get_element_content(element):
+    return [(e.tag, e.attrib, e.text) for e in element.iter()]
+
+
+def test_polarion_parallel_conversion(adapter):
+    """
+    Asserts that test cases converted by worker processes match the sequential conversion.
+    :param adapter:
+    :return:
+    """
+    fmf_testcases = adapter.get_testcases_matching('test_path') * 4
+    sequential = adapter.convert_from_list(fmf_testcases)
+    parallel = adapter.convert_from_list(fmf_testcases, jobs=3)
+
+    assert [get_testcase_content(tc) for tc in parallel] == [get_testcase_content(tc) for tc in sequential]
+
+
+def test_polarion_parallel_conversion_reporter(adapter, new_config_file, monkeypatch):
+    """
+    Asserts that adapters holding a reporter (i.e: --submit) can still convert across processes.
+    :param adapter:
+    :param new_config_file:
+    :param monkeypatch:
+    :return:
+    """
+    monkeypatch.setattr(PolarionArgParser, 'CONFIG_FILE', new_config_file())
+    monkeypatch.setattr(PolarionArgParser, 'SUBMIT', True)
+    submitting_adapter = FMFAdapterPolarion(os.path.dirname(os.path.abspath(__file__)))
+    assert submitting_adapter._reporter is not None
+
+    fmf_testcases = adapter.get_testcases_matching('test_path') * 4
+    sequential = adapter.convert_from_list(fmf_testcases)
+    parallel = submitting_adapter.convert_from_list(fmf_testcases, jobs=3)
+
+    assert [get_testcase_content(tc) for tc in parallel] == [get_testcase_content(tc) for tc in sequential]
+    assert submitting_adapter._reporter is not None
+
+
+def test_polarion_parallel_rendering(adapter):
+    """
+    Asserts that testcase elements rendered by worker processes match the sequential rendering.
+    :param adapter:
+    :return:
+    """
+    ptcs = adapter.convert_from_list(adapter.get_testcases_matching('test_path') * 4)
+    sequential = [get_element_content(e) for e in PolarionReporter.to_elements(ptcs)]
+    statuses = [tc.status for tc in ptcs]
+
+    ptcs = adapter.convert_from_list(adapter.get_testcases_matching('test_path') * 4)
+    parallel = [get_element_content(e) for e in PolarionReporter.to_elements(ptcs, jobs=3)]
+
+    assert parallel == sequential
+    assert [tc.status for tc in ptcs] == statuses
+    assert statuses[0] == 'proposed'
@@ -0,0 +1,67 @@
+import os
+import xml.etree.ElementTree as etree
+
+
+"""
+Ensures that large submissions are split into chunks limited by number of test cases and size.
+"""
+
+
+# Static FMF test cases are repeated (see the testcases fixture)
+TESTCASES_REPEAT = 5
+
+
+def get_chunk_ids(chunk):
+    return [tc.get('id') for tc in etree.parse(chunk.file_name).getroot().findall('testcase')]
+
+
+def test_polarion_reporter_single_chunk(testcases, new_reporter):
+    """
+    Asserts that all test cases are written into testcase.xml when no limits are set.
+    :return:
+    """
+    chunks = list(new_reporter().write_chunks(testcases))
+    assert len(chunks) == 1
+    assert chunks[0].file_name == 'testcase.xml'
+    assert get_chunk_ids(chunks[0]) == [tc.id for tc in testcases]
+
+
+def test_polarion_reporter_chunk_limits(testcases, new_reporter):
+    """
+    Asserts that chunks respect the number of test cases and size limits.
+    :return:
+    """
+    reporter = new_reporter(ChunkMaxTestCases=4)
+    chunks = list(reporter.write_chunks(testcases))
+    assert [len(chunk.testcases) for chunk in chunks] == [4, 4, 2]
+    assert [chunk.file_name for chunk in chunks] == ['testcase.xml', 'testcase-2.xml', 'testcase-3.xml']
+    assert sum([get_chunk_ids(chunk) for chunk in chunks], []) == [tc.id for tc in testcases]
+
+    single_size = os.path.getsize(list(reporter.write_chunks(testcases[:1]))[0].file_name)
+    reporter = new_reporter(ChunkMaxBytes=single_size * 2)
+    chunks = list(reporter.write_chunks(testcases))
+    assert all([os.path.getsize(chunk.file_name) <= single_size * 2 for chunk in chunks])
+    assert sum([get_chunk_ids(chunk) for chunk in chunks], []) == [tc.id for tc in testcases]
+    assert len(chunks) > 1
+
+
+def test_polarion_reporter_chunks_streamed(testcases, new_reporter):
+    """
+    Asserts that test cases are read as chunks are written, and that no chunks are written without test cases.
+    :return:
+    """
+    assert list(new_reporter().write_chunks([])) == []
+    assert not os.path.exists('testcase.xml')
+
+    read = []
+
+    def iter_testcases():
+        for tc in testcases:
+            read.append(tc)
+            yield tc
+
+    chunks = new_reporter(ChunkMaxTestCases=4).write_chunks(iter_testcases())
+    assert len(next(chunks).testcases) == 4
+    # The fifth test case is read to tell the first chunk is full
+    assert len(read) == 5
+    assert [len(chunk.testcases) for chunk in chunks] == [4, 2]
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+import pytest
+
+from fmfexporter.adapters.polarion.args.polarion_args_parser import PolarionArgParser
+from fmfexporter.adapters.polarion.connectors.jira.fmf_jira import FMFJiraUpdate
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.utils.polarion_import_result import PolarionImportResult
+from fmfexporter.rate_limit import TokenBucket
+
+"""
+Ensures that test cases submitted one by one are sent concurrently, within the configured limits.
+"""
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Static FMF test cases are repeated (see the testcases fixture)
+TESTCASES_REPEAT = 10
+
+
+def test_polarion_reporter_one_by_one_concurrent(testcases, monkeypatch, new_reporter):
+    """
+    Asserts that submissions run concurrently (bounded), results are kept in
+    submission order and that a failure does not stop the remaining submissions.
+    :return:
+    """
+    reporter = new_reporter(SubmitConcurrency=4)
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def import_testcase(testcase, parse_response=False):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        if testcase is testcases[3]:
+            raise Exception("import failed")
+        return PolarionImportResult('job', [testcase])
+
+    monkeypatch.setattr(reporter, 'import_testcase', import_testcase)
+    results = list(reporter.submit_testcases_one_by_one(iter(testcases)))
+
+    assert [result.testcase for result in results] == testcases
+    assert [result.error is not None for result in results].count(True) == 1
+    assert str(results[3].error) == "import failed" and results[3].result is None
+    assert results[4].result.testcases == [testcases[4]]
+    assert 1 < in_flight[1] <= 4
+
+
+def test_token_bucket_rate():
+    """
+    Asserts that the token bucket allows a burst and then limits the rate.
+    :return:
+    """
+    bucket = TokenBucket(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire()
+    # 5 tokens are available right away, remaining 5 take 1/50s each
+    assert time.monotonic() - start >= 0.09
+
+    start = time.monotonic()
+    unlimited = TokenBucket(rate=0)
+    for _ in range(1000):
+        unlimited.acquire()
+    assert time.monotonic() - start < 0.5
+
+
+def test_polarion_adapter_one_by_one_populate(monkeypatch):
+    """
+    Asserts that Jira is populated once, after all test cases have been submitted one by one.
+    :return:
+    """
+    monkeypatch.setattr(PolarionArgParser, 'CONFIG_FILE', os.path.join(TEST_DIR, 'fmfexporter.config.ini'))
+    monkeypatch.setattr(PolarionArgParser, 'SUBMIT', True)
+    monkeypatch.setattr(PolarionArgParser, 'ONE_BY_ONE', True)
+    monkeypatch.setattr(PolarionArgParser, 'JIRA_CONFIG', 'jira.ini')
+    adapter = FMFAdapterPolarion(TEST_DIR)
+
+    populated = []
+    monkeypatch.setattr(adapter._reporter, 'import_testcase',
+                        lambda testcase, parse_response=False: PolarionImportResult('job', [testcase]))
+    monkeypatch.setattr(adapter, 'populate_jira', lambda tcs, result: populated.append([tc.id for tc in tcs]) or [])
+
+    fmf_testcases = list(adapter.get_testcases_matching('test_path'))
+    adapter.submit_testcases(fmf_testcases)
+    assert populated == [[tc.id for tc in adapter.convert_from_list(fmf_testcases)]]
+
+
+def test_polarion_adapter_one_by_one_populate_failure(monkeypatch):
+    """
+    Asserts that failed Jira updates are raised once all test cases have been submitted.
+    :return:
+    """
+    monkeypatch.setattr(PolarionArgParser, 'CONFIG_FILE', os.path.join(TEST_DIR, 'fmfexporter.config.ini'))
+    monkeypatch.setattr(PolarionArgParser, 'SUBMIT', True)
+    monkeypatch.setattr(PolarionArgParser, 'ONE_BY_ONE', True)
+    monkeypatch.setattr(PolarionArgParser, 'JIRA_CONFIG', 'jira.ini')
+    adapter = FMFAdapterPolarion(TEST_DIR)
+
+    submitted = []
+    monkeypatch.setattr(adapter._reporter, 'import_testcase',
+                        lambda testcase, parse_response=False: submitted.append(testcase) or
+                        PolarionImportResult('job', [testcase]))
+    monkeypatch.setattr(adapter, 'populate_jira', lambda tcs, result: [FMFJiraUpdate('ENTMQIC-2222', None, {})])
+
+    fmf_testcases = list(adapter.get_testcases_matching('test_path'))
+    with pytest.raises(Exception, match='Error populating 1 Jira issue'):
+        adapter.submit_testcases(fmf_testcases)
+    assert len(submitted) == len(fmf_testcases)
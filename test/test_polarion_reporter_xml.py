@@ -0,0 +1,68 @@
+import copy
+import io
+import xml.etree.ElementTree as etree
+
+from fmfexporter.adapters.polarion.polarion_reporter import PolarionReporter
+
+"""
+Ensures that the Polarion test cases XML is properly streamed by the PolarionReporter.
+"""
+
+
+def test_polarion_reporter_write_xml(testcases):
+    """
+    Asserts that the streamed XML contains the properties and all test cases.
+    :param testcases:
+    :return:
+    """
+    out = io.StringIO()
+    PolarionReporter.write_xml((tc for tc in testcases), out)
+    xml = out.getvalue()
+    assert xml.startswith('<?xml version="1.0" ?>\n<testcases project-id="ENTMQIC">\n\t<properties>\n')
+
+    root = etree.fromstring(xml)
+    assert root.find('properties/property').attrib == {'name': 'lookup-method', 'value': 'name'}
+    assert [tc.get('id') for tc in root.findall('testcase')] == [tc.id for tc in testcases]
+    assert [h.get('uri') for h in root.findall('testcase/hyperlinks/hyperlink')] == \
+        ['ENTMQIC-1111', 'ENTMQIC-2222', 'ENTMQIC-1111', 'ENTMQIC-2222']
+    assert root.find('testcase/test-steps/test-step/test-step-column').text == \
+        'Parameters: router, broker, client => '
+
+
+def test_polarion_reporter_write_xml_no_indent(testcases, tmp_path):
+    """
+    Asserts that indentation does not change the XML content.
+    :param testcases:
+    :param tmp_path:
+    :return:
+    """
+    out = io.StringIO()
+    PolarionReporter.write_xml(testcases, out, indent=None)
+    assert '\n' not in out.getvalue().replace('&#10;', '')
+
+    xml_file = PolarionReporter.to_xml_file(testcases, str(tmp_path / 'testcase.xml'))
+    indented = etree.parse(xml_file).getroot()
+    not_indented = etree.fromstring(out.getvalue())
+    assert [(e.tag, e.attrib, (e.text or '').strip()) for e in indented.iter()] == \
+        [(e.tag, e.attrib, (e.text or '').strip()) for e in not_indented.iter()]
+
+
+def test_polarion_reporter_defect_hyperlinks(testcases, tmp_path, monkeypatch):
+    """
+    Asserts that defect flags (i.e: customer-case) are not exported as hyperlinks,
+    as they are not links (and boolean attribute values cannot be serialized).
+    :param testcases:
+    :param tmp_path:
+    :param monkeypatch:
+    :return:
+    """
+    # to_xml writes testcase.xml
+    monkeypatch.chdir(tmp_path)
+    tc = copy.copy(testcases[0])
+    tc.defects = [{'jira': 'ENTMQIC-1', 'customer-case': True}, {'polarion': 'ENTMQIC-2'}]
+
+    element = PolarionReporter.to_element(tc)
+    assert [(h.get('role-id'), h.get('uri')) for h in element.findall('hyperlinks/hyperlink')] == \
+        [('tc_customerdefect', 'ENTMQIC-1'), ('tc_customerdefect', 'ENTMQIC-2')]
+    root = etree.fromstring(tc.to_xml())
+    assert [h.get('uri') for h in root.findall('testcase/hyperlinks/hyperlink')] == ['ENTMQIC-1', 'ENTMQIC-2']
@@ -0,0 +1,103 @@
+import os
+import pytest
+
+from fmfexporter.adapters.polarion.args.polarion_args_parser import PolarionArgParser
+from fmfexporter.adapters.polarion.fmf_adapter_polarion import FMFAdapterPolarion
+from fmfexporter.adapters.polarion.utils.polarion_importer_stub import PolarionImporterStub
+from fmfexporter.junit import JUnitResult, iter_junit_results
+
+"""
+Ensures that JUnit results are mapped to the FMF test cases and submitted as Polarion test runs.
+"""
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+CLASSNAME = 'test_path.some_test_class.foo_test.TestFoo'
+
+JUNIT_XML = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="suite" tests="5">
+    <testcase classname="%(classname)s" name="test_foo_sample_01[router]" time="1.5">
+      <system-out>captured output</system-out>
+    </testcase>
+    <testcase classname="%(classname)s" name="test_foo_sample_01[broker]" time="2">
+      <failure message="assert 1 == 2">Traceback &amp; details</failure>
+    </testcase>
+    <testsuite name="nested">
+      <testcase classname="%(classname)s" name="test_foo_sample_02" time="0.1">
+        <skipped message="not supported"/>
+      </testcase>
+      <testcase classname="unknown.TestBar" name="test_bar" time="0.1">
+        <error message="boom"/>
+      </testcase>
+    </testsuite>
+    <system-out>suite output</system-out>
+  </testsuite>
+</testsuites>
+""" % {'classname': CLASSNAME}
+
+
+@pytest.fixture
+def junit_file(tmp_path) -> str:
+    junit_file = tmp_path / 'results.xml'
+    junit_file.write_text(JUNIT_XML)
+    return str(junit_file)
+
+
+def new_adapter(stub, new_config_file, tmp_path, monkeypatch, junit_file, submit=True) -> FMFAdapterPolarion:
+    """
+    Creates an adapter that submits the results from the given file to the given stub.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(PolarionArgParser, 'CONFIG_FILE', new_config_file(stub, ResultsChunkMaxTestCases=2))
+    monkeypatch.setattr(PolarionArgParser, 'SUBMIT', submit)
+    monkeypatch.setattr(PolarionArgParser, 'RESULTS', [junit_file])
+    monkeypatch.setattr(PolarionArgParser, 'TEST_RUN_ID', 'RUN-1')
+    return FMFAdapterPolarion(TEST_DIR)
+
+
+def test_junit_results(junit_file):
+    """
+    Asserts that all test cases (from nested suites too) are read along with their outcome.
+    :return:
+    """
+    results = list(iter_junit_results(junit_file))
+    assert [(r.name, r.status) for r in results] == [
+        ('test_foo_sample_01[router]', JUnitResult.PASSED), ('test_foo_sample_01[broker]', JUnitResult.FAILURE),
+        ('test_foo_sample_02', JUnitResult.SKIPPED), ('test_bar', JUnitResult.ERROR)]
+    assert results[0].time == '1.5'
+    assert (results[1].message, results[1].text) == ('assert 1 == 2', 'Traceback & details')
+
+
+def test_polarion_results_submit(junit_file, new_config_file, tmp_path, monkeypatch):
+    """
+    Asserts that matched results are submitted to the same test run, in size bounded files.
+    :return:
+    """
+    with PolarionImporterStub() as stub:
+        adapter = new_adapter(stub, new_config_file, tmp_path, monkeypatch, junit_file)
+        assert adapter.run_command()
+
+        results = stub.test_runs['RUN-1']
+        assert len(stub.stats.uploads) == 2
+        assert [r.get('name') for r in results] == ['%s.test_foo_sample_01' % CLASSNAME] * 2 + \
+            ['%s.test_foo_sample_02' % CLASSNAME]
+        assert results[1].find('failure').get('message') == 'assert 1 == 2'
+        assert results[2].find('skipped') is not None
+        assert results[0].find('properties/property').get('value') == '%s.test_foo_sample_01' % CLASSNAME
+
+
+def test_polarion_results_dry_run(junit_file, new_config_file, tmp_path, monkeypatch):
+    """
+    Asserts that the test run files are only generated when --submit is not set.
+    :return:
+    """
+    with PolarionImporterStub() as stub:
+        adapter = new_adapter(stub, new_config_file, tmp_path, monkeypatch, junit_file, submit=False)
+        assert adapter.run_command()
+        assert stub.stats.uploads == [] and stub.test_runs == {}
+
+    assert sorted(os.listdir(str(tmp_path))) == ['config.ini', 'results.xml', 'testrun-2.xml', 'testrun.xml']
+    with open(str(tmp_path / 'testrun.xml')) as xml:
+        content = xml.read()
+    assert '<property name="polarion-testrun-id" value="RUN-1" />' in content
+    assert '<property name="polarion-project-id" value="ENTMQIC" />' in content